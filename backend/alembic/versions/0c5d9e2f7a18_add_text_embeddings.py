@@ -0,0 +1,45 @@
+"""Add text_embeddings table
+
+Revision ID: 0c5d9e2f7a18
+Revises: f3c8a1d6b2e4
+Create Date: 2026-10-17 19:04:52.117730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c5d9e2f7a18'
+down_revision = 'f3c8a1d6b2e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled as turns, emails and documents are seen; no backfill
+    op.create_table('text_embeddings',
+    sa.Column('id', sa.UUID(), server_default=sa.text('uuid_generate_v7()'), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('source_id', sa.String(), nullable=True),
+    sa.Column('chat_guid', sa.String(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('vector', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'model', 'source', 'source_id', name='uq_text_embeddings_user_model_source')
+    )
+    op.create_index(
+        'ix_text_embeddings_user_model_created',
+        'text_embeddings',
+        ['user_id', 'model', sa.text('created_at DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_text_embeddings_user_model_created', table_name='text_embeddings')
+    op.drop_table('text_embeddings')
@@ -0,0 +1,31 @@
+"""Index conversation turns by message GUID (replayed turns reuse their row)
+
+Revision ID: 3b9e6d2f1c85
+Revises: 7d07ec1fde0f
+Create Date: 2026-10-17 23:05:12.447391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e6d2f1c85'
+down_revision = '7d07ec1fde0f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # tasks is partitioned, so CONCURRENTLY isn't available; the index is
+    # created on each partition
+    op.create_index(
+        'ix_tasks_user_message_guid',
+        'tasks',
+        ['user_id', sa.text("(tast_metadata ->> 'message_guid')")],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_user_message_guid', table_name='tasks')
@@ -0,0 +1,29 @@
+"""Add processed_messages table for webhook deduplication
+
+Revision ID: 5b2c9e7d4a13
+Revises: ddf2bf48e522
+Create Date: 2026-10-17 10:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2c9e7d4a13'
+down_revision = 'ddf2bf48e522'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('processed_messages',
+    sa.Column('message_guid', sa.String(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('message_guid')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('processed_messages')
@@ -0,0 +1,58 @@
+"""Add full-text search columns and GIN indexes to conversation_messages and tasks
+
+Revision ID: 5e8b1f4c2a97
+Revises: 0c5d9e2f7a18
+Create Date: 2026-10-17 19:48:26.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b1f4c2a97'
+down_revision = '0c5d9e2f7a18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # btree_gin lets one GIN index cover (user_id, search_vector)
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    # Stored generated columns: Postgres keeps them in sync on every write.
+    # Adding them rewrites both tables (on tasks, every partition): run during
+    # a maintenance window.
+    op.add_column('conversation_messages', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', content)", persisted=True),
+        nullable=True
+    ))
+    op.add_column('tasks', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', input || ' ' || coalesce(output, ''))", persisted=True),
+        nullable=True
+    ))
+
+    # Partitioned tables can't build indexes CONCURRENTLY; each partition gets its own
+    op.create_index('ix_tasks_search', 'tasks', ['user_id', 'search_vector'], unique=False, postgresql_using='gin')
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_conversation_messages_search',
+            'conversation_messages',
+            ['user_id', 'search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_messages_search', table_name='conversation_messages')
+    op.drop_index('ix_tasks_search', table_name='tasks')
+    op.drop_column('conversation_messages', 'search_vector')
+    op.drop_column('tasks', 'search_vector')
@@ -0,0 +1,38 @@
+"""Make text_embeddings.source_id NOT NULL (content hash when there is no source id)
+
+Revision ID: 7d07ec1fde0f
+Revises: 5e8b1f4c2a97
+Create Date: 2026-10-17 21:12:40.318526
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d07ec1fde0f'
+down_revision = '5e8b1f4c2a97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULLs are distinct in unique constraints, so rows without a source id
+    # never conflicted; give them the id EmbeddingService now derives
+    # (sha256 of the embedded content) and drop the duplicates that piled up
+    op.execute(
+        "UPDATE text_embeddings "
+        "SET source_id = 'sha256:' || encode(sha256(convert_to(content, 'UTF8')), 'hex') "
+        "WHERE source_id IS NULL"
+    )
+    op.execute(
+        "DELETE FROM text_embeddings newer USING text_embeddings older "
+        "WHERE newer.user_id = older.user_id AND newer.model = older.model "
+        "AND newer.source = older.source AND newer.source_id = older.source_id "
+        "AND (newer.created_at, newer.id) > (older.created_at, older.id)"
+    )
+    op.alter_column('text_embeddings', 'source_id', existing_type=sa.String(), nullable=False)
+
+
+def downgrade() -> None:
+    op.alter_column('text_embeddings', 'source_id', existing_type=sa.String(), nullable=True)
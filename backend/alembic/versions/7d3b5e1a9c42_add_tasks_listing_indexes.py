@@ -0,0 +1,37 @@
+"""Add composite indexes for task listing
+
+Revision ID: 7d3b5e1a9c42
+Revises: e2a7c9f4b816
+Create Date: 2026-10-17 15:48:06.902137
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3b5e1a9c42'
+down_revision = 'e2a7c9f4b816'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_tasks_user_created', ['user_id', 'created_at', 'id']),
+    ('ix_tasks_user_type_created', ['user_id', 'type', 'created_at', 'id']),
+    ('ix_tasks_user_status_created', ['user_id', 'status', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction; avoids locking tasks against writes
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'tasks', columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        # ix_tasks_user_created leads with user_id
+        op.drop_index('ix_tasks_user_id', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_user_id', 'tasks', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name='tasks', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,47 @@
+"""Default tasks, integrations and conversation_messages ids to UUIDv7
+
+Revision ID: a9f0d2c6e3b1
+Revises: 7d3b5e1a9c42
+Create Date: 2026-10-17 16:20:53.114826
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9f0d2c6e3b1'
+down_revision = '7d3b5e1a9c42'
+branch_labels = None
+depends_on = None
+
+TABLES = ['tasks', 'integrations', 'conversation_messages']
+
+
+def upgrade() -> None:
+    # Existing ids stay as they are: the column type doesn't change and v4/v7
+    # values coexist. The app generates ids itself (app.utils.ids.uuid7); the
+    # server default covers rows inserted directly in SQL.
+    # A v4 UUID with the first 48 bits replaced by the Unix time in ms and the
+    # version nibble set to 7 (bits 52 and 53 turn 0100 into 0111).
+    op.execute("""
+        CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+            SELECT encode(
+                set_bit(
+                    set_bit(
+                        overlay(uuid_send(gen_random_uuid())
+                                placing substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                                FROM 1 FOR 6),
+                        52, 1),
+                    53, 1),
+                'hex')::uuid
+        $$ LANGUAGE sql VOLATILE
+    """)
+    for table in TABLES:
+        op.alter_column(table, 'id', server_default=sa.text('uuid_generate_v7()'))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.alter_column(table, 'id', server_default=None)
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7()")
@@ -0,0 +1,99 @@
+"""Range-partition tasks by created_at (monthly)
+
+Revision ID: b6e1f8a3d5c7
+Revises: a9f0d2c6e3b1
+Create Date: 2026-10-17 17:02:31.640518
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1f8a3d5c7'
+down_revision = 'a9f0d2c6e3b1'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+INDEXES = [
+    ('ix_tasks_user_created', ['user_id', 'created_at', 'id']),
+    ('ix_tasks_user_type_created', ['user_id', 'type', 'created_at', 'id']),
+    ('ix_tasks_user_status_created', ['user_id', 'status', 'created_at', 'id']),
+]
+
+COLUMNS = """
+    id uuid NOT NULL DEFAULT uuid_generate_v7(),
+    user_id uuid NOT NULL REFERENCES users (id),
+    type tasktype NOT NULL,
+    input text NOT NULL,
+    output text,
+    status taskstatus NOT NULL,
+    tast_metadata jsonb,
+    created_at timestamp without time zone NOT NULL
+"""
+
+COLUMN_NAMES = "id, user_id, type, input, output, status, tast_metadata, created_at"
+
+
+# Same naming as app.core.partitions (copied so the migration stays stable)
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    years, index = divmod(month.month - 1 + months, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def create_partition_sql(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS tasks_p{month:%Y_%m} PARTITION OF tasks "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def _retire_old_table(old_name: str) -> None:
+    """Rename the current tasks table and free its index/constraint names"""
+    op.execute(f"ALTER TABLE tasks RENAME TO {old_name}")
+    op.execute(f"ALTER TABLE {old_name} RENAME CONSTRAINT tasks_pkey TO {old_name}_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_indexes() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, 'tasks', columns, unique=False)
+
+
+def upgrade() -> None:
+    # Rewrites the table under an exclusive lock: run during a maintenance window.
+    # The primary key must include the partition key, so it becomes (id, created_at);
+    # ids are still unique (nothing else references tasks.id with a foreign key).
+    _retire_old_table('tasks_unpartitioned')
+    op.execute(f"CREATE TABLE tasks ({COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)")
+
+    conn = op.get_bind()
+    oldest = conn.execute(sa.text("SELECT min(created_at) FROM tasks_unpartitioned")).scalar()
+    this_month = month_start(datetime.utcnow().date())
+    month = month_start(oldest.date()) if oldest else this_month
+    while month <= add_months(this_month, MONTHS_AHEAD):
+        op.execute(create_partition_sql(month))
+        month = add_months(month, 1)
+    op.execute("CREATE TABLE tasks_default PARTITION OF tasks DEFAULT")
+
+    op.execute(f"INSERT INTO tasks ({COLUMN_NAMES}) SELECT {COLUMN_NAMES} FROM tasks_unpartitioned")
+    op.execute("DROP TABLE tasks_unpartitioned")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    # Archived (detached) partitions are not merged back
+    _retire_old_table('tasks_partitioned')
+    op.execute(f"CREATE TABLE tasks ({COLUMNS}, PRIMARY KEY (id))")
+    op.execute(f"INSERT INTO tasks ({COLUMN_NAMES}) SELECT {COLUMN_NAMES} FROM tasks_partitioned")
+    op.execute("DROP TABLE tasks_partitioned")
+    _create_indexes()
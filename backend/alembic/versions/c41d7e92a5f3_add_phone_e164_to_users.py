@@ -0,0 +1,68 @@
+"""Add phone_e164 to users with a unique index
+
+Revision ID: c41d7e92a5f3
+Revises: 8f3a1c6e2b90
+Create Date: 2026-10-17 13:05:22.480911
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+import phonenumbers
+from phonenumbers import NumberParseException
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e92a5f3'
+down_revision = '8f3a1c6e2b90'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic")
+
+
+def _to_e164(phone_number):
+    """Same normalization as app.utils.phone.to_e164 (copied so the migration stays stable)"""
+    if not phone_number:
+        return None
+    try:
+        parsed_number = phonenumbers.parse(phone_number, None)
+    except NumberParseException:
+        try:
+            parsed_number = phonenumbers.parse(phone_number, 'US')
+        except NumberParseException:
+            return None
+    if not phonenumbers.is_possible_number(parsed_number):
+        return None
+    return phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.E164)
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('phone_e164', sa.String(), nullable=True))
+
+    # Backfill from phone_number; on duplicates the oldest account keeps the number
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT id, phone_number FROM users WHERE phone_number IS NOT NULL ORDER BY created_at"
+    )).fetchall()
+    claimed = set()
+    for user_id, phone_number in rows:
+        phone_e164 = _to_e164(phone_number)
+        if not phone_e164:
+            continue
+        if phone_e164 in claimed:
+            logger.warning(f"Skipping duplicate phone number {phone_e164} for user {user_id}")
+            continue
+        claimed.add(phone_e164)
+        conn.execute(
+            sa.text("UPDATE users SET phone_e164 = :phone_e164 WHERE id = :id"),
+            {"phone_e164": phone_e164, "id": user_id}
+        )
+
+    op.create_index(op.f('ix_users_phone_e164'), 'users', ['phone_e164'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_phone_e164'), table_name='users')
+    op.drop_column('users', 'phone_e164')
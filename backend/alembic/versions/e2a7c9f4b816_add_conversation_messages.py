@@ -0,0 +1,57 @@
+"""Add conversation_messages table and backfill it from tasks
+
+Revision ID: e2a7c9f4b816
+Revises: c41d7e92a5f3
+Create Date: 2026-10-17 15:12:40.318264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c9f4b816'
+down_revision = 'c41d7e92a5f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('conversation_messages',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('chat_guid', sa.String(), nullable=True),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('task_id', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Backfill the turns get_recent_history used to read from tasks: completed
+    # TEXT tasks with a response. Each becomes a user row and an assistant row
+    # (1 microsecond later, so the pair keeps its order).
+    op.execute("""
+        INSERT INTO conversation_messages (id, user_id, chat_guid, role, content, task_id, created_at)
+        SELECT gen_random_uuid(), user_id, tast_metadata->>'chat_guid', 'user', input, id, created_at
+        FROM tasks
+        WHERE type = 'TEXT' AND status = 'COMPLETED' AND output IS NOT NULL AND input <> ''
+        UNION ALL
+        SELECT gen_random_uuid(), user_id, tast_metadata->>'chat_guid', 'assistant', output, id,
+               created_at + interval '1 microsecond'
+        FROM tasks
+        WHERE type = 'TEXT' AND status = 'COMPLETED' AND output IS NOT NULL AND output <> ''
+    """)
+
+    op.create_index(
+        'ix_conversation_messages_user_chat_created',
+        'conversation_messages',
+        ['user_id', 'chat_guid', sa.text('created_at DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_messages_user_chat_created', table_name='conversation_messages')
+    op.drop_table('conversation_messages')
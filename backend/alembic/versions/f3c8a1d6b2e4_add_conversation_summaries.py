@@ -0,0 +1,37 @@
+"""Add conversation_summaries table
+
+Revision ID: f3c8a1d6b2e4
+Revises: b6e1f8a3d5c7
+Create Date: 2026-10-17 18:21:09.482317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a1d6b2e4'
+down_revision = 'b6e1f8a3d5c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Summaries are built lazily by the summarizer as chats continue; no backfill
+    op.create_table('conversation_summaries',
+    sa.Column('id', sa.UUID(), server_default=sa.text('uuid_generate_v7()'), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('chat_guid', sa.String(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('summarized_through', sa.DateTime(), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'chat_guid', name='uq_conversation_summaries_user_chat')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('conversation_summaries')
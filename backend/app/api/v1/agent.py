@@ -2,10 +2,12 @@
 Agent endpoints
 """
 from fastapi import APIRouter, Depends, BackgroundTasks
-from sqlalchemy.orm import Session
-from app.core.dependencies import get_database
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal
+from app.core.dependencies import get_async_database
 from app.api.v1.auth import get_current_user_id
 from app.services.agent.agent import AgentService
+from app.services.agent.handlers.base_handler import TaskData
 from app.services.task_service import TaskService
 from app.schemas.task import TaskCreate, TaskResponse
 from pydantic import BaseModel
@@ -21,46 +23,53 @@ class ProcessRequest(BaseModel):
 
 
 async def process_task_background(
-    db: Session,
     user_id: UUID,
     task_id: UUID,
     agent: AgentService
 ):
-    """Background task to process with agent"""
-    from app.models.task import TaskStatus
+    """Background task to process with agent
     
-    # Get task
-    task = TaskService.get_task(db, task_id, user_id)
-    if not task:
-        return
+    Opens its own session: the request's session is closed once the response is sent.
+    """
+    from app.models.task import TaskStatus
     
-    try:
-        # Process with agent
-        task_data = {
-            "input": task.input,
-            "type": task.type.value,
-            "metadata": task.metadata
-        }
-        result = await agent.process_task(task_data)
+    async with AsyncSessionLocal() as db:
+        # Get task
+        task = await TaskService.get_task_async(db, task_id, user_id)
+        if not task:
+            return
         
-        # Update task
-        TaskService.update_task(
-            db=db,
-            task_id=task_id,
-            user_id=user_id,
-            output=result.get("output"),
-            status=TaskStatus.COMPLETED if result.get("status") == "completed" else TaskStatus.FAILED,
-            metadata=result.get("metadata")
-        )
-    except Exception as e:
-        # Update task with error
-        TaskService.update_task(
-            db=db,
-            task_id=task_id,
-            user_id=user_id,
-            status=TaskStatus.FAILED,
-            metadata={"error": str(e)}
-        )
+        try:
+            # Process with agent
+            task_data = TaskData(
+                input=task.input,
+                type=task.type.value,
+                user_id=str(user_id),
+                task_id=str(task_id),
+                metadata=task.tast_metadata or {},
+                db=db
+            )
+            result = await agent.process_task(task_data)
+            
+            # Update task
+            await TaskService.update_task_async(
+                db=db,
+                task_id=task_id,
+                user_id=user_id,
+                output=result.output,
+                status=TaskStatus.COMPLETED if result.status == "completed" else TaskStatus.FAILED,
+                metadata=result.metadata
+            )
+        except Exception as e:
+            # Update task with error
+            await db.rollback()
+            await TaskService.update_task_async(
+                db=db,
+                task_id=task_id,
+                user_id=user_id,
+                status=TaskStatus.FAILED,
+                metadata={"error": str(e)}
+            )
 
 
 @router.post("/process", response_model=TaskResponse)
@@ -68,11 +77,10 @@ async def process_request(
     request: ProcessRequest,
     background_tasks: BackgroundTasks,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Process a user request with the agent"""
     from app.models.task import TaskType
-    from app.schemas.task import TaskCreate
     
     # Determine task type (simplified - can be enhanced with LLM)
     task_type = TaskType.TEXT  # Default
@@ -84,7 +92,7 @@ async def process_request(
         metadata=request.metadata
     )
     
-    task = TaskService.create_task(
+    task = await TaskService.create_task_async(
         db=db,
         user_id=UUID(user_id),
         task_data=task_data.dict()
@@ -94,7 +102,6 @@ async def process_request(
     agent = AgentService()
     background_tasks.add_task(
         process_task_background,
-        db=db,
         user_id=UUID(user_id),
         task_id=task.id,
         agent=agent
@@ -3,8 +3,8 @@ Authentication endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.dependencies import get_database
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.dependencies import get_async_database
 from app.schemas.auth import UserRegister, UserLogin, Token
 from app.schemas.user import UserResponse
 from app.services.user_service import UserService
@@ -17,8 +17,7 @@ security = HTTPBearer()
 
 
 def get_current_user_id(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_database)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> str:
     """Get current user ID from JWT token"""
     from app.utils.auth import decode_token
@@ -38,11 +37,11 @@ def get_current_user_id(
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserRegister,
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Register a new user"""
     # Check if user already exists
-    existing_user = UserService.get_user_by_email(db, user_data.email)
+    existing_user = await UserService.get_user_by_email_async(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -54,17 +53,17 @@ async def register(
         email=user_data.email,
         password=user_data.password
     )
-    user = UserService.create_user(db, user_create)
+    user = await UserService.create_user_async(db, user_create)
     return user
 
 
 @router.post("/login", response_model=Token)
 async def login(
     user_data: UserLogin,
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Login and get access token"""
-    user = UserService.authenticate_user(db, user_data.email, user_data.password)
+    user = await UserService.authenticate_user_async(db, user_data.email, user_data.password)
     if not user:
         raise AuthenticationError("Invalid email or password")
     
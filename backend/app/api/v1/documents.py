@@ -1,19 +1,55 @@
 """
 Document processing endpoints
 """
+import asyncio
 from fastapi import APIRouter, Depends, UploadFile, File, BackgroundTasks
-from sqlalchemy.orm import Session
-from app.core.dependencies import get_database
+from typing import Dict, Any, Optional
+from app.core.config import settings
+from app.core.jobs import job_queue
 from app.api.v1.auth import get_current_user_id
 from app.processors.document_processor import DocumentProcessor
 from app.services.agent.agent import AgentService
+from app.services.agent.handlers.base_handler import TaskData
 from uuid import UUID
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
 
+DOCUMENT_JOB_KIND = "document.process"
+
+
+async def process_document(
+    user_id: UUID,
+    file_data: bytes,
+    filename: str,
+    agent: AgentService,
+    processor: DocumentProcessor
+):
+    """Extract a document's text and hand it to the agent
+    
+    Raises:
+        RuntimeError: If the agent reports the task as failed
+    """
+    # Process document
+    result = await processor.process(file_data, filename)
+    
+    # Extract text
+    text = await processor.extract_text(file_data, filename)
+    
+    # Process with agent
+    task_data = TaskData(
+        input=f"Analyze this document: {filename}\n\nContent:\n{text}",
+        type="document",
+        user_id=str(user_id),
+        metadata=result
+    )
+    
+    task_result = await agent.process_task(task_data)
+    if task_result.status == "failed":
+        raise RuntimeError(f"Agent failed to process {filename}: {task_result.output}")
+
+
 async def process_document_background(
-    db: Session,
     user_id: UUID,
     file_data: bytes,
     filename: str,
@@ -22,42 +58,55 @@ async def process_document_background(
 ):
     """Background task to process document"""
     try:
-        # Process document
-        result = await processor.process(file_data, filename)
-        
-        # Extract text
-        text = await processor.extract_text(file_data, filename)
-        
-        # Process with agent
-        task_data = {
-            "input": f"Analyze this document: {filename}\n\nContent:\n{text}",
-            "type": "document",
-            "metadata": result
-        }
-        
-        await agent.process_task(task_data)
+        await process_document(user_id, file_data, filename, agent, processor)
     except Exception as e:
         print(f"Error processing document: {e}")
 
 
+async def run_document_job(payload: Dict[str, Any], data: Optional[bytes] = None):
+    """Job handler for uploads enqueued into the jobs table (errors, including a failed agent task, trigger a retry)"""
+    await process_document(
+        user_id=UUID(payload["user_id"]),
+        file_data=data or b"",
+        filename=payload["filename"],
+        agent=AgentService(),
+        processor=DocumentProcessor()
+    )
+
+
+job_queue.register(DOCUMENT_JOB_KIND, run_document_job)
+
+
 @router.post("/upload")
 async def upload_document(
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = BackgroundTasks(),
-    user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_database)
+    user_id: str = Depends(get_current_user_id)
 ):
     """Upload and process a document"""
     # Read file
     file_data = await file.read()
     
+    # With the Postgres job queue, any worker process can pick the upload up
+    if settings.JOBS_ENABLED:
+        await asyncio.to_thread(
+            job_queue.enqueue,
+            DOCUMENT_JOB_KIND,
+            {"user_id": user_id, "filename": file.filename or "unknown"},
+            file_data
+        )
+        return {
+            "status": "uploaded",
+            "filename": file.filename,
+            "message": "Document is being processed"
+        }
+    
     # Process in background
     processor = DocumentProcessor()
     agent = AgentService()
     
     background_tasks.add_task(
         process_document_background,
-        db=db,
         user_id=UUID(user_id),
         file_data=file_data,
         filename=file.filename or "unknown",
@@ -1,14 +1,16 @@
 """
 Integration endpoints
 """
+import asyncio
 from fastapi import APIRouter, Depends
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.dependencies import get_database
+from app.core.dependencies import get_async_database
 from app.api.v1.auth import get_current_user_id
 from app.integrations.registry import integration_registry
 from app.core.config import settings
+from app.services.integration_service import GOOGLE_PROVIDERS, IntegrationService
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/integrations", tags=["integrations"])
@@ -33,15 +35,12 @@ async def list_integrations():
 @router.get("/connected")
 async def list_connected_integrations(
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """List user's connected integrations"""
-    from app.models.integration import Integration
     from uuid import UUID
     
-    user_integrations = db.query(Integration).filter(
-        Integration.user_id == UUID(user_id)
-    ).all()
+    user_integrations = await IntegrationService.list_integrations_async(db, UUID(user_id))
     
     # Consolidate Google Calendar and Google Docs into single "google" provider
     connected_providers = set()
@@ -99,7 +98,7 @@ async def google_oauth_callback(
     code: str = None,
     state: str = None,
     error: str = None,
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Handle Google OAuth callback - connects both Calendar and Docs"""
     from app.integrations.google.oauth import GoogleOAuth
@@ -129,70 +128,34 @@ async def google_oauth_callback(
         return RedirectResponse(url=redirect_url)
     
     try:
-        # Exchange code for credentials
-        credentials = GoogleOAuth.exchange_code_for_credentials(code)
+        # Exchange code for credentials (blocking HTTP call, so off the event loop)
+        credentials = await asyncio.to_thread(GoogleOAuth.exchange_code_for_credentials, code)
         
         # Store credentials for Google Calendar, Google Docs, and Gmail
         # They share the same credentials since it's one Google account
+        existing = {
+            integration.provider: integration
+            for integration in await IntegrationService.list_integrations_async(db, UUID(user_id), GOOGLE_PROVIDERS)
+        }
+        for provider in (
+            IntegrationProvider.GOOGLE_CALENDAR.value,
+            IntegrationProvider.GOOGLE_DOCS.value,
+            IntegrationProvider.GOOGLE_GMAIL.value
+        ):
+            integration = existing.get(provider)
+            if not integration:
+                db.add(Integration(
+                    id=uuid4(),
+                    user_id=UUID(user_id),
+                    provider=provider,
+                    credentials=credentials,
+                    status="connected"
+                ))
+            else:
+                integration.credentials = credentials
+                integration.status = "connected"
         
-        # Create/update Google Calendar integration
-        calendar_integration = db.query(Integration).filter(
-            Integration.user_id == UUID(user_id),
-            Integration.provider == IntegrationProvider.GOOGLE_CALENDAR.value
-        ).first()
-        
-        if not calendar_integration:
-            calendar_integration = Integration(
-                id=uuid4(),
-                user_id=UUID(user_id),
-                provider=IntegrationProvider.GOOGLE_CALENDAR.value,
-                credentials=credentials,
-                status="connected"
-            )
-            db.add(calendar_integration)
-        else:
-            calendar_integration.credentials = credentials
-            calendar_integration.status = "connected"
-        
-        # Create/update Google Docs integration
-        docs_integration = db.query(Integration).filter(
-            Integration.user_id == UUID(user_id),
-            Integration.provider == IntegrationProvider.GOOGLE_DOCS.value
-        ).first()
-        
-        if not docs_integration:
-            docs_integration = Integration(
-                id=uuid4(),
-                user_id=UUID(user_id),
-                provider=IntegrationProvider.GOOGLE_DOCS.value,
-                credentials=credentials,  # Same credentials
-                status="connected"
-            )
-            db.add(docs_integration)
-        else:
-            docs_integration.credentials = credentials
-            docs_integration.status = "connected"
-        
-        # Create/update Gmail integration
-        gmail_integration = db.query(Integration).filter(
-            Integration.user_id == UUID(user_id),
-            Integration.provider == IntegrationProvider.GOOGLE_GMAIL.value
-        ).first()
-        
-        if not gmail_integration:
-            gmail_integration = Integration(
-                id=uuid4(),
-                user_id=UUID(user_id),
-                provider=IntegrationProvider.GOOGLE_GMAIL.value,
-                credentials=credentials,  # Same credentials
-                status="connected"
-            )
-            db.add(gmail_integration)
-        else:
-            gmail_integration.credentials = credentials
-            gmail_integration.status = "connected"
-        
-        db.commit()
+        await db.commit()
         
         # Redirect back to frontend settings page with success
         redirect_url = f"{frontend_url}/settings?google_connected=true"
@@ -200,7 +163,7 @@ async def google_oauth_callback(
     
     except Exception as e:
         # Handle any errors during credential exchange or storage
-        db.rollback()
+        await db.rollback()
         redirect_url = f"{frontend_url}/settings?google_error={str(e)}"
         return RedirectResponse(url=redirect_url)
 
@@ -209,24 +172,16 @@ async def google_oauth_callback(
 async def disconnect_integration(
     integration_id: str,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Disconnect an integration"""
-    from app.models.integration import Integration, IntegrationProvider
     from app.core.exceptions import NotFoundError
     from uuid import UUID
     
     # Handle Google account disconnection (disconnect Calendar, Docs, and Gmail)
     if integration_id == "google":
         # Get all Google integrations (Calendar, Docs, Gmail)
-        google_integrations = db.query(Integration).filter(
-            Integration.user_id == UUID(user_id),
-            Integration.provider.in_([
-                IntegrationProvider.GOOGLE_CALENDAR.value,
-                IntegrationProvider.GOOGLE_DOCS.value,
-                IntegrationProvider.GOOGLE_GMAIL.value
-            ])
-        ).all()
+        google_integrations = await IntegrationService.list_integrations_async(db, UUID(user_id), GOOGLE_PROVIDERS)
         
         if not google_integrations:
             raise NotFoundError("Google Account integration not found")
@@ -236,7 +191,7 @@ async def disconnect_integration(
         if google_integrations and google_integrations[0].credentials:
             from app.integrations.google.oauth import GoogleOAuth
             try:
-                GoogleOAuth.revoke_credentials(google_integrations[0].credentials)
+                await asyncio.to_thread(GoogleOAuth.revoke_credentials, google_integrations[0].credentials)
             except Exception as e:
                 import logging
                 logger = logging.getLogger(__name__)
@@ -245,21 +200,18 @@ async def disconnect_integration(
         
         # Delete both integrations from database
         for integration in google_integrations:
-            db.delete(integration)
-        db.commit()
+            await db.delete(integration)
+        await db.commit()
         
         return {"status": "disconnected", "provider": "google"}
     
     # For other integrations, use integration_id as UUID
-    integration = db.query(Integration).filter(
-        Integration.id == UUID(integration_id),
-        Integration.user_id == UUID(user_id)
-    ).first()
+    integration = await IntegrationService.get_integration_async(db, UUID(user_id), UUID(integration_id))
     
     if not integration:
         raise NotFoundError("Integration not found")
     
-    db.delete(integration)
-    db.commit()
+    await db.delete(integration)
+    await db.commit()
     
     return {"status": "disconnected"}
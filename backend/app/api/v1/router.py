@@ -2,7 +2,7 @@
 Main API router
 """
 from fastapi import APIRouter
-from app.api.v1 import auth, users, tasks, agent, integrations, documents
+from app.api.v1 import auth, users, tasks, agent, integrations, documents, search
 from app.api.v1.webhooks import bluebubbles
 
 api_router = APIRouter()
@@ -12,5 +12,6 @@ api_router.include_router(tasks.router)
 api_router.include_router(agent.router)
 api_router.include_router(integrations.router)
 api_router.include_router(documents.router)
+api_router.include_router(search.router)
 api_router.include_router(bluebubbles.router)
 
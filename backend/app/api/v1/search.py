@@ -0,0 +1,59 @@
+"""
+Search endpoints
+"""
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+from app.core.dependencies import get_async_database
+from app.api.v1.auth import get_current_user_id
+from app.services.search_service import SearchService
+from app.schemas.search import MessageSearchResult, TaskSearchResult
+from app.models.task import TaskType
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/messages", response_model=List[MessageSearchResult])
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=500, description="Web search syntax: words, \"phrases\", -excluded, OR"),
+    chat_guid: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_database)
+):
+    """Search conversation history, best matches first"""
+    return await SearchService.search_messages_async(
+        db=db,
+        user_id=UUID(user_id),
+        query=q,
+        limit=limit,
+        chat_guid=chat_guid,
+        since=since,
+        until=until
+    )
+
+
+@router.get("/tasks", response_model=List[TaskSearchResult])
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=500, description="Web search syntax: words, \"phrases\", -excluded, OR"),
+    task_type: Optional[TaskType] = Query(None),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_database)
+):
+    """Search task inputs and outputs, best matches first"""
+    return await SearchService.search_tasks_async(
+        db=db,
+        user_id=UUID(user_id),
+        query=q,
+        limit=limit,
+        task_type=task_type,
+        since=since,
+        until=until
+    )
@@ -1,37 +1,58 @@
 """
 Task endpoints
 """
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
-from app.core.dependencies import get_database
+from app.core.dependencies import get_async_database
 from app.api.v1.auth import get_current_user_id
 from app.services.task_service import TaskService
 from app.schemas.task import TaskResponse
 from app.models.task import TaskType, TaskStatus
+from app.utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 @router.get("", response_model=List[TaskResponse])
 async def list_tasks(
+    response: Response,
     task_type: Optional[TaskType] = Query(None),
     status: Optional[TaskStatus] = Query(None),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page (replaces offset)"),
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
-    """List user tasks"""
-    tasks = TaskService.list_tasks(
+    """List user tasks, newest first
+    
+    Keyset pagination: when a full page is returned, the X-Next-Cursor header
+    holds the cursor for the next page. Pages cost the same at any depth,
+    unlike offset.
+    """
+    after = None
+    if cursor:
+        if offset:
+            from app.core.exceptions import ValidationError
+            raise ValidationError("Use either cursor or offset, not both")
+        after = decode_cursor(cursor)
+    
+    tasks = await TaskService.list_tasks_async(
         db=db,
         user_id=UUID(user_id),
         task_type=task_type,
         status=status,
         limit=limit,
-        offset=offset
+        offset=offset,
+        after=after
     )
+    if len(tasks) == limit:
+        last = tasks[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
     return tasks
 
 
@@ -39,10 +60,10 @@ async def list_tasks(
 async def get_task(
     task_id: UUID,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Get task details"""
-    task = TaskService.get_task(db, task_id, UUID(user_id))
+    task = await TaskService.get_task_async(db, task_id, UUID(user_id))
     if not task:
         from app.core.exceptions import NotFoundError
         raise NotFoundError("Task not found")
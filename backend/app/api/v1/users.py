@@ -3,9 +3,9 @@ User endpoints
 """
 import logging
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from app.core.dependencies import get_database
+from app.core.dependencies import get_async_database
 from app.api.v1.auth import get_current_user_id
 from app.schemas.user import UserResponse, UserUpdate
 from app.services.user_service import UserService
@@ -19,10 +19,10 @@ router = APIRouter(prefix="/users", tags=["users"])
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Get current user"""
-    user = UserService.get_user_by_id(db, UUID(user_id))
+    user = await UserService.get_user_by_id_async(db, UUID(user_id))
     if not user:
         from app.core.exceptions import NotFoundError
         raise NotFoundError("User not found")
@@ -33,11 +33,11 @@ async def get_current_user(
 async def update_current_user(
     user_data: UserUpdate,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
     """Update current user"""
     # Get current user to check if phone number is being set for the first time
-    current_user = UserService.get_user_by_id(db, UUID(user_id))
+    current_user = await UserService.get_user_by_id_async(db, UUID(user_id))
     # Send message if: phone number is being explicitly set in the request
     # This will send on first time, when changed, or when explicitly set again
     phone_number_being_set = user_data.phone_number is not None
@@ -50,7 +50,7 @@ async def update_current_user(
     should_send_message = phone_number_being_set
     
     # Update user
-    user = UserService.update_user(db, UUID(user_id), user_data)
+    user = await UserService.update_user_async(db, UUID(user_id), user_data)
     
     # Send confirmation message if phone number was set/changed
     if should_send_message and user.phone_number:
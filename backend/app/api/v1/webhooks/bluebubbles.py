@@ -2,22 +2,46 @@
 BlueBubbles webhook handler
 
 This is the SINGLE entry point for receiving messages from BlueBubbles.
-All incoming messages flow through: BlueBubbles Server → webhook endpoint → parse → event bus → MessageProcessor
+All incoming messages flow through: BlueBubbles Server → webhook endpoint → admission control → ingestion queue → parse → event bus → MessageProcessor
+
+Under load, admission control routes new messages to a degraded tier (fewer
+workers, and its own smaller budget of pending turns) or sheds them: the
+sender gets an immediate "busy" reply and the message waits in the degraded
+tier if it has room.
 
 No other message receiving mechanisms should be used (no polling, no direct API calls).
 """
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, Request, BackgroundTasks
-from typing import Dict, Any
+import time
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+from typing import Dict, Any, List, Optional, Set
+from app.core.admission import Admission, admission_controller
+from app.core.config import settings
+from app.core.dedupe import message_deduplicator
 from app.core.events import event_bus, EventType
+from app.core.ingestion import IngestionQueue, IngestionQueueFull
+from app.core.jobs import job_queue
+from app.core.metrics import metrics
+from app.integrations.messaging.base_messaging import InboundMessage, Message
+from app.integrations.messaging.bluebubbles.service import BlueBubblesService
+from app.utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/webhooks/bluebubbles", tags=["webhooks"])
 
+WEBHOOK_JOB_KIND = "bluebubbles.webhook"
+
 
-def parse_bluebubbles_message(payload: Dict[str, Any]) -> Dict[str, Any]:
-    """Parse BlueBubbles webhook payload into structured message data"""
+def parse_bluebubbles_message(payload: Dict[str, Any], keep_raw: bool = False) -> InboundMessage:
+    """Parse BlueBubbles webhook payload into structured message data
+    
+    Only the fields the pipeline needs are kept; the full payload is attached
+    as `raw` only when keep_raw is set (for debugging).
+    """
     # BlueBubbles webhook structure: {"type": "new-message", "data": {...message data...}}
     event_type = payload.get("type") or payload.get("event", {}).get("type")
     
@@ -32,17 +56,12 @@ def parse_bluebubbles_message(payload: Dict[str, Any]) -> Dict[str, Any]:
     is_from_me = message_data.get("isFromMe", False)
     if is_from_me:
         # Return a special marker to skip processing
-        return {
-            "type": "message",
-            "source": "bluebubbles",
-            "event_type": event_type,
-            "sender": "",
-            "content": "",
-            "chat_guid": "",
-            "message_guid": "",
-            "is_from_me": True,  # Marker to skip
-            "raw": payload
-        }
+        return InboundMessage(
+            source="bluebubbles",
+            event_type=event_type,
+            is_from_me=True,  # Marker to skip
+            raw=payload if keep_raw else None
+        )
     
     # Extract sender information
     sender_handle = message_data.get("handle") or message_data.get("sender")
@@ -73,44 +92,193 @@ def parse_bluebubbles_message(payload: Dict[str, Any]) -> Dict[str, Any]:
     # Extract message GUID
     message_guid = message_data.get("guid") or message_data.get("id") or ""
     
-    return {
-        "type": "message",
-        "source": "bluebubbles",
-        "event_type": event_type,
-        "sender": sender,
-        "content": content,
-        "chat_guid": chat_guid,
-        "message_guid": message_guid,
-        "is_from_me": False,
-        "raw": payload
-    }
+    return InboundMessage(
+        source="bluebubbles",
+        event_type=event_type,
+        sender=sender,
+        content=content,
+        chat_guid=chat_guid,
+        message_guid=message_guid,
+        is_from_me=False,
+        raw=payload if keep_raw else None
+    )
 
 
-async def process_webhook_event(event_data: Dict[str, Any]):
-    """Process webhook event in background
+async def process_webhook_event(event_data: Dict[str, Any], durable: bool = False, degraded: bool = False):
+    """Process webhook event on an ingestion worker
     
     This is the SINGLE entry point for all incoming BlueBubbles messages.
-    Flow: BlueBubbles Server → POST /api/v1/webhooks/bluebubbles → parse → emit event → MessageProcessor
+    Flow: BlueBubbles Server → POST /api/v1/webhooks/bluebubbles → ingestion queue → parse → emit event → MessageProcessor
+    
+    Args:
+        event_data: Webhook payload
+        durable: The payload is already stored as a job, so it isn't saved again on
+            shutdown, and errors (including a failed turn) propagate so the job
+            is retried. Its GUID was claimed when the job was enqueued, so it isn't
+            deduplicated again: a job that is retried, released on shutdown or
+            reclaimed after a stale lock must still run.
+        degraded: Admitted to the degraded tier
     """
     import logging
     logger = logging.getLogger(__name__)
     
+    message = None
     try:
         # Parse and structure the message data
-        structured_data = parse_bluebubbles_message(event_data)
+        message = parse_bluebubbles_message(event_data, keep_raw=settings.WEBHOOK_KEEP_RAW_PAYLOAD)
+        message.durable = durable
+        message.degraded = degraded
+        
+        # Drop redelivered webhooks before any user lookup or LLM call
+        if not durable and await is_redelivery(message):
+            return
         
         # Emit event for agent to process
-        await event_bus.emit(EventType.MESSAGE_RECEIVED, structured_data)
-        logger.debug(f"Emitted MESSAGE_RECEIVED event for {structured_data.get('sender', 'unknown')}")
+        await event_bus.emit(EventType.MESSAGE_RECEIVED, message)
+        logger.debug(f"Emitted MESSAGE_RECEIVED event for {message.sender or 'unknown'}")
     except Exception as e:
         logger.error(f"Error processing BlueBubbles webhook event: {e}", exc_info=True)
+        if durable:
+            raise  # The job is retried
+        if message is not None:
+            # Let a redelivery of the webhook through
+            await message_deduplicator.forget_async(message.message_guid)
+
+
+async def is_redelivery(message: InboundMessage) -> bool:
+    """Claim a message's GUID; True if it was already claimed (and the message should be dropped)"""
+    if message.is_from_me or not await message_deduplicator.is_duplicate_async(message.message_guid):
+        return False
+    logger.info(f"Dropping duplicate BlueBubbles message {message.message_guid}")
+    return True
+
+
+# Bounded queue between the webhook and message processing.
+# Started from the application startup hook.
+ingestion_queue = IngestionQueue(
+    process_webhook_event,
+    maxsize=settings.INGESTION_QUEUE_MAXSIZE,
+    workers=settings.INGESTION_WORKERS,
+    name="bluebubbles"
+)
+
+async def process_degraded_webhook_event(event_data: Dict[str, Any]):
+    """Process a webhook admitted to the degraded tier (its turns have their own, smaller budget)"""
+    await process_webhook_event(event_data, degraded=True)
+
+
+# Low-priority tier for messages admitted while the system is overloaded
+degraded_queue = IngestionQueue(
+    process_degraded_webhook_event,
+    maxsize=settings.ADMISSION_DEGRADED_QUEUE_MAXSIZE,
+    workers=settings.ADMISSION_DEGRADED_WORKERS,
+    name="bluebubbles-degraded"
+)
+
+_busy_sender = BlueBubblesService()
+# Chats that recently got a busy reply, so a burst doesn't get one per message
+_busy_replied: TTLCache[bool] = TTLCache(max_entries=10000, ttl=settings.ADMISSION_BUSY_COOLDOWN_SECONDS)
+# Strong references to in-flight busy replies
+_busy_tasks: Set[asyncio.Task] = set()
+
+
+async def _send_busy_reply(message: InboundMessage):
+    """Tell the sender we're overloaded and will answer later"""
+    try:
+        await _busy_sender.send_message(Message(
+            content=settings.ADMISSION_BUSY_MESSAGE,
+            recipient=message.sender,
+            metadata={"chat_guid": message.chat_guid}
+        ))
+        metrics.counter("admission.busy_replies").inc()
+    except Exception as e:
+        logger.error(f"Error sending busy reply to {message.sender}: {e}", exc_info=True)
+
+
+def shed_message(payload: Dict[str, Any]):
+    """Send an immediate busy reply for a shed webhook (at most once per chat per cooldown)"""
+    message = parse_bluebubbles_message(payload)
+    if message.is_from_me or not message.content or not message.chat_guid:
+        return
+    # Redeliveries of messages we've already accepted don't need another reply
+    if message_deduplicator.seen(message.message_guid):
+        return
+    if not _busy_replied.add(message.chat_guid, True):
+        return
+    task = asyncio.create_task(_send_busy_reply(message))
+    _busy_tasks.add(task)
+    task.add_done_callback(_busy_tasks.discard)
+
+
+def admit_webhook(payload: Dict[str, Any]) -> Admission:
+    """Route a webhook payload to the normal or degraded tier, shedding under load
+
+    Raises:
+        IngestionQueueFull: If the message was shed and the degraded tier is full too
+    """
+    decision = admission_controller.decide(ingestion_queue.depth)
+    
+    if decision == Admission.ACCEPT:
+        try:
+            ingestion_queue.submit(payload)
+            return decision
+        except IngestionQueueFull:
+            decision = Admission.DEGRADED
+            admission_controller.record(decision)
+    
+    if decision == Admission.DEGRADED:
+        try:
+            degraded_queue.submit(payload)
+            return decision
+        except IngestionQueueFull:
+            decision = Admission.SHED
+            admission_controller.record(decision)
+    
+    # Shed: the sender is told right away that the answer will be late (even
+    # if the degraded tier has no room either), and the message still waits
+    # in the degraded tier if it has room
+    shed_message(payload)
+    degraded_queue.submit(payload)
+    return decision
+
+
+async def run_webhook_job(payload: Dict[str, Any], data: Optional[bytes] = None):
+    """Job handler for webhooks enqueued into the jobs table"""
+    await process_webhook_event(payload, durable=True)
+
+
+def record_webhook(payload: Dict[str, Any], path: str):
+    """Append a payload to a JSONL recording for replay by scripts/loadgen.py"""
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"received_at": time.time(), "payload": payload}) + "\n")
+    except OSError as e:
+        logger.error(f"Error recording webhook to {path}: {e}")
+
+
+def persist_webhooks_for_replay(payloads: List[Dict[str, Any]]) -> int:
+    """Save webhooks that were never picked up as jobs (blocking; call from a thread)
+    
+    Replay jobs skip deduplication, so payloads whose GUID another delivery
+    already claimed are dropped here instead.
+    """
+    saved = 0
+    for payload in payloads:
+        if message_deduplicator.seen(parse_bluebubbles_message(payload).message_guid):
+            continue
+        try:
+            job_queue.enqueue(WEBHOOK_JOB_KIND, payload)
+            saved += 1
+        except Exception as e:
+            logger.error(f"Error saving webhook for replay: {e}", exc_info=True)
+    return saved
+
+
+job_queue.register(WEBHOOK_JOB_KIND, run_webhook_job)
 
 
 @router.post("")
-async def bluebubbles_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks
-):
+async def bluebubbles_webhook(request: Request):
     """Handle incoming BlueBubbles webhook
     
     This is the ONLY way messages are received from BlueBubbles.
@@ -121,10 +289,46 @@ async def bluebubbles_webhook(
         payload = await request.json()
         logger.debug(f"Received webhook payload: {payload.get('type', 'unknown')} event")
         
-        # Process in background (non-blocking)
-        background_tasks.add_task(process_webhook_event, payload)
+        if settings.WEBHOOK_RECORD_PATH:
+            record_webhook(payload, settings.WEBHOOK_RECORD_PATH)
+        
+        # With the Postgres job queue, any worker process can pick the message up.
+        # The GUID is claimed once, here: the job itself may run more than once.
+        if settings.JOBS_ENABLED:
+            message = parse_bluebubbles_message(payload)
+            if await is_redelivery(message):
+                return {"status": "received"}
+            try:
+                await asyncio.to_thread(job_queue.enqueue, WEBHOOK_JOB_KIND, payload)
+            except Exception:
+                # Not stored, so a redelivery must not count as a duplicate
+                await message_deduplicator.forget_async(message.message_guid)
+                raise
+            return {"status": "queued"}
+        
+        # Shutting down: let BlueBubbles retry against another instance
+        if not ingestion_queue.accepting:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"status": "unavailable", "message": "Shutting down"},
+                headers={"Retry-After": "5"}
+            )
+        
+        # Hand off to the ingestion queues (non-blocking)
+        try:
+            decision = admit_webhook(payload)
+        except IngestionQueueFull as e:
+            # Push back so BlueBubbles retries later instead of piling up work
+            logger.warning(f"Rejecting BlueBubbles webhook: {e}")
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"status": "busy", "message": str(e)},
+                headers={"Retry-After": "5"}
+            )
         
         # Return success immediately (BlueBubbles expects quick response)
+        if decision != Admission.ACCEPT:
+            return {"status": "received", "admission": decision.value}
         return {"status": "received"}
     except Exception as e:
         logger.error(f"Error handling BlueBubbles webhook: {e}", exc_info=True)
@@ -0,0 +1,92 @@
+"""
+Admission control for inbound messages
+
+Decides, per webhook, whether a message goes to the normal ingestion queue,
+to the slower degraded tier, or is shed (the sender gets an immediate "busy"
+reply and the message is deferred). Decisions are driven by the ingestion
+queue depth and the recent p95 turn latency.
+"""
+import enum
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Histogram of end-to-end turn latency, recorded by MessageProcessor
+TURN_LATENCY_METRIC = "messages.turn_seconds"
+
+
+class Admission(str, enum.Enum):
+    """Admission decisions"""
+    ACCEPT = "accept"  # Normal ingestion queue
+    DEGRADED = "degraded"  # Low-priority tier with fewer workers
+    SHED = "shed"  # Reply "busy" now, process later if there is room
+
+
+class AdmissionController:
+    """Threshold-based admission control
+
+    Latency thresholds only apply while work is queued: a high p95 with an
+    empty queue means turns are slow, not that the system is overloaded.
+    """
+
+    def __init__(
+        self,
+        degrade_depth: int,
+        shed_depth: int,
+        degrade_p95_seconds: float,
+        shed_p95_seconds: float,
+        min_samples: int = 20
+    ):
+        self.degrade_depth = degrade_depth
+        self.shed_depth = shed_depth
+        self.degrade_p95_seconds = degrade_p95_seconds
+        self.shed_p95_seconds = shed_p95_seconds
+        self.min_samples = min_samples
+
+        # Publish thresholds next to the decisions they drive
+        metrics.gauge("admission.threshold", {"name": "degrade_depth"}).set(degrade_depth)
+        metrics.gauge("admission.threshold", {"name": "shed_depth"}).set(shed_depth)
+        metrics.gauge("admission.threshold", {"name": "degrade_p95_seconds"}).set(degrade_p95_seconds)
+        metrics.gauge("admission.threshold", {"name": "shed_p95_seconds"}).set(shed_p95_seconds)
+        self._p95 = metrics.gauge("admission.turn_p95_seconds")
+
+    def _turn_p95(self) -> Optional[float]:
+        """Recent p95 turn latency, None until there are enough samples"""
+        histogram = metrics.histogram(TURN_LATENCY_METRIC)
+        if histogram.count < self.min_samples:
+            return None
+        return histogram.percentile(95)
+
+    def decide(self, queue_depth: int) -> Admission:
+        """Decide how to admit a new message given the current queue depth"""
+        p95 = self._turn_p95()
+        if p95 is not None:
+            self._p95.set(p95)
+        backlogged = queue_depth > 0 and p95 is not None
+
+        if queue_depth >= self.shed_depth or (backlogged and p95 >= self.shed_p95_seconds):
+            decision = Admission.SHED
+        elif queue_depth >= self.degrade_depth or (backlogged and p95 >= self.degrade_p95_seconds):
+            decision = Admission.DEGRADED
+        else:
+            decision = Admission.ACCEPT
+
+        self.record(decision)
+        return decision
+
+    def record(self, decision: Admission):
+        """Count a decision (also used when a full queue forces a downgrade)"""
+        metrics.counter("admission.decisions", {"decision": decision.value}).inc()
+
+
+# Global admission controller
+admission_controller = AdmissionController(
+    degrade_depth=settings.ADMISSION_DEGRADE_QUEUE_DEPTH,
+    shed_depth=settings.ADMISSION_SHED_QUEUE_DEPTH,
+    degrade_p95_seconds=settings.ADMISSION_DEGRADE_P95_SECONDS,
+    shed_p95_seconds=settings.ADMISSION_SHED_P95_SECONDS
+)
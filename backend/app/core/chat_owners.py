@@ -0,0 +1,85 @@
+"""
+chat_guid → user resolution cache
+
+Every inbound message needs the user that owns its chat, and that mapping
+almost never changes. Resolved owners are cached per chat_guid; chats with no
+owner are cached too, with a shorter TTL, so unknown or spam chats don't hit
+Postgres on every message. UserService invalidates entries when a user's
+phone number or profile changes.
+"""
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.cache import TTLCache
+
+_MISSING = object()
+
+
+@dataclass(slots=True, frozen=True)
+class ChatOwner:
+    """The parts of a user needed to process a message"""
+    id: UUID
+    agent_name: Optional[str] = None
+    timezone: Optional[str] = None
+
+
+# Cached value: (phone number in E.164 or None, owner or None for a negative entry)
+CacheEntry = Tuple[Optional[str], Optional[ChatOwner]]
+
+
+class ChatOwnerCache:
+    """Bounded cache of chat_guid → ChatOwner with negative caching"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, negative_ttl_seconds: float):
+        self._entries: TTLCache[CacheEntry] = TTLCache(max_entries=max_entries, ttl=ttl_seconds)
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._hits = metrics.counter("chat_owner_cache.hits")
+        self._negative_hits = metrics.counter("chat_owner_cache.negative_hits")
+        self._misses = metrics.counter("chat_owner_cache.misses")
+        self._invalidations = metrics.counter("chat_owner_cache.invalidations")
+
+    def get(self, chat_guid: str) -> Tuple[bool, Optional[ChatOwner]]:
+        """Look up a chat
+
+        Returns:
+            (found, owner): found is False on a cache miss; owner is None for
+            chats known to have no owner
+        """
+        entry = self._entries.get(chat_guid, _MISSING)
+        if entry is _MISSING:
+            self._misses.inc()
+            return False, None
+        _, owner = entry
+        if owner is None:
+            self._negative_hits.inc()
+        else:
+            self._hits.inc()
+        return True, owner
+
+    def set(self, chat_guid: str, phone_e164: Optional[str], owner: Optional[ChatOwner]):
+        """Cache a resolved owner, or a miss (owner=None) with the negative TTL"""
+        ttl = None if owner is not None else self.negative_ttl_seconds
+        self._entries.set(chat_guid, (phone_e164, owner), ttl=ttl)
+
+    def invalidate(self, user_id: Optional[UUID] = None, phones: Iterable[Optional[str]] = ()):
+        """Drop entries owned by user_id or resolved from any of the given E.164 numbers"""
+        phones = {phone for phone in phones if phone}
+        removed = self._entries.pop_where(
+            lambda entry: entry[0] in phones or (user_id is not None and entry[1] is not None and entry[1].id == user_id)
+        )
+        if removed:
+            self._invalidations.inc(removed)
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Global chat owner cache instance
+chat_owner_cache = ChatOwnerCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.USER_CACHE_NEGATIVE_TTL_SECONDS
+)
@@ -1,22 +1,70 @@
 """
 Database connection and session management
+
+Two engines share one DATABASE_URL:
+- `engine` / `SessionLocal` (psycopg2, sync) for Alembic, scripts and code
+  that runs in worker threads
+- `async_engine` / `AsyncSessionLocal` (asyncpg) for everything that runs on
+  the event loop, so a slow query never stalls other turns
 """
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
+from app.core.pool_metrics import instrument_pool, timed_pool_class
 from app.models.base import Base
 
+# Each engine gets its own pool of this size
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
 # Supabase requires SSL connections
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=timed_pool_class(QueuePool, "sync"),
     connect_args={
         "sslmode": "require"
-    }
+    },
+    **POOL_OPTIONS
 )
+instrument_pool(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def _async_database_url(url: str) -> str:
+    """Rewrite DATABASE_URL for the asyncpg driver
+
+    asyncpg takes SSL settings through connect_args, not libpq's sslmode.
+    """
+    parsed = make_url(url)
+    query = {k: v for k, v in parsed.query.items() if k != "sslmode"}
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    poolclass=timed_pool_class(AsyncAdaptedQueuePool, "async"),
+    connect_args={
+        "ssl": "require"
+    },
+    **POOL_OPTIONS
+)
+instrument_pool(async_engine.sync_engine, "async")
+# expire_on_commit=False: objects stay readable after commit without an implicit (sync) refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
 def get_db():
     """Dependency for getting database session"""
     db = SessionLocal()
@@ -24,3 +72,36 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def session_scope(db: Optional[AsyncSession] = None) -> AsyncIterator[AsyncSession]:
+    """Use the caller's session (e.g. the turn session on TaskData.db) or open a new one
+
+    A borrowed session is rolled back on error so the owner can keep using it;
+    it is closed by its owner, not here.
+    """
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+    try:
+        yield db
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def release_connection(db: AsyncSession):
+    """End the session's transaction so its connection goes back to the pool
+
+    Call after reads and before slow non-database work (LLM and API calls):
+    an AsyncSession holds its connection until the transaction ends.
+    """
+    await db.commit()
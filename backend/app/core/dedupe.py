@@ -0,0 +1,116 @@
+"""
+Duplicate-delivery suppression for inbound messages
+
+BlueBubbles may redeliver the same webhook. Every accepted message GUID is
+remembered in a bounded TTL/LRU set; repeats are dropped before any user
+lookup or LLM call. With DEDUPE_PERSISTENT enabled, a unique row in
+processed_messages extends the check across processes and restarts.
+
+With the job queue, a webhook's GUID is claimed when it is enqueued, not
+when the job runs, so retried or reclaimed jobs aren't dropped as duplicates.
+Without it, a message whose turn fails is forgotten again (forget_async), so
+a redelivery gets another try.
+"""
+import logging
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class MessageDeduplicator:
+    """Remembers message GUIDs that have already been accepted"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, persistent: bool = False):
+        self._seen: TTLCache[bool] = TTLCache(max_entries=max_entries, ttl=ttl_seconds)
+        self.persistent = persistent
+        self._duplicates = metrics.counter("dedupe.duplicates")
+        self._accepted = metrics.counter("dedupe.accepted")
+
+    async def is_duplicate_async(self, message_guid: Optional[str], source: str = "bluebubbles") -> bool:
+        """Check a message GUID and mark it as seen
+
+        Messages without a GUID can't be deduplicated and are always accepted.
+
+        Returns:
+            True if the GUID was already accepted, False if this is the first delivery
+        """
+        if not message_guid:
+            return False
+
+        if not self._seen.add(message_guid, True):
+            self._duplicates.inc()
+            return True
+
+        if self.persistent and not await self._claim_persistent_async(message_guid, source):
+            self._duplicates.inc()
+            return True
+
+        self._accepted.inc()
+        return False
+
+    def seen(self, message_guid: Optional[str]) -> bool:
+        """Check the in-memory set without marking the GUID as seen"""
+        return bool(message_guid) and message_guid in self._seen
+
+    def forget(self, message_guid: str):
+        """Drop a GUID from the in-memory set (e.g. so a failed message can be retried)"""
+        self._seen.pop(message_guid)
+
+    async def forget_async(self, message_guid: Optional[str], source: str = "bluebubbles"):
+        """Release a claimed GUID, in memory and in processed_messages, so a redelivery is accepted"""
+        if not message_guid:
+            return
+        self.forget(message_guid)
+        if self.persistent:
+            await self._release_persistent_async(message_guid, source)
+
+    async def _claim_persistent_async(self, message_guid: str, source: str) -> bool:
+        """Insert the GUID into processed_messages; False if it already exists"""
+        from app.core.database import AsyncSessionLocal
+        from app.models.processed_message import ProcessedMessage
+
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    insert(ProcessedMessage)
+                    .values(message_guid=message_guid, source=source)
+                    .on_conflict_do_nothing(index_elements=["message_guid"])
+                )
+                await db.commit()
+                return result.rowcount == 1
+        except Exception as e:
+            # Fail open: better to risk a duplicate reply than drop a message
+            logger.error(f"Error recording message_guid {message_guid}: {e}", exc_info=True)
+            return True
+
+    async def _release_persistent_async(self, message_guid: str, source: str):
+        """Delete the GUID from processed_messages"""
+        from app.core.database import AsyncSessionLocal
+        from app.models.processed_message import ProcessedMessage
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    delete(ProcessedMessage).where(
+                        ProcessedMessage.message_guid == message_guid,
+                        ProcessedMessage.source == source
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error releasing message_guid {message_guid}: {e}", exc_info=True)
+
+
+# Global deduplicator instance
+message_deduplicator = MessageDeduplicator(
+    max_entries=settings.DEDUPE_MAX_ENTRIES,
+    ttl_seconds=settings.DEDUPE_TTL_SECONDS,
+    persistent=settings.DEDUPE_PERSISTENT
+)
@@ -1,13 +1,36 @@
 """
 FastAPI dependencies
 """
-from typing import Generator
+import hmac
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_async_db
+from app.core.exceptions import AuthenticationError, NotFoundError
+
+metrics_bearer = HTTPBearer(auto_error=False)
 
 
 def get_database() -> Generator[Session, None, None]:
     """Get database session"""
     yield from get_db()
 
+
+async def get_async_database() -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session"""
+    async for db in get_async_db():
+        yield db
+
+
+def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_bearer)
+):
+    """Allow /metrics only with the METRICS_TOKEN bearer token (404 when no token is configured)"""
+    if not settings.METRICS_TOKEN:
+        raise NotFoundError("Not Found")
+    if credentials is None or not hmac.compare_digest(credentials.credentials, settings.METRICS_TOKEN):
+        raise AuthenticationError("Invalid metrics token")
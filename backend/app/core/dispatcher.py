@@ -0,0 +1,111 @@
+"""
+Per-chat ordered, cross-chat parallel dispatcher
+
+Work submitted under the same key (a chat GUID) runs strictly one at a time in
+submission order, so two quick messages in one conversation cannot race on
+history or pending confirmations. Different keys run in parallel, capped by a
+shared concurrency limit.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Set, Tuple
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+WorkItem = Tuple[Callable[[], Awaitable[Any]], asyncio.Future, float]
+
+
+class ChatDispatcher:
+    """Dispatches work into serialized per-key lanes"""
+
+    def __init__(self, max_concurrency: int, name: str = "chat"):
+        self.name = name
+        self._max_concurrency = max(1, max_concurrency)
+        self._semaphore: asyncio.Semaphore = None
+        self._lanes: Dict[str, Deque[WorkItem]] = {}
+        self._lane_tasks: Set[asyncio.Task] = set()
+
+        labels = {"dispatcher": name}
+        self._active_lanes = metrics.gauge("dispatcher.active_lanes", labels)
+        self._running = metrics.gauge("dispatcher.running", labels)
+        self._lane_wait = metrics.histogram("dispatcher.lane_wait_seconds", labels)
+
+    @property
+    def active_lanes(self) -> int:
+        """Number of keys with queued or running work"""
+        return len(self._lanes)
+
+    def pending(self, key: str) -> int:
+        """Number of queued or running items for a key"""
+        lane = self._lanes.get(key)
+        return len(lane) if lane else 0
+
+    async def dispatch(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func in the lane for key and wait for its result
+
+        Items in the same lane run in the order they were dispatched.
+        """
+        return await self.submit(key, func)
+
+    def submit(self, key: str, func: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """Queue func in the lane for key without waiting for it to run
+
+        Returns:
+            Future for func's result (cancelled if the dispatcher stops first)
+        """
+        if self._semaphore is None:
+            # Created lazily so it binds to the running event loop
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        future = asyncio.get_running_loop().create_future()
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = deque()
+            self._lanes[key] = lane
+            lane.append((func, future, time.perf_counter()))
+            self._active_lanes.set(len(self._lanes))
+            task = asyncio.create_task(self._run_lane(key, lane), name=f"{self.name}-lane")
+            self._lane_tasks.add(task)
+            task.add_done_callback(self._lane_tasks.discard)
+        else:
+            lane.append((func, future, time.perf_counter()))
+        return future
+
+    async def stop(self):
+        """Cancel all lanes; running and queued work is cancelled"""
+        tasks = list(self._lane_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_lane(self, key: str, lane: Deque[WorkItem]):
+        """Drain a lane one item at a time, then retire it"""
+        try:
+            while lane:
+                func, future, queued_at = lane[0]
+                async with self._semaphore:
+                    self._lane_wait.observe(time.perf_counter() - queued_at)
+                    self._running.inc()
+                    try:
+                        result = await func()
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+                    finally:
+                        self._running.dec()
+                lane.popleft()
+        finally:
+            # Fail anything left behind if the lane task was cancelled
+            while lane:
+                _, future, _ = lane.popleft()
+                if not future.done():
+                    future.cancel()
+            self._lanes.pop(key, None)
+            self._active_lanes.set(len(self._lanes))
@@ -1,9 +1,16 @@
 """
 Event bus for decoupled communication
 """
-from typing import Callable, Dict, List, Any
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple
 from enum import Enum
 
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
 
 class EventType(str, Enum):
     """Event types"""
@@ -11,50 +18,128 @@ class EventType(str, Enum):
     MESSAGE_SENT = "message.sent"
     TASK_CREATED = "task.created"
     TASK_COMPLETED = "task.completed"
+    TEXT_CAPTURED = "text.captured"  # Turns, emails, documents worth remembering (data: List[EmbeddingItem])
     INTEGRATION_CONNECTED = "integration.connected"
     INTEGRATION_DISCONNECTED = "integration.disconnected"
 
 
-EventHandlers = Dict[EventType, List[Callable[[Any], None]]]
+class EmitMode(str, Enum):
+    """How emit() runs subscribers"""
+    CONCURRENT = "concurrent"  # Run all handlers concurrently and wait for them
+    FIRE_AND_FORGET = "fire_and_forget"  # Schedule handlers and return immediately
+    ORDERED = "ordered"  # Run handlers one after another in subscription order
+
+
+# Each subscription is (handler, timeout in seconds or None)
+Subscription = Tuple[Callable[[Any], Any], Optional[float]]
+EventHandlers = Dict[EventType, List[Subscription]]
 
 
 class EventBus:
-    """Simple event bus implementation"""
-    
+    """Simple event bus implementation
+
+    Handler errors and timeouts are logged and counted per event type; they
+    never stop other handlers or propagate to the emitter.
+    """
+
     def __init__(self):
         self._handlers: EventHandlers = {}
-    
-    def subscribe(self, event_type: EventType, handler: Callable[[Any], None]):
-        """Subscribe to an event type"""
+        # Strong references to fire-and-forget tasks so they aren't garbage collected
+        self._background: Set[asyncio.Task] = set()
+
+    def subscribe(
+        self,
+        event_type: EventType,
+        handler: Callable[[Any], None],
+        timeout: Optional[float] = None
+    ):
+        """Subscribe to an event type
+
+        Args:
+            event_type: Event to listen for
+            handler: Sync or async callable receiving the event data
+            timeout: Optional per-handler timeout in seconds (async handlers only)
+        """
         if event_type not in self._handlers:
             self._handlers[event_type] = []
-        self._handlers[event_type].append(handler)
-    
+        self._handlers[event_type].append((handler, timeout))
+
     def unsubscribe(self, event_type: EventType, handler: Callable[[Any], None]):
         """Unsubscribe from an event type"""
         if event_type in self._handlers:
-            try:
-                self._handlers[event_type].remove(handler)
-            except ValueError:
-                pass
-    
-    async def emit(self, event_type: EventType, data: Any = None):
+            self._handlers[event_type] = [
+                subscription for subscription in self._handlers[event_type]
+                if subscription[0] != handler
+            ]
+
+    @property
+    def pending(self) -> int:
+        """Number of fire-and-forget handler runs still in flight"""
+        return len(self._background)
+
+    async def emit(
+        self,
+        event_type: EventType,
+        data: Any = None,
+        mode: EmitMode = EmitMode.CONCURRENT
+    ):
         """Emit an event"""
-        if event_type in self._handlers:
-            for handler in self._handlers[event_type]:
-                try:
-                    if callable(handler):
-                        # Support both sync and async handlers
-                        import asyncio
-                        if asyncio.iscoroutinefunction(handler):
-                            await handler(data)
-                        else:
-                            handler(data)
-                except Exception as e:
-                    # Log error but don't stop other handlers
-                    print(f"Error in event handler for {event_type}: {e}")
+        subscriptions = list(self._handlers.get(event_type, []))
+        if not subscriptions:
+            return
+        metrics.counter("events.emitted", {"event": event_type.value}).inc()
+
+        if mode == EmitMode.ORDERED:
+            for handler, timeout in subscriptions:
+                await self._run_handler(event_type, handler, timeout, data)
+        elif mode == EmitMode.FIRE_AND_FORGET:
+            for handler, timeout in subscriptions:
+                task = asyncio.create_task(self._run_handler(event_type, handler, timeout, data))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+        else:
+            await asyncio.gather(*[
+                self._run_handler(event_type, handler, timeout, data)
+                for handler, timeout in subscriptions
+            ])
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for in-flight fire-and-forget handlers
+
+        Returns:
+            True if all handlers finished within the timeout
+        """
+        if not self._background:
+            return True
+        _, still_pending = await asyncio.wait(set(self._background), timeout=timeout)
+        return not still_pending
+
+    async def _run_handler(
+        self,
+        event_type: EventType,
+        handler: Callable[[Any], Any],
+        timeout: Optional[float],
+        data: Any
+    ):
+        """Run one handler with timeout, latency and error accounting"""
+        labels = {"event": event_type.value}
+        start = time.perf_counter()
+        try:
+            # Support both sync and async handlers
+            if asyncio.iscoroutinefunction(handler):
+                await asyncio.wait_for(handler(data), timeout=timeout)
+            else:
+                handler(data)
+        except asyncio.TimeoutError:
+            metrics.counter("events.handler_timeouts", labels).inc()
+            logger.warning(f"Event handler {getattr(handler, '__qualname__', handler)} for {event_type.value} timed out after {timeout}s")
+        except Exception as e:
+            # Log error but don't stop other handlers
+            metrics.counter("events.handler_errors", labels).inc()
+            logger.error(f"Error in event handler for {event_type.value}: {e}", exc_info=True)
+        finally:
+            metrics.histogram("events.handler_seconds", labels).observe(time.perf_counter() - start)
 
 
 # Global event bus instance
 event_bus = EventBus()
-
@@ -0,0 +1,80 @@
+"""
+Per-chat conversation history cache
+
+A turn reads history several times (the agent or handler, sometimes twice
+with different limits), right after MessageProcessor has written the
+previous turn. Each chat keeps a ring buffer of its last
+HISTORY_CACHE_TURNS turns, as (role, content) pairs:
+- a cold read loads the buffer from conversation_messages (with the full
+  buffer size, so later reads with any smaller limit are served from memory)
+- ConversationService.update_agent_response_async appends each answered
+  turn after its commit (write-through)
+- a summary fold invalidates its chat, so the next read reloads it
+- chats are evicted LRU beyond HISTORY_CACHE_MAX_CHATS, and expire after
+  HISTORY_CACHE_TTL_SECONDS, which bounds staleness when another process
+  handled a turn for the same chat
+
+Only chat-scoped reads are cached; history across all of a user's chats
+(chat_guid=None) always goes to the database. Not thread-safe; event loop only.
+"""
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.cache import TTLCache
+
+# (role, content)
+HistoryMessage = Tuple[str, str]
+
+
+class ChatHistoryCache:
+    """Bounded LRU of per-chat ring buffers of recent messages"""
+
+    def __init__(self, max_chats: int, turns: int, ttl_seconds: float):
+        self.turns = turns
+        self._chats: TTLCache[Deque[HistoryMessage]] = TTLCache(max_entries=max_chats, ttl=ttl_seconds)
+        self._hits = metrics.counter("history_cache.hits")
+        self._misses = metrics.counter("history_cache.misses")
+
+    def get(self, user_id: UUID, chat_guid: Optional[str], limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Last `limit` turns in chat format, or None if the chat isn't cached (or limit exceeds the buffer)"""
+        if not chat_guid or limit > self.turns:
+            return None
+        buffer = self._chats.get((user_id, chat_guid))
+        if buffer is None:
+            self._misses.inc()
+            return None
+        self._hits.inc()
+        start = max(0, len(buffer) - limit * 2)
+        return [{"role": role, "content": content} for role, content in islice(buffer, start, None)]
+
+    def load(self, user_id: UUID, chat_guid: Optional[str], rows: Sequence[HistoryMessage]):
+        """Fill a chat's buffer from newest-first rows of a query with limit=self.turns"""
+        if not chat_guid:
+            return
+        buffer: Deque[HistoryMessage] = deque(((role, content) for role, content in reversed(rows)), maxlen=self.turns * 2)
+        # Don't replace a buffer that was filled (and maybe written to) meanwhile
+        self._chats.add((user_id, chat_guid), buffer)
+
+    def append(self, user_id: UUID, chat_guid: Optional[str], messages: Iterable[HistoryMessage]):
+        """Write through new messages; chats that aren't cached are left to load on their next read"""
+        if not chat_guid:
+            return
+        buffer = self._chats.get((user_id, chat_guid))
+        if buffer is not None:
+            buffer.extend(messages)
+
+    def invalidate(self, user_id: UUID, chat_guid: Optional[str]):
+        """Drop a chat's buffer so its next read reloads from the database"""
+        self._chats.pop((user_id, chat_guid))
+
+
+# Global history cache instance
+history_cache = ChatHistoryCache(
+    max_chats=settings.HISTORY_CACHE_MAX_CHATS,
+    turns=settings.HISTORY_CACHE_TURNS,
+    ttl_seconds=settings.HISTORY_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,155 @@
+"""
+Bounded async work queue for inbound webhook payloads
+
+Sits between the webhook endpoint and message processing. The queue depth
+bounds how much work can pile up, and a fixed pool of workers bounds how many
+payloads are processed at once. When the queue is full, submit() raises
+IngestionQueueFull so the endpoint can push back on the caller instead of
+accepting unbounded work.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionQueueFull(Exception):
+    """Raised when the ingestion queue has no free capacity"""
+    pass
+
+
+class IngestionQueue:
+    """Bounded queue with a fixed worker pool"""
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        maxsize: int,
+        workers: int,
+        name: str = "ingestion"
+    ):
+        self._handler = handler
+        self._maxsize = maxsize
+        self._worker_count = max(1, workers)
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._accepting = False
+
+        labels = {"queue": name}
+        self._depth = metrics.gauge("ingestion.queue_depth", labels)
+        self._busy = metrics.gauge("ingestion.busy_workers", labels)
+        self._enqueued = metrics.counter("ingestion.enqueued", labels)
+        self._rejected = metrics.counter("ingestion.rejected", labels)
+        self._failed = metrics.counter("ingestion.failed", labels)
+        self._wait = metrics.histogram("ingestion.wait_seconds", labels)
+        self._processing = metrics.histogram("ingestion.processing_seconds", labels)
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def accepting(self) -> bool:
+        return self._accepting
+
+    @property
+    def depth(self) -> int:
+        """Number of items waiting to be picked up"""
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def capacity(self) -> int:
+        return self._maxsize
+
+    async def start(self):
+        """Create the queue and start the worker pool"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self._maxsize)
+        self._accepting = True
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"{self.name}-worker-{i}")
+            for i in range(self._worker_count)
+        ]
+        logger.info(f"Started {self.name} queue (depth {self._maxsize}, {self._worker_count} workers)")
+
+    def submit(self, item: Any):
+        """Enqueue an item without waiting
+
+        Raises:
+            IngestionQueueFull: If the queue is at capacity or not started
+        """
+        if self._queue is None or not self._accepting:
+            raise IngestionQueueFull(f"{self.name} queue is not accepting work")
+        try:
+            self._queue.put_nowait((time.perf_counter(), item))
+        except asyncio.QueueFull:
+            self._rejected.inc()
+            raise IngestionQueueFull(f"{self.name} queue is full ({self._maxsize})")
+        self._enqueued.inc()
+        self._depth.set(self._queue.qsize())
+
+    def close(self):
+        """Stop accepting new items; queued items are still processed"""
+        self._accepting = False
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued item has been processed
+
+        Returns:
+            True if the queue drained within the timeout
+        """
+        if self._queue is None:
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self) -> List[Any]:
+        """Cancel the workers
+
+        Returns:
+            Items that were still queued (not picked up by a worker), so the
+            caller can persist them
+        """
+        self._accepting = False
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        leftover = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, item = self._queue.get_nowait()
+                leftover.append(item)
+        self._queue = None
+        self._depth.set(0)
+        return leftover
+
+    async def _worker(self, index: int):
+        """Pull items off the queue and run the handler"""
+        queue = self._queue
+        while True:
+            enqueued_at, item = await queue.get()
+            self._depth.set(queue.qsize())
+            self._wait.observe(time.perf_counter() - enqueued_at)
+            self._busy.inc()
+            try:
+                with self._processing.time():
+                    await self._handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed.inc()
+                logger.error(f"Error in {self.name} worker {index}: {e}", exc_info=True)
+            finally:
+                self._busy.dec()
+                queue.task_done()
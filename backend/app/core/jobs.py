@@ -0,0 +1,302 @@
+"""
+Postgres-backed job queue
+
+Jobs live in the `jobs` table, so any number of processes and hosts can share
+one queue. Workers claim batches with SELECT ... FOR UPDATE SKIP LOCKED, which
+lets concurrent workers pick disjoint jobs without blocking each other. Failed
+jobs are retried with exponential backoff up to max_attempts. A running
+job's lock is refreshed every third of JOBS_LOCK_TIMEOUT_SECONDS, so only
+jobs whose worker died mid-run are reclaimed once their lock is older than
+that.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any], Optional[bytes]], Awaitable[None]]
+
+
+class ClaimedJob:
+    """Detached snapshot of a claimed job"""
+    __slots__ = ("id", "kind", "payload", "data", "attempts", "max_attempts", "run_at")
+
+    def __init__(self, job: Job):
+        self.id = job.id
+        self.kind = job.kind
+        self.payload = job.payload or {}
+        self.data = job.data
+        self.attempts = job.attempts
+        self.max_attempts = job.max_attempts
+        self.run_at = job.run_at
+
+
+class JobQueue:
+    """Durable job queue with a per-process worker pool"""
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_interval: float,
+        lock_timeout: float,
+        worker_id: Optional[str] = None
+    ):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._stopping = False
+
+        self._claimed = metrics.counter("jobs.claimed")
+        self._completed = metrics.counter("jobs.completed")
+        self._retried = metrics.counter("jobs.retried")
+        self._failed = metrics.counter("jobs.failed")
+        self._run_seconds = metrics.histogram("jobs.run_seconds")
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the handler for a job kind"""
+        self._handlers[kind] = handler
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        data: Optional[bytes] = None,
+        max_attempts: int = 3,
+        delay: float = 0
+    ) -> UUID:
+        """Insert a job (blocking; call from a thread in async code)"""
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            job = Job(
+                kind=kind,
+                payload=payload,
+                data=data,
+                status=JobStatus.QUEUED,
+                max_attempts=max_attempts,
+                run_at=func.now() + timedelta(seconds=delay)
+            )
+            db.add(job)
+            db.flush()
+            job_id = job.id
+            db.commit()
+            metrics.counter("jobs.enqueued", {"kind": kind}).inc()
+            return job_id
+        finally:
+            db.close()
+
+    async def start(self):
+        """Start polling workers"""
+        if self._workers:
+            return
+        self._stopping = False
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} job workers as {self.worker_id}")
+
+    async def stop(self, timeout: Optional[float] = None):
+        """Stop claiming new jobs and wait for running jobs to finish
+
+        Jobs still running after the timeout are cancelled; their locks expire
+        and another worker reclaims them.
+        """
+        self._stopping = True
+        if not self._workers:
+            return
+        _, still_running = await asyncio.wait(self._workers, timeout=timeout)
+        for worker in still_running:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if still_running:
+            released = await asyncio.to_thread(self._release)
+            if released:
+                logger.info(f"Released {released} unfinished jobs for replay")
+
+    async def run_pending(self, kinds: Optional[List[str]] = None):
+        """Run due jobs of the given kinds until none are left, without polling workers
+
+        Used at startup when the worker pool is disabled, e.g. to replay work
+        saved by a previous shutdown.
+        """
+        while True:
+            jobs = await asyncio.to_thread(self._claim, self.concurrency, kinds)
+            if not jobs:
+                return
+            await asyncio.gather(*[self._run(job) for job in jobs])
+
+    async def _worker(self, index: int):
+        """Claim and run one job at a time, sleeping when the queue is empty"""
+        while not self._stopping:
+            try:
+                jobs = await asyncio.to_thread(self._claim, 1)
+            except Exception as e:
+                logger.error(f"Job worker {index} failed to claim jobs: {e}", exc_info=True)
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if not jobs:
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            for job in jobs:
+                await self._run(job)
+
+    def _claim(self, limit: int, kinds: Optional[List[str]] = None) -> List[ClaimedJob]:
+        """Lock up to `limit` runnable jobs and mark them running"""
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            stale_before = func.now() - timedelta(seconds=self.lock_timeout)
+            jobs = (
+                db.query(Job)
+                .filter(
+                    Job.kind.in_(kinds or list(self._handlers)),
+                    or_(
+                        and_(Job.status == JobStatus.QUEUED, Job.run_at <= func.now()),
+                        # Reclaim jobs whose worker died mid-run
+                        and_(Job.status == JobStatus.RUNNING, Job.locked_at < stale_before)
+                    )
+                )
+                .order_by(Job.run_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for job in jobs:
+                job.status = JobStatus.RUNNING
+                job.attempts += 1
+                job.locked_at = func.now()
+                job.locked_by = self.worker_id
+            db.flush()
+            claimed = [ClaimedJob(job) for job in jobs]
+            db.commit()
+            return claimed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _release(self) -> int:
+        """Put jobs this worker was running back in the queue, without using up an attempt"""
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            released = (
+                db.query(Job)
+                .filter(Job.status == JobStatus.RUNNING, Job.locked_by == self.worker_id)
+                .update(
+                    {
+                        Job.status: JobStatus.QUEUED,
+                        Job.attempts: Job.attempts - 1,
+                        Job.locked_at: None,
+                        Job.locked_by: None,
+                        Job.run_at: func.now()
+                    },
+                    synchronize_session=False
+                )
+            )
+            db.commit()
+            return released
+        finally:
+            db.close()
+
+    async def _run(self, job: ClaimedJob):
+        """Run a claimed job and record the outcome"""
+        self._claimed.inc()
+        handler = self._handlers.get(job.kind)
+        start = time.perf_counter()
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            try:
+                await handler(job.payload, job.data)
+            finally:
+                heartbeat.cancel()
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}: {e}", exc_info=True)
+            await asyncio.to_thread(self._finish, job, str(e))
+        else:
+            await asyncio.to_thread(self._finish, job, None)
+        finally:
+            self._run_seconds.observe(time.perf_counter() - start)
+
+    async def _heartbeat(self, job: ClaimedJob):
+        """Refresh a running job's lock so a long run isn't reclaimed as stale"""
+        while True:
+            await asyncio.sleep(self.lock_timeout / 3)
+            try:
+                await asyncio.to_thread(self._touch, job)
+            except Exception as e:
+                logger.warning(f"Failed to refresh the lock of job {job.id}: {e}")
+
+    def _touch(self, job: ClaimedJob):
+        """Move a job's locked_at to now, if this worker still holds it"""
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(
+                Job.id == job.id,
+                Job.status == JobStatus.RUNNING,
+                Job.locked_by == self.worker_id
+            ).update({Job.locked_at: func.now()}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish(self, job: ClaimedJob, error: Optional[str]):
+        """Mark a job done, schedule a retry, or mark it failed"""
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            row = db.query(Job).filter(Job.id == job.id).first()
+            if not row:
+                return
+            row.locked_at = None
+            row.locked_by = None
+            if error is None:
+                row.status = JobStatus.DONE
+                row.data = None  # Attachments are only needed until the job succeeds
+                self._completed.inc()
+            elif job.attempts < job.max_attempts:
+                row.status = JobStatus.QUEUED
+                row.last_error = error
+                row.run_at = func.now() + timedelta(seconds=2 ** job.attempts)
+                self._retried.inc()
+            else:
+                row.status = JobStatus.FAILED
+                row.last_error = error
+                self._failed.inc()
+            db.commit()
+        finally:
+            db.close()
+
+
+# Global job queue instance
+job_queue = JobQueue(
+    concurrency=settings.JOBS_CONCURRENCY,
+    poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS,
+    lock_timeout=settings.JOBS_LOCK_TIMEOUT_SECONDS
+)
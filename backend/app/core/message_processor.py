@@ -3,27 +3,46 @@ Message processor for handling incoming messages
 
 SINGLE MESSAGE FLOW (ONLY PATH):
 1. BlueBubbles Server → POST /api/v1/webhooks/bluebubbles
-2. Webhook handler parses → parse_bluebubbles_message()
+2. Webhook handler enqueues → ingestion_queue; a worker parses → parse_bluebubbles_message()
 3. Emits MESSAGE_RECEIVED event → event_bus.emit()
-4. MessageProcessor.handle_message() processes
+4. MessageProcessor.handle_message() processes, serialized per chat_guid by ChatDispatcher
 5. Identifies user by phone number from chat_guid
 6. Routes to user's agent → AgentService.process_task()
 7. Sends response via BlueBubbles → BlueBubblesService.send_message()
 
 This is the ONLY path for receiving messages. No polling, no direct API calls.
 """
+import asyncio
+import dataclasses
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.admission import TURN_LATENCY_METRIC
+from app.core.chat_owners import ChatOwner, chat_owner_cache
+from app.core.config import settings
+from app.core.dedupe import message_deduplicator
+from app.core.dispatcher import ChatDispatcher
 from app.core.events import event_bus, EventType
+from app.core.jobs import job_queue
+from app.core.metrics import metrics
+from app.core.summarizer import conversation_summarizer
 from app.core.dependencies import get_database
 from app.services.agent.agent import AgentService
+from app.services.embedding_service import EmbeddingItem, EmbeddingService, turn_text
 from app.services.user_service import UserService
 from app.integrations.messaging.bluebubbles.service import BlueBubblesService
-from app.integrations.messaging.base_messaging import Message
+from app.integrations.messaging.base_messaging import Message, InboundMessage
+from app.services.agent.handlers.base_handler import TaskData
+from app.models.task import TaskStatus
+from app.utils.phone import to_e164
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# Job kind for turns that were unfinished at shutdown
+MESSAGE_REPLAY_JOB_KIND = "message.replay"
+
 
 class MessageProcessor:
     """Processes incoming messages and routes to agent"""
@@ -31,6 +50,23 @@ class MessageProcessor:
     def __init__(self):
         self.agent = AgentService()
         self.bluebubbles = BlueBubblesService()
+        # One ordered lane per chat, lanes run in parallel up to the cap
+        self.dispatcher = ChatDispatcher(settings.DISPATCHER_MAX_CONCURRENCY, name="messages")
+        # Debounce buffers keyed by (chat_guid, sender): (first arrival, messages, flush timer, burst finished)
+        self._pending: Dict[Tuple[str, str], Tuple[float, List[InboundMessage], asyncio.Task, asyncio.Future]] = {}
+        self._coalesced = metrics.counter("messages.coalesced")
+        # End-to-end turn latency (lane wait + processing); drives admission control
+        self._turn_seconds = metrics.histogram(TURN_LATENCY_METRIC)
+        # Per-stage breakdown of handle_message
+        self._stages = {
+            stage: metrics.histogram("messages.stage_seconds", {"stage": stage})
+            for stage in ("identify", "store", "agent", "reply")
+        }
+        # Messages dispatched but not finished, keyed by id(); saved for replay on shutdown
+        self._inflight: Dict[int, InboundMessage] = {}
+        # Bound accepted but unfinished messages, per admission tier; created lazily so they bind to the running loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._degraded_slots: Optional[asyncio.Semaphore] = None
         self._initialized = False
     
     async def initialize(self):
@@ -39,24 +75,222 @@ class MessageProcessor:
             return
         
         # Subscribe to MESSAGE_RECEIVED events
-        # Wrap in a lambda to ensure proper async handling
-        async def message_handler(data):
-            await self.handle_message(data)
-        
-        event_bus.subscribe(EventType.MESSAGE_RECEIVED, message_handler)
+        # Messages are dispatched into a per-chat lane so turns in one chat never overlap
+        event_bus.subscribe(EventType.MESSAGE_RECEIVED, self.accept)
+        # Embed answered turns, emails and documents for semantic recall
+        if settings.EMBEDDINGS_ENABLED:
+            event_bus.subscribe(EventType.TEXT_CAPTURED, EmbeddingService.handle_text_captured)
         self._initialized = True
     
-    async def handle_message(self, message_data: Dict[str, Any]):
-        """Handle incoming message event"""
+    async def accept(self, message_data: InboundMessage):
+        """Queue a message for a turn in its chat's lane
+        
+        Returns once the turn is queued, so a busy chat doesn't hold the caller
+        (an ingestion worker) while its turns wait in the lane. The caller only
+        waits while DISPATCHER_MAX_PENDING_TURNS messages are unfinished
+        (ADMISSION_DEGRADED_MAX_PENDING_TURNS for the degraded tier), which
+        lets the ingestion queues and admission control push back. Durable
+        messages (jobs) wait for their turn to finish, debounced or not, so the
+        job is only marked done once the turn has run; other messages are in
+        _pending/_inflight until then and are saved for replay on shutdown.
+        """
+        if message_data.is_from_me:
+            logger.debug("Skipping message from agent itself (isFromMe=True)")
+            return
+        await self._slots_for(message_data).acquire()
+        
+        if settings.MESSAGE_DEBOUNCE_SECONDS > 0:
+            turn = self._buffer_message(message_data)
+        else:
+            turn = self._dispatch(message_data)
+        if message_data.durable:
+            # Shielded: a cancelled caller (job worker) leaves the turn itself running
+            await asyncio.shield(turn)
+    
+    def _slots_for(self, message_data: InboundMessage) -> asyncio.Semaphore:
+        """The pending-turn budget a message counts against"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.DISPATCHER_MAX_PENDING_TURNS)
+            self._degraded_slots = asyncio.Semaphore(settings.ADMISSION_DEGRADED_MAX_PENDING_TURNS)
+        return self._degraded_slots if message_data.degraded else self._slots
+    
+    def _dispatch(self, message_data: InboundMessage, slots: Optional[List[asyncio.Semaphore]] = None) -> asyncio.Future:
+        """Queue handle_message in the lane for the message's chat
+        
+        Args:
+            slots: Pending-turn slots the message holds (default its own), released when the turn ends
+        
+        Returns:
+            Future that resolves when the turn has finished
+        """
+        slots = slots or [self._slots_for(message_data)]
+        lane_key = message_data.chat_guid or message_data.sender
+        self._inflight[id(message_data)] = message_data
+        queued_at = time.perf_counter()
+        turn = self.dispatcher.submit(lane_key, lambda: self._run_turn(message_data))
+        turn.add_done_callback(lambda future: self._turn_done(future, queued_at, slots))
+        return turn
+    
+    def _turn_done(self, turn: asyncio.Future, queued_at: float, slots: List[asyncio.Semaphore]):
+        """Record turn latency (lane wait + processing) and free the message's slots"""
+        self._turn_seconds.observe(time.perf_counter() - queued_at)
+        for slot in slots:
+            slot.release()
+        if not turn.cancelled() and turn.exception():
+            logger.error(f"Error handling message: {turn.exception()}", exc_info=turn.exception())
+    
+    async def _run_turn(self, message_data: InboundMessage):
+        """Run a turn in its lane; a cancelled turn stays in _inflight for replay"""
+        try:
+            await self.handle_message(message_data)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if not message_data.durable:
+                # Nothing retries it here, so let a redelivery of the webhook through
+                for fragment in message_data.fragments or [message_data]:
+                    await message_deduplicator.forget_async(fragment.message_guid)
+            self._inflight.pop(id(message_data), None)
+            raise
+        self._inflight.pop(id(message_data), None)
+    
+    def _buffer_message(self, message_data: InboundMessage) -> asyncio.Future:
+        """Hold a message for the debounce window so rapid-fire messages become one turn
+        
+        Each new message restarts the window, but a burst is never held longer
+        than MESSAGE_DEBOUNCE_MAX_SECONDS after its first message.
+        
+        Returns:
+            Future that resolves when the burst's turn has finished
+        """
+        key = (message_data.chat_guid, message_data.sender)
+        now = time.monotonic()
+        
+        pending = self._pending.get(key)
+        if pending:
+            first_at, messages, timer, finished = pending
+            timer.cancel()
+        else:
+            first_at, messages = now, []
+            finished = asyncio.get_running_loop().create_future()
+            # Only durable messages await the burst; don't warn about errors nobody retrieved
+            finished.add_done_callback(lambda future: future.cancelled() or future.exception())
+        messages.append(message_data)
+        
+        delay = min(
+            settings.MESSAGE_DEBOUNCE_SECONDS,
+            max(0.0, first_at + settings.MESSAGE_DEBOUNCE_MAX_SECONDS - now)
+        )
+        timer = asyncio.create_task(self._flush_after(key, delay))
+        self._pending[key] = (first_at, messages, timer, finished)
+        return finished
+    
+    async def _flush_after(self, key: Tuple[str, str], delay: float):
+        """Wait out the debounce window, then dispatch the buffered messages as one turn"""
+        await asyncio.sleep(delay)
+        self._flush(key)
+    
+    def _flush(self, key: Tuple[str, str]):
+        """Dispatch a debounce buffer as one turn; the burst finishes with the turn"""
+        _, messages, _, finished = self._pending.pop(key)
+        turn = self._dispatch(self._merge_messages(messages), slots=[self._slots_for(m) for m in messages])
+        turn.add_done_callback(lambda future: self._finish_burst(future, finished))
+    
+    @staticmethod
+    def _finish_burst(turn: asyncio.Future, finished: asyncio.Future):
+        """Pass a burst's turn outcome (including its error) on to the burst's messages"""
+        if turn.cancelled():
+            finished.cancel()
+        elif turn.exception():
+            finished.set_exception(turn.exception())
+        else:
+            finished.set_result(None)
+    
+    def _merge_messages(self, messages: List[InboundMessage]) -> InboundMessage:
+        """Merge buffered messages into a single message, keeping the originals as fragments"""
+        if len(messages) == 1:
+            return messages[0]
+        
+        self._coalesced.inc(len(messages))
+        logger.info(f"Coalescing {len(messages)} messages from {messages[-1].sender} into one turn")
+        return dataclasses.replace(
+            messages[-1],
+            content="\n".join(m.content for m in messages if m.content),
+            fragments=messages,
+            durable=all(m.durable for m in messages)
+        )
+    
+    def flush_pending(self):
+        """Dispatch all debounce buffers now instead of waiting out their windows"""
+        for key in list(self._pending):
+            self._pending[key][2].cancel()
+            self._flush(key)
+    
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for in-flight turns to finish
+        
+        Returns:
+            True if every turn finished within the timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._inflight or self._pending:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.1)
+        return True
+    
+    async def stop(self) -> List[InboundMessage]:
+        """Cancel unfinished turns and close the LLM client
+        
+        Returns:
+            Messages whose turns did not finish and were not already persisted
+            upstream, for the caller to save for replay
+        """
+        self.flush_pending()
+        await self.dispatcher.stop()
+        unfinished = [m for m in self._inflight.values() if not m.durable]
+        self._inflight.clear()
+        self.agent.llm.close()
+        return unfinished
+    
+    @staticmethod
+    def persist_for_replay(messages: List[InboundMessage]) -> int:
+        """Save unfinished messages as replay jobs (blocking; call from a thread)
+        
+        A replayed turn finds the row its interrupted run may have stored by
+        message GUID, so the message isn't stored (or answered) twice.
+        """
+        saved = 0
+        for message in messages:
+            try:
+                job_queue.enqueue(MESSAGE_REPLAY_JOB_KIND, message.to_dict())
+                saved += 1
+            except Exception as e:
+                logger.error(f"Error saving message {message.message_guid} for replay: {e}", exc_info=True)
+        return saved
+    
+    async def handle_message(self, message_data: InboundMessage):
+        """Handle incoming message event
+        
+        The whole turn shares one AsyncSession (unit of work): identify, store,
+        the agent/handlers (via TaskData.db) and the reply update. The session
+        only holds a pooled connection while a transaction is open, so it is
+        released between steps and during LLM calls.
+        
+        Unexpected errors propagate, so a durable message's job is retried.
+        """
+        from app.core.database import AsyncSessionLocal, session_scope
+        
+        db = AsyncSessionLocal()
         try:
             # Skip messages from the agent itself to prevent infinite loops
-            if message_data.get("is_from_me", False):
+            if message_data.is_from_me:
                 logger.debug("Skipping message from agent itself (isFromMe=True)")
                 return
             
-            source = message_data.get("source", "")
-            content = message_data.get("content", "")
-            sender = message_data.get("sender", "")
+            source = message_data.source
+            content = message_data.content
+            sender = message_data.sender
             
             # Skip if no content or sender
             if not content or not sender:
@@ -67,70 +301,98 @@ class MessageProcessor:
             # In BlueBubbles, messages are sent TO the user's configured phone number
             # We need to find which user's phone number received this message
             # The chat_guid contains the recipient's phone number
-            user = await self._identify_user_from_message(message_data)
+            with self._stages["identify"].time():
+                user = await self._identify_user_from_message(message_data, db)
             
             if not user:
                 logger.warning(
                     f"Could not identify user for message from {sender}. "
-                    f"Chat GUID: {message_data.get('chat_guid', 'N/A')}. "
+                    f"Chat GUID: {message_data.chat_guid or 'N/A'}. "
                     f"Message will not be processed. Make sure a user has this phone number configured."
                 )
                 return
             
-            logger.info(f"Processing incoming message from {sender} for user {user.email} (agent: {user.agent_name or 'Blume'}): {content[:50]}...")
+            logger.info(f"Processing incoming message from {sender} for user {user.id} (agent: {user.agent_name or 'Blume'}): {content[:50]}...")
             
             # Store user message in conversation history
-            from app.core.database import SessionLocal
             from app.services.conversation_service import ConversationService
             
-            db = SessionLocal()
+            store_start = time.perf_counter()
+            answered = None
             try:
-                chat_guid = message_data.get("chat_guid")
-                # Store the user message (we'll update it with the response later)
-                # user.id is already a UUID object, no need to convert
-                task = ConversationService.store_message(
-                    db=db,
-                    user_id=user.id,
-                    user_message=content,
-                    agent_response=None,  # Will be updated after agent responds
-                    chat_guid=chat_guid,
-                    metadata={
-                        "source": source,
-                        "sender": sender,
-                        "message_guid": message_data.get("message_guid"),
-                        "agent_name": user.agent_name or "Blume",
-                    }
-                )
-                task_id = task.id
+                async with session_scope(db):
+                    chat_guid = message_data.chat_guid
+                    # A replayed or retried turn reuses the row its earlier run stored
+                    task = await ConversationService.get_turn_async(db, user.id, message_data.message_guid)
+                    if task is None:
+                        # Store the user message (we'll update it with the response later)
+                        # user.id is already a UUID object, no need to convert
+                        task = await ConversationService.store_message_async(
+                            db=db,
+                            user_id=user.id,
+                            user_message=content,
+                            agent_response=None,  # Will be updated after agent responds
+                            chat_guid=chat_guid,
+                            metadata={
+                                "source": source,
+                                "sender": sender,
+                                "message_guid": message_data.message_guid,
+                                "agent_name": user.agent_name or "Blume",
+                            }
+                        )
+                        
+                        # Coalesced turns also keep each original message, linked to the turn row
+                        fragments = message_data.fragments
+                        if fragments:
+                            await ConversationService.store_linked_messages_async(
+                                db=db,
+                                user_id=user.id,
+                                turn_task_id=task.id,
+                                fragments=fragments,
+                                chat_guid=chat_guid,
+                                metadata={"source": source, "sender": sender}
+                            )
+                    elif task.status == TaskStatus.COMPLETED:
+                        answered = task.output
+                    task_id = task.id
             except Exception as e:
                 logger.error(f"Error storing user message: {e}", exc_info=True)
                 task_id = None
             finally:
-                db.close()
+                self._stages["store"].observe(time.perf_counter() - store_start)
+            
+            if answered:
+                # The earlier run recorded its response (and history) but may not have sent it
+                logger.info(f"Message {message_data.message_guid} was already answered; resending the stored response")
+                await self._send_response(sender, answered, message_data.chat_guid, user)
+                return
             
             # Process message with agent (each user gets their own agent instance)
-            task_data = {
-                "input": content,
-                "type": "message",
-                "user_id": str(user.id),
-                "task_id": str(task_id) if task_id else None,  # Pass task_id to update response later
-                "metadata": {
+            task_data = TaskData(
+                input=content,
+                type="message",
+                user_id=str(user.id),
+                task_id=str(task_id) if task_id else None,  # Pass task_id to update response later
+                metadata={
                     "source": source,
                     "sender": sender,
-                    "chat_guid": message_data.get("chat_guid"),
-                    "message_guid": message_data.get("message_guid"),
+                    "chat_guid": message_data.chat_guid,
+                    "message_guid": message_data.message_guid,
                     "user_id": str(user.id),
                     "agent_name": user.agent_name or "Blume",
-                }
-            }
+                },
+                db=db
+            )
             
             # Use user-specific agent (could be enhanced to have per-user agent instances)
-            result = await self.agent.process_task(task_data)
+            with self._stages["agent"].time():
+                result = await self.agent.process_task(task_data)
             
             # If agent produced a response, send it back via BlueBubbles
             # Also handle pending_confirmation status
-            if (result.get("status") in ["completed", "pending_confirmation"] and result.get("output")):
-                output = result.get("output")
+            reply_start = time.perf_counter()
+            if (result.status in ["completed", "pending_confirmation"] and result.output):
+                output = result.output
                 
                 # Only send response if it's not a function call result
                 # (function calls handle their own responses)
@@ -138,108 +400,95 @@ class MessageProcessor:
                     # Update conversation history with agent response
                     # For pending_confirmation, also store the metadata for later retrieval
                     if task_id:
-                        db = SessionLocal()
                         try:
-                            ConversationService.update_agent_response(
-                                db=db,
-                                task_id=task_id,
-                                agent_response=output
-                            )
-                            
-                            # If this is a pending confirmation, update task metadata
-                            if result.get("status") == "pending_confirmation":
-                                from app.models.task import Task
-                                task = db.query(Task).filter(Task.id == task_id).first()
-                                if task and result.get("metadata"):
-                                    # Merge confirmation metadata into task metadata
-                                    if task.tast_metadata:
-                                        task.tast_metadata.update(result.get("metadata", {}))
-                                    else:
-                                        task.tast_metadata = result.get("metadata", {})
-                                    db.commit()
+                            async with session_scope(db):
+                                await ConversationService.update_agent_response_async(
+                                    db=db,
+                                    task_id=task_id,
+                                    agent_response=output,
+                                    # Pending confirmations keep their metadata for the follow-up turn
+                                    metadata=result.metadata if result.status == "pending_confirmation" else None
+                                )
+                            # Fold aged-out turns into the chat summary and embed the turn, off the reply path
+                            conversation_summarizer.schedule(user.id, message_data.chat_guid)
+                            await EmbeddingService.capture([EmbeddingItem(
+                                user_id=user.id,
+                                source="conversation",
+                                text=turn_text(content, str(output)),
+                                source_id=str(task_id),
+                                chat_guid=message_data.chat_guid
+                            )])
                         except Exception as e:
                             logger.error(f"Error updating agent response in history: {e}", exc_info=True)
-                        finally:
-                            db.close()
                     
-                    await self._send_response(sender, output, message_data.get("chat_guid"), user)
+                    await self._send_response(sender, output, message_data.chat_guid, user)
+                    self._stages["reply"].observe(time.perf_counter() - reply_start)
             else:
-                logger.debug(f"Agent did not produce a response. Status: {result.get('status')}, Output: {result.get('output')}")
-        
-        except Exception as e:
-            logger.error(f"Error handling message: {e}", exc_info=True)
+                logger.debug(f"Agent did not produce a response. Status: {result.status}, Output: {result.output}")
+        finally:
+            await db.close()
     
-    async def _identify_user_from_message(self, message_data: Dict[str, Any]) -> Optional[Any]:
+    async def _identify_user_from_message(self, message_data: InboundMessage, db: Optional[AsyncSession] = None) -> Optional[ChatOwner]:
         """Identify which user a message belongs to based on chat GUID
         
-        The chat GUID format is: "iMessage;-;+14089167303" where the last part is the user's phone number
+        The chat GUID format is: "iMessage;-;+14089167303" where the last part is the user's phone number.
+        Results (including misses) are cached per chat GUID.
         """
         try:
-            from app.core.database import SessionLocal
-            from app.models.user import User
+            from app.core.database import session_scope
             
-            # Create a new database session
-            db = SessionLocal()
-            try:
-                # Extract chat GUID which contains the recipient's phone number
-                chat_guid = message_data.get("chat_guid", "")
-                
-                if not chat_guid:
-                    logger.warning(f"No chat_guid in message data: {message_data}")
-                    return None
-                
-                # Chat GUID format: "iMessage;-;+14089167303" or "iMessage;+;+14089167303"
-                # Extract phone number from chat GUID (last part after semicolons)
-                phone_number = None
-                parts = chat_guid.split(";")
-                
-                if len(parts) >= 3:
-                    # Last part is the phone number
-                    potential_number = parts[-1].strip()
-                    # Remove "chat" prefix if present (some formats have "chat1234567890")
-                    if potential_number.startswith("chat"):
-                        phone_number = potential_number.replace("chat", "").strip()
-                    elif potential_number.startswith("+"):
-                        phone_number = potential_number
-                    else:
-                        # Try adding + if it's just digits
-                        phone_number = f"+{potential_number}" if potential_number.isdigit() else potential_number
-                
-                logger.debug(f"Extracted phone number from chat_guid '{chat_guid}': {phone_number}")
-                
-                # Look up user by phone number
-                if phone_number:
-                    user = UserService.get_user_by_phone_number(db, phone_number)
-                    
-                    if user:
-                        logger.info(f"Identified user {user.email} from phone number {phone_number}")
-                        return user
-                    else:
-                        logger.warning(f"No user found with phone number {phone_number}")
-                
-                # Fallback: Try to match any user's phone number within the chat GUID
-                # This handles edge cases where the format might be slightly different
-                all_users = db.query(User).filter(User.phone_number.isnot(None)).all()
-                chat_guid_normalized = chat_guid.replace("+", "").replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
-                
-                for u in all_users:
-                    if not u.phone_number:
-                        continue
-                    user_phone_normalized = u.phone_number.replace("+", "").replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
-                    # Check if user's phone number appears in the chat GUID
-                    if user_phone_normalized in chat_guid_normalized:
-                        logger.info(f"Identified user {u.email} from chat GUID matching phone number (fallback method)")
-                        return u
-                
-                logger.warning(f"Could not identify user for message. Chat GUID: {chat_guid}, Phone extracted: {phone_number}")
+            # Extract chat GUID which contains the recipient's phone number
+            chat_guid = message_data.chat_guid
+            
+            if not chat_guid:
+                logger.warning(f"No chat_guid in message data: {message_data}")
                 return None
-            finally:
-                db.close()
+            
+            found, owner = chat_owner_cache.get(chat_guid)
+            if found:
+                return owner
+            
+            # Chat GUID format: "iMessage;-;+14089167303" or "iMessage;+;+14089167303"
+            # Extract phone number from chat GUID (last part after semicolons)
+            phone_number = None
+            parts = chat_guid.split(";")
+            
+            if len(parts) >= 3:
+                # Last part is the phone number
+                potential_number = parts[-1].strip()
+                # Remove "chat" prefix if present (some formats have "chat1234567890")
+                if potential_number.startswith("chat"):
+                    phone_number = potential_number.replace("chat", "").strip()
+                elif potential_number.isdigit() and len(potential_number) > 10:
+                    # Digits with a country code but no "+"
+                    phone_number = f"+{potential_number}"
+                else:
+                    # Other formatting differences are handled by E.164 normalization in the lookup
+                    phone_number = potential_number
+            
+            logger.debug(f"Extracted phone number from chat_guid '{chat_guid}': {phone_number}")
+            
+            if not phone_number:
+                logger.warning(f"Could not extract a phone number from chat GUID: {chat_guid}")
+                chat_owner_cache.set(chat_guid, None, None)
+                return None
+            
+            # Single indexed lookup on users.phone_e164
+            async with session_scope(db) as session:
+                user = await UserService.get_user_by_phone_number_async(session, phone_number)
+                owner = ChatOwner(id=user.id, agent_name=user.agent_name, timezone=user.timezone) if user else None
+            
+            chat_owner_cache.set(chat_guid, to_e164(phone_number), owner)
+            if owner:
+                logger.info(f"Identified user {owner.id} from phone number {phone_number}")
+            else:
+                logger.warning(f"No user found with phone number {phone_number}. Chat GUID: {chat_guid}")
+            return owner
         except Exception as e:
             logger.error(f"Error identifying user from message: {e}", exc_info=True)
             return None
     
-    async def _send_response(self, recipient: str, content: str, chat_guid: str = None, user: Optional[Any] = None):
+    async def _send_response(self, recipient: str, content: str, chat_guid: str = None, user: Optional[ChatOwner] = None):
         """Send response message back to sender"""
         try:
             agent_name = (user.agent_name if user else None) or "Blume"
@@ -272,3 +521,13 @@ class MessageProcessor:
 # Global message processor instance
 message_processor = MessageProcessor()
 
+
+async def run_message_replay_job(payload: Dict[str, Any], data: Optional[bytes] = None):
+    """Job handler that replays a turn left unfinished by a previous shutdown"""
+    message = InboundMessage.from_dict(payload)
+    message.durable = True  # The job row is the durable copy now
+    await message_processor.accept(message)
+
+
+job_queue.register(MESSAGE_REPLAY_JOB_KIND, run_message_replay_job)
+
@@ -0,0 +1,185 @@
+"""
+In-process metrics registry
+
+Lightweight counters, gauges and histograms exposed through GET /metrics.
+Metrics are per process; each uvicorn worker reports its own values.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple, Deque
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    """Convert a label dict into a hashable, ordered key"""
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_name(name: str, key: LabelKey) -> str:
+    """Render a metric name with its labels, e.g. name{a=1,b=2}"""
+    if not key:
+        return name
+    rendered = ",".join(f"{k}={v}" for k, v in key)
+    return f"{name}{{{rendered}}}"
+
+
+class Counter:
+    """Monotonically increasing counter"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        """Increment the counter"""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class Gauge:
+    """Value that can go up and down"""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        """Set the gauge to a value"""
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1):
+        """Increment the gauge"""
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        """Decrement the gauge"""
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """Observation histogram backed by a bounded sliding window
+
+    Keeps the total count and sum for all observations, and the most recent
+    `window` observations for percentile estimates.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record an observation"""
+        with self._lock:
+            self._samples.append(value)
+            self._count += 1
+            self._sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager that observes elapsed seconds"""
+        return _Timer(self)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile (0-100) over the recent window, None if empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(q / 100 * (len(samples) - 1)))))
+        return samples[index]
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary of the histogram"""
+        return {
+            "count": self._count,
+            "sum": round(self._sum, 6),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class _Timer:
+    """Context manager that records elapsed time into a histogram"""
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class MetricsRegistry:
+    """Registry of named metrics"""
+
+    def __init__(self):
+        self._counters: Dict[Tuple[str, LabelKey], Counter] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], Gauge] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, labels: Optional[Dict[str, str]] = None) -> Counter:
+        """Get or create a counter"""
+        key = (name, _label_key(labels))
+        metric = self._counters.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._counters.setdefault(key, Counter())
+        return metric
+
+    def gauge(self, name: str, labels: Optional[Dict[str, str]] = None) -> Gauge:
+        """Get or create a gauge"""
+        key = (name, _label_key(labels))
+        metric = self._gauges.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._gauges.setdefault(key, Gauge())
+        return metric
+
+    def histogram(self, name: str, labels: Optional[Dict[str, str]] = None) -> Histogram:
+        """Get or create a histogram"""
+        key = (name, _label_key(labels))
+        metric = self._histograms.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._histograms.setdefault(key, Histogram())
+        return metric
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values of all metrics"""
+        return {
+            "counters": {_format_name(n, k): c.value for (n, k), c in list(self._counters.items())},
+            "gauges": {_format_name(n, k): g.value for (n, k), g in list(self._gauges.items())},
+            "histograms": {_format_name(n, k): h.snapshot() for (n, k), h in list(self._histograms.items())},
+        }
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
@@ -0,0 +1,133 @@
+"""
+Monthly partitions and retention for the tasks table
+
+tasks is range-partitioned by created_at, one partition per month
+(tasks_pYYYY_MM) plus tasks_default for anything outside them. Maintenance:
+- creates partitions TASKS_PARTITION_MONTHS_AHEAD months ahead, so inserts
+  never land in tasks_default
+- with TASKS_RETENTION_MONTHS > 0, takes partitions whose whole month is
+  older than that out of tasks: detached and renamed to tasks_archive_YYYY_MM
+  (TASKS_RETENTION_ACTION=detach, for dumping to cold storage) or dropped
+  (TASKS_RETENTION_ACTION=drop)
+
+Runs at startup and then every TASKS_PARTITION_MAINTENANCE_SECONDS. An
+advisory lock keeps concurrent processes from running it at the same time.
+Can also be run by hand: python -m app.core.partitions
+"""
+import asyncio
+import logging
+import re
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "tasks"
+_PARTITION_RE = re.compile(r"^tasks_p(\d{4})_(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    years, index = divmod(month.month - 1 + months, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"tasks_p{month:%Y_%m}"
+
+
+def create_partition_sql(month: date) -> str:
+    """DDL for one monthly partition"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def list_partitions(conn) -> List[Tuple[str, date]]:
+    """Attached monthly partitions of tasks as (name, first day of month), oldest first"""
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :parent"
+    ), {"parent": PARENT_TABLE}).scalars().all()
+    partitions = []
+    for name in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def maintain_partitions(today: date = None) -> Dict[str, List[str]]:
+    """Create upcoming partitions and apply the retention policy (blocking)
+
+    Returns:
+        {"created": [...], "archived": [...], "dropped": [...]}
+    """
+    from app.core.database import engine
+
+    today = today or datetime.utcnow().date()
+    this_month = month_start(today)
+    summary: Dict[str, List[str]] = {"created": [], "archived": [], "dropped": []}
+
+    with engine.begin() as conn:
+        # Held until commit; other processes wait, then find nothing to do
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('tasks_partition_maintenance'))"))
+
+        existing = {name for name, _ in list_partitions(conn)}
+        for offset in range(settings.TASKS_PARTITION_MONTHS_AHEAD + 1):
+            month = add_months(this_month, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            # Savepoint: fails if tasks_default already holds rows for this month
+            try:
+                with conn.begin_nested():
+                    conn.execute(text(create_partition_sql(month)))
+                summary["created"].append(name)
+            except Exception as e:
+                logger.error(f"Could not create partition {name}: {e}")
+
+        if settings.TASKS_RETENTION_MONTHS > 0:
+            cutoff = add_months(this_month, -settings.TASKS_RETENTION_MONTHS)
+            for name, month in list_partitions(conn):
+                if add_months(month, 1) > cutoff:
+                    break
+                conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                if settings.TASKS_RETENTION_ACTION == "drop":
+                    conn.execute(text(f"DROP TABLE {name}"))
+                    summary["dropped"].append(name)
+                else:
+                    conn.execute(text(f"ALTER TABLE {name} RENAME TO tasks_archive_{month:%Y_%m}"))
+                    summary["archived"].append(name)
+
+    for action, names in summary.items():
+        if names:
+            metrics.counter("tasks.partitions", {"action": action}).inc(len(names))
+            logger.info(f"Task partitions {action}: {', '.join(names)}")
+    return summary
+
+
+async def run_partition_maintenance():
+    """Run maintain_partitions now and then every TASKS_PARTITION_MAINTENANCE_SECONDS"""
+    while True:
+        try:
+            await asyncio.to_thread(maintain_partitions)
+        except Exception as e:
+            logger.error(f"Task partition maintenance failed: {e}", exc_info=True)
+        await asyncio.sleep(settings.TASKS_PARTITION_MAINTENANCE_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(maintain_partitions())
@@ -0,0 +1,85 @@
+"""
+Connection pool telemetry
+
+Pool checkouts that have to wait (pool exhausted, overflow connections being
+opened) are otherwise invisible: a turn just gets slower. Each engine's pool
+reports, labelled with engine=<name>:
+- db.pool.checkout_wait_seconds: time spent acquiring a connection
+- db.pool.checked_out / db.pool.overflow / db.pool.size: current pool state
+- db.pool.checkouts, db.pool.overflow_connections, db.pool.timeouts,
+  db.pool.invalidations: counters
+"""
+import time
+from typing import Type
+
+from sqlalchemy import event
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from app.core.metrics import metrics
+
+
+class _TimedPoolMixin:
+    """Times _do_get (the blocking part of a checkout) on QueuePool subclasses"""
+
+    metrics_name = "default"
+
+    def _do_get(self):
+        labels = {"engine": self.metrics_name}
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.counter("db.pool.timeouts", labels).inc()
+            raise
+        finally:
+            metrics.histogram("db.pool.checkout_wait_seconds", labels).observe(time.perf_counter() - start)
+
+
+def timed_pool_class(base: Type[Pool], name: str) -> Type[Pool]:
+    """Subclass of a QueuePool class that records checkout wait time
+
+    The name is a class attribute so it survives pool.recreate() (engine.dispose()).
+    """
+    return type(f"Timed{base.__name__}", (_TimedPoolMixin, base), {"metrics_name": name})
+
+
+def instrument_pool(engine: Engine, name: str):
+    """Report pool state and events for an engine (pass async_engine.sync_engine for async engines)"""
+    labels = {"engine": name}
+    checkouts = metrics.counter("db.pool.checkouts", labels)
+    overflow_connections = metrics.counter("db.pool.overflow_connections", labels)
+    invalidations = metrics.counter("db.pool.invalidations", labels)
+    checked_out = metrics.gauge("db.pool.checked_out", labels)
+    overflow = metrics.gauge("db.pool.overflow", labels)
+    size = metrics.gauge("db.pool.size", labels)
+
+    def update_gauges():
+        # engine.pool, not a captured pool: dispose() swaps in a new one
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            checked_out.set(pool.checkedout())
+            overflow.set(max(0, pool.overflow()))
+            size.set(pool.size())
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool = engine.pool
+        if hasattr(pool, "overflow") and pool.overflow() > 0:
+            overflow_connections.inc()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.inc()
+        update_gauges()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        update_gauges()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        invalidations.inc()
+
+    update_gauges()
@@ -0,0 +1,161 @@
+"""
+Rolling per-chat conversation summaries
+
+Handlers send a chat's recent turns verbatim; everything older is kept as a
+compact summary in conversation_summaries, so long threads stay in context
+without widening the raw history window:
+- after each answered turn, MessageProcessor calls schedule(), which returns
+  immediately; the fold runs as a background task (at most one per chat)
+- a fold happens once SUMMARY_EVERY_TURNS turns have aged out of the last
+  SUMMARY_RECENT_TURNS: the previous summary plus those messages go to a
+  small model (SUMMARY_MODEL), and the result replaces the summary
+- folds take the oldest unsummarized turns first, at most
+  SUMMARY_MAX_FOLD_TURNS per LLM call, and repeat until caught up (the
+  first fold of a long chat)
+- summaries are cached per chat (ConversationService.get_summary_async) and
+  updated in place after each fold, which also invalidates the chat's
+  cached history
+
+A failed fold is logged and retried after the next turn; nothing on the reply
+path waits for it. Event loop only.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a text conversation between a user and their "
+    "personal assistant. Update the summary with the new messages. Keep facts that may "
+    "matter later: names, dates, times, places, decisions, commitments, preferences and "
+    "open requests. Drop small talk. Write terse plain sentences, at most {max_words} words, "
+    "and reply with the summary only."
+)
+
+
+class ConversationSummarizer:
+    """Background folding of aged-out turns into per-chat summaries"""
+
+    def __init__(self, max_chats: int, ttl_seconds: float):
+        # (user_id, chat_guid) -> summary, or None for chats known to have none
+        self._summaries: TTLCache[Optional[str]] = TTLCache(max_entries=max_chats, ttl=ttl_seconds)
+        self._running: Dict[Tuple[UUID, str], asyncio.Task] = {}
+        self._llm = None
+        self._folds = metrics.counter("summaries.folds")
+        self._errors = metrics.counter("summaries.errors")
+        self._fold_seconds = metrics.histogram("summaries.fold_seconds")
+
+    def cached(self, user_id: UUID, chat_guid: str) -> Tuple[bool, Optional[str]]:
+        """(found, summary): found is False if the chat isn't cached"""
+        summary = self._summaries.get((user_id, chat_guid), _MISSING)
+        if summary is _MISSING:
+            return False, None
+        return True, summary
+
+    def remember(self, user_id: UUID, chat_guid: str, summary: Optional[str]):
+        self._summaries.set((user_id, chat_guid), summary)
+
+    def schedule(self, user_id: UUID, chat_guid: Optional[str]):
+        """Fold the chat's aged-out turns in the background, if there are enough"""
+        if not settings.SUMMARY_ENABLED or not chat_guid:
+            return
+        key = (user_id, chat_guid)
+        if key in self._running:
+            return  # The running fold or the next turn picks up the rest
+        task = asyncio.create_task(self._fold(user_id, chat_guid))
+        self._running[key] = task
+        task.add_done_callback(lambda _: self._running.pop(key, None))
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for running folds
+
+        Returns:
+            True if all folds finished within the timeout
+        """
+        if not self._running:
+            return True
+        _, still_pending = await asyncio.wait(set(self._running.values()), timeout=timeout)
+        return not still_pending
+
+    async def stop(self):
+        """Cancel unfinished folds (they are redone after the chat's next turn) and close the LLM client"""
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+        if self._llm is not None:
+            self._llm.close()
+            self._llm = None
+
+    async def _fold(self, user_id: UUID, chat_guid: str):
+        from app.core.database import AsyncSessionLocal, release_connection
+        from app.core.history_cache import history_cache
+        from app.services.conversation_service import ConversationService
+
+        try:
+            async with AsyncSessionLocal() as db:
+                while True:
+                    start = time.perf_counter()
+                    summary, rows = await ConversationService.get_unsummarized_async(db, user_id, chat_guid)
+                    if len(rows) < settings.SUMMARY_EVERY_TURNS * 2:
+                        return
+                    # Release the connection while waiting on the LLM
+                    await release_connection(db)
+
+                    summary = await self._summarize(summary, rows)
+                    await ConversationService.save_summary_async(
+                        db,
+                        user_id=user_id,
+                        chat_guid=chat_guid,
+                        summary=summary,
+                        summarized_through=rows[-1].created_at,
+                        message_count=len(rows)
+                    )
+                    self.remember(user_id, chat_guid, summary)
+                    # Reread the chat's history alongside its new summary
+                    history_cache.invalidate(user_id, chat_guid)
+                    self._folds.inc()
+                    self._fold_seconds.observe(time.perf_counter() - start)
+                    logger.debug(f"Folded {len(rows)} messages into the summary of chat {chat_guid}")
+                    if len(rows) < settings.SUMMARY_MAX_FOLD_TURNS * 2:
+                        return  # Caught up
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._errors.inc()
+            logger.error(f"Error summarizing chat {chat_guid}: {e}", exc_info=True)
+
+    async def _summarize(self, summary: Optional[str], rows: Sequence) -> str:
+        from app.services.agent.llm.base import LLMMessage
+        from app.services.agent.llm.groq_client import GroqClient
+
+        if self._llm is None:
+            self._llm = GroqClient(model=settings.SUMMARY_MODEL)
+
+        lines: List[str] = [f"{'User' if role == 'user' else 'Assistant'}: {content}" for role, content, _ in rows]
+        messages = [
+            LLMMessage(role="system", content=SUMMARY_PROMPT.format(max_words=settings.SUMMARY_MAX_TOKENS * 3 // 4)),
+            LLMMessage(
+                role="user",
+                content=f"Current summary:\n{summary or '(none yet)'}\n\nNew messages:\n" + "\n".join(lines)
+            ),
+        ]
+        result = await self._llm.chat(messages, temperature=0.2, max_tokens=settings.SUMMARY_MAX_TOKENS)
+        if not isinstance(result, str) or not result.strip():
+            raise ValueError(f"Unexpected summarizer response: {result!r}")
+        return result.strip()
+
+
+# Global summarizer instance
+conversation_summarizer = ConversationSummarizer(
+    max_chats=settings.SUMMARY_CACHE_MAX_CHATS,
+    ttl_seconds=settings.SUMMARY_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,133 @@
+"""
+Per-user in-memory vector indexes
+
+Semantic recall searches one user's text_embeddings at a time. Each user's
+vectors are loaded once into a contiguous float32 matrix (newest
+EMBEDDING_INDEX_MAX_VECTORS), and a query is one matrix-vector product plus
+a partial sort: brute force, but a few thousand 384-dim rows take well
+under a millisecond.
+- EmbeddingService loads a user's index on their first search and appends
+  newly stored vectors to loaded indexes (write-through)
+- indexes are evicted LRU beyond EMBEDDING_INDEX_MAX_USERS and expire after
+  EMBEDDING_INDEX_TTL_SECONDS, which bounds staleness when another process
+  stored vectors for the same user
+
+Not thread-safe; event loop only.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.cache import TTLCache
+
+
+@dataclass(slots=True, frozen=True)
+class IndexedText:
+    """What a vector in the index stands for"""
+    source: str
+    source_id: str
+    chat_guid: Optional[str]
+    content: str
+    created_at: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class SearchHit:
+    entry: IndexedText
+    score: float  # Cosine similarity
+
+
+class VectorIndex:
+    """Growable float32 matrix of unit vectors and their entries"""
+
+    def __init__(self, capacity: int = 64):
+        self._capacity = max(1, capacity)
+        self._vectors: Optional[np.ndarray] = None  # Allocated on the first add (dimensions come from the model)
+        self._entries: List[IndexedText] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, vectors: np.ndarray, entries: Sequence[IndexedText]):
+        """Append rows (amortized: the matrix doubles when full)"""
+        if not len(entries):
+            return
+        if self._vectors is None:
+            self._vectors = np.zeros((max(self._capacity, len(entries)), vectors.shape[1]), dtype=np.float32)
+        size, needed = len(self._entries), len(self._entries) + len(entries)
+        if needed > len(self._vectors):
+            grown = np.zeros((max(needed, len(self._vectors) * 2), self._vectors.shape[1]), dtype=np.float32)
+            grown[:size] = self._vectors[:size]
+            self._vectors = grown
+        self._vectors[size:needed] = vectors
+        self._entries.extend(entries)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        predicate: Optional[Callable[[IndexedText], bool]] = None
+    ) -> List[SearchHit]:
+        """Top k entries by cosine similarity, optionally filtered by predicate"""
+        size = len(self._entries)
+        if not size or k <= 0:
+            return []
+        scores = self._vectors[:size] @ query
+        # Partial sort of a few extra candidates so the filter rarely needs a full sort
+        candidates = min(size, k * 4) if predicate else min(size, k)
+        while True:
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            top = top[np.argsort(-scores[top])]
+            hits = [
+                SearchHit(entry=self._entries[i], score=float(scores[i]))
+                for i in top
+                if predicate is None or predicate(self._entries[i])
+            ][:k]
+            if len(hits) == k or candidates == size:
+                return hits
+            candidates = size
+
+
+class VectorIndexCache:
+    """Bounded LRU of loaded per-user indexes"""
+
+    def __init__(self, max_users: int, ttl_seconds: float):
+        self._indexes: TTLCache[VectorIndex] = TTLCache(max_entries=max_users, ttl=ttl_seconds)
+        self._hits = metrics.counter("vector_index.hits")
+        self._misses = metrics.counter("vector_index.misses")
+
+    def get(self, user_id: UUID, model: str) -> Optional[VectorIndex]:
+        index = self._indexes.get((user_id, model))
+        if index is None:
+            self._misses.inc()
+        else:
+            self._hits.inc()
+        return index
+
+    def load(self, user_id: UUID, model: str, vectors: np.ndarray, entries: Sequence[IndexedText]) -> VectorIndex:
+        """Cache a user's index built from all their stored vectors"""
+        index = VectorIndex(capacity=len(entries) + 64)
+        index.add(vectors, entries)
+        self._indexes.set((user_id, model), index)
+        return index
+
+    def append(self, user_id: UUID, model: str, vectors: np.ndarray, entries: Sequence[IndexedText]):
+        """Add newly stored vectors to the user's index, if it is loaded"""
+        index = self._indexes.get((user_id, model))
+        if index is not None:
+            index.add(vectors, entries)
+
+    def clear(self):
+        self._indexes.clear()
+
+
+# Global vector index cache instance
+vector_indexes = VectorIndexCache(
+    max_users=settings.EMBEDDING_INDEX_MAX_USERS,
+    ttl_seconds=settings.EMBEDDING_INDEX_TTL_SECONDS
+)
@@ -1,7 +1,7 @@
 """
 Google Calendar integration service
 """
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from datetime import datetime
 import uuid
 import logging
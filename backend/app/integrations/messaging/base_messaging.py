@@ -2,6 +2,7 @@
 Base messaging interface
 """
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, fields
 from typing import Optional, List, Dict, Any
 from app.integrations.base import BaseIntegration
 
@@ -23,6 +24,42 @@ class Message:
         self.metadata = metadata or {}
 
 
+@dataclass(slots=True)
+class InboundMessage:
+    """Inbound message parsed from a webhook
+    
+    Holds only the fields the processing pipeline uses. The original payload is
+    kept in `raw` only when explicitly requested (for debugging).
+    """
+    source: str
+    sender: str = ""
+    content: str = ""
+    chat_guid: str = ""
+    message_guid: str = ""
+    event_type: Optional[str] = None
+    is_from_me: bool = False
+    fragments: Optional[List["InboundMessage"]] = None  # Original messages of a coalesced turn
+    durable: bool = False  # Already persisted upstream (jobs table), so not saved again on shutdown
+    degraded: bool = False  # Admitted to the degraded tier under load (its own pending-turn budget)
+    raw: Optional[Dict[str, Any]] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe dict for persisting the message (raw payload excluded)"""
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name not in ("fragments", "raw")}
+        data["fragments"] = [m.to_dict() for m in self.fragments] if self.fragments else None
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "InboundMessage":
+        """Rebuild a message saved with to_dict()"""
+        names = {f.name for f in fields(cls)}
+        values = {k: v for k, v in data.items() if k in names and k != "fragments"}
+        fragments = data.get("fragments")
+        if fragments:
+            values["fragments"] = [cls.from_dict(m) for m in fragments]
+        return cls(**values)
+
+
 class BaseMessagingIntegration(BaseIntegration, ABC):
     """Base class for messaging integrations"""
     
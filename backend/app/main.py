@@ -1,20 +1,35 @@
 """
 FastAPI application entry point
 """
+import asyncio
 import logging
-from fastapi import FastAPI
+import time
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.core.message_processor import message_processor
+from app.core.dependencies import require_metrics_token
+from app.core.events import event_bus
+from app.core.message_processor import message_processor, MessageProcessor, MESSAGE_REPLAY_JOB_KIND
+from app.core.jobs import job_queue
+from app.core.partitions import run_partition_maintenance
+from app.core.summarizer import conversation_summarizer
+from app.core.metrics import metrics
 
 from app.api.v1.router import api_router
+from app.api.v1.webhooks.bluebubbles import (
+    ingestion_queue,
+    degraded_queue,
+    persist_webhooks_for_replay,
+    WEBHOOK_JOB_KIND,
+)
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Blume API",
@@ -29,12 +44,78 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination on GET /tasks
 )
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
     await message_processor.initialize()
+    await ingestion_queue.start()
+    await degraded_queue.start()
+    if settings.JOBS_ENABLED:
+        await job_queue.start()
+    else:
+        # Keep a reference so the task isn't garbage collected
+        app.state.replay_task = asyncio.create_task(replay_saved_work())
+    if settings.TASKS_PARTITION_MAINTENANCE_SECONDS > 0:
+        app.state.partition_task = asyncio.create_task(run_partition_maintenance())
+
+async def replay_saved_work():
+    """Replay webhooks and turns saved by the previous shutdown (job workers disabled)"""
+    try:
+        await job_queue.run_pending([WEBHOOK_JOB_KIND, MESSAGE_REPLAY_JOB_KIND])
+    except Exception as e:
+        logger.error(f"Error replaying saved work: {e}", exc_info=True)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain in-flight turns, save unfinished work for replay, close resources
+    
+    1. Stop accepting webhooks (503) and stop claiming jobs
+    2. Wait up to SHUTDOWN_GRACE_SECONDS for queued and running turns
+    3. Cancel whatever is left and save it to the jobs table
+    4. Close the LLM client and the database pool
+    """
+    from app.core.database import async_engine, engine
+    
+    partition_task = getattr(app.state, "partition_task", None)
+    if partition_task:
+        partition_task.cancel()
+    
+    deadline = time.monotonic() + settings.SHUTDOWN_GRACE_SECONDS
+    
+    def remaining() -> float:
+        return max(0.0, deadline - time.monotonic())
+    
+    ingestion_queue.close()
+    degraded_queue.close()
+    message_processor.flush_pending()
+    
+    await asyncio.gather(
+        ingestion_queue.drain(remaining()),
+        degraded_queue.drain(remaining()),
+        job_queue.stop(timeout=remaining())
+    )
+    await message_processor.drain(remaining())
+    await event_bus.drain(remaining())
+    await conversation_summarizer.drain(remaining())
+    
+    payloads = await ingestion_queue.stop() + await degraded_queue.stop()
+    messages = await message_processor.stop()
+    if payloads or messages:
+        saved_payloads = await asyncio.to_thread(persist_webhooks_for_replay, payloads)
+        saved_messages = await asyncio.to_thread(MessageProcessor.persist_for_replay, messages)
+        logger.warning(
+            f"Shutdown deadline reached: saved {saved_payloads} queued webhooks and "
+            f"{saved_messages} unfinished turns for replay"
+        )
+    else:
+        logger.info("All in-flight work finished before shutdown")
+    
+    await conversation_summarizer.stop()
+    engine.dispose()
+    await async_engine.dispose()
 
 @app.get("/")
 async def root():
@@ -59,6 +140,11 @@ async def health():
         "database": db_status
     }
 
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+async def get_metrics():
+    """In-process metrics (queue depths, latencies, counters); requires METRICS_TOKEN"""
+    return metrics.snapshot()
+
 # Import routers
 app.include_router(api_router, prefix="/api/v1")
 
@@ -3,6 +3,11 @@ from app.models.base import Base
 from app.models.user import User
 from app.models.task import Task
 from app.models.integration import Integration
+from app.models.processed_message import ProcessedMessage
+from app.models.job import Job
+from app.models.conversation_message import ConversationMessage
+from app.models.conversation_summary import ConversationSummary
+from app.models.text_embedding import TextEmbedding
 
-__all__ = ["Base", "User", "Task", "Integration"]
+__all__ = ["Base", "User", "Task", "Integration", "ProcessedMessage", "Job", "ConversationMessage", "ConversationSummary", "TextEmbedding"]
 
@@ -0,0 +1,33 @@
+"""
+Conversation message model
+"""
+from sqlalchemy import Column, Computed, String, Text, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred
+
+from app.models.base import Base, TimestampMixin
+from app.utils.ids import uuid7
+
+
+class ConversationMessage(Base, TimestampMixin):
+    """One chat message (user or assistant) for conversation history
+
+    History reads are a range scan on (user_id, chat_guid, created_at DESC);
+    full-text search (SearchService) uses the GIN index on (user_id, search_vector).
+    task_id points at the turn's row in tasks but is deliberately not a
+    foreign key, so tasks can be archived or repartitioned independently.
+    """
+    __tablename__ = "conversation_messages"
+    __table_args__ = (
+        Index("ix_conversation_messages_user_chat_created", "user_id", "chat_guid", text("created_at DESC")),
+        Index("ix_conversation_messages_search", "user_id", "search_vector", postgresql_using="gin"),  # Needs btree_gin
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, server_default=text("uuid_generate_v7()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    chat_guid = Column(String, nullable=True)  # None for turns that didn't come from a chat (e.g. the agent API)
+    role = Column(String, nullable=False)  # "user" or "assistant"
+    content = Column(Text, nullable=False)
+    task_id = Column(UUID(as_uuid=True), nullable=True)  # Turn row in tasks
+    # Maintained by Postgres on write; deferred so entity loads don't fetch it
+    search_vector = deferred(Column(TSVECTOR, Computed("to_tsvector('english', content)", persisted=True)))
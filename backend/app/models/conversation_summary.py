@@ -0,0 +1,29 @@
+"""
+Conversation summary model
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint, func, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base, TimestampMixin
+from app.utils.ids import uuid7
+
+
+class ConversationSummary(Base, TimestampMixin):
+    """Rolling summary of a chat's older conversation_messages
+
+    Maintained off the reply path by app.core.summarizer. Every message up to
+    and including summarized_through has been folded into summary; newer
+    messages are only in conversation_messages.
+    """
+    __tablename__ = "conversation_summaries"
+    __table_args__ = (
+        UniqueConstraint("user_id", "chat_guid", name="uq_conversation_summaries_user_chat"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, server_default=text("uuid_generate_v7()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    chat_guid = Column(String, nullable=False)
+    summary = Column(Text, nullable=False)
+    summarized_through = Column(DateTime, nullable=False)  # created_at of the newest folded message
+    message_count = Column(Integer, nullable=False, default=0)  # Messages folded in so far
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,14 +1,14 @@
 """
 Integration model
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
-import uuid
 import enum
 
 from app.models.base import Base, TimestampMixin
+from app.utils.ids import uuid7
 
 
 class IntegrationProvider(str, enum.Enum):
@@ -24,7 +24,7 @@ class IntegrationProvider(str, enum.Enum):
 class Integration(Base, TimestampMixin):
     __tablename__ = "integrations"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, server_default=text("uuid_generate_v7()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     provider = Column(String, nullable=False)  # IntegrationProvider enum value as string
     status = Column(String, nullable=False, default="disconnected")  # connected, disconnected, error
@@ -0,0 +1,37 @@
+"""
+Background job model
+"""
+from sqlalchemy import Column, String, Text, Integer, DateTime, LargeBinary, Index, Enum as SQLEnum, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+import uuid
+import enum
+
+from app.models.base import Base, TimestampMixin
+
+
+class JobStatus(str, enum.Enum):
+    """Job status"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job(Base, TimestampMixin):
+    """Durable unit of work claimed by workers with FOR UPDATE SKIP LOCKED"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String, nullable=False)  # Handler name, e.g. "bluebubbles.webhook"
+    payload = Column(JSONB, nullable=False, default=dict)
+    data = Column(LargeBinary, nullable=True)  # Optional binary attachment (e.g. uploaded file)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_at = Column(DateTime, nullable=False, default=func.now())  # Not claimed before this time
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)  # Worker that claimed the job
+    last_error = Column(Text, nullable=True)
@@ -0,0 +1,18 @@
+"""
+Processed message model
+"""
+from sqlalchemy import Column, String
+
+from app.models.base import Base, TimestampMixin
+
+
+class ProcessedMessage(Base, TimestampMixin):
+    """Inbound message GUIDs that have already been accepted
+
+    The primary key doubles as the unique constraint used to drop
+    redelivered webhooks across processes.
+    """
+    __tablename__ = "processed_messages"
+
+    message_guid = Column(String, primary_key=True)
+    source = Column(String, nullable=False, default="bluebubbles")
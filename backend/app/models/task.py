@@ -1,13 +1,13 @@
 """
 Task model
 """
-from sqlalchemy import Column, String, Text, ForeignKey, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
-import uuid
+from sqlalchemy import Column, Computed, String, Text, ForeignKey, Index, text, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID, JSONB
+from sqlalchemy.orm import deferred, relationship
 import enum
 
 from app.models.base import Base, TimestampMixin
+from app.utils.ids import uuid7
 
 
 class TaskType(str, enum.Enum):
@@ -29,14 +29,32 @@ class TaskStatus(str, enum.Enum):
 
 class Task(Base, TimestampMixin):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Newest-first listing per user, optionally filtered by type or status
+        Index("ix_tasks_user_created", "user_id", "created_at", "id"),
+        Index("ix_tasks_user_type_created", "user_id", "type", "created_at", "id"),
+        Index("ix_tasks_user_status_created", "user_id", "status", "created_at", "id"),
+        # Finding the turn stored for an inbound message (replayed turns reuse it)
+        Index("ix_tasks_user_message_guid", "user_id", text("(tast_metadata ->> 'message_guid')")),
+        # Full-text search over input and output (SearchService); needs btree_gin
+        Index("ix_tasks_search", "user_id", "search_vector", postgresql_using="gin"),
+        # Monthly partitions, see app.core.partitions. The table's primary key is
+        # (id, created_at); ids are unique on their own, so the ORM keys on id.
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, server_default=text("uuid_generate_v7()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)  # Indexed by ix_tasks_user_created
     type = Column(SQLEnum(TaskType), nullable=False)
     input = Column(Text, nullable=False)  # What user requested
     output = Column(Text, nullable=True)  # What agent did
     status = Column(SQLEnum(TaskStatus), nullable=False, default=TaskStatus.PENDING)
     tast_metadata = Column(JSONB, nullable=True)  # Execution details, timestamps, etc.
+    # Maintained by Postgres on write; deferred so entity loads don't fetch it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', input || ' ' || coalesce(output, ''))", persisted=True)
+    ))
     
     # Relationship
     user = relationship("User", backref="tasks")
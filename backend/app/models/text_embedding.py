@@ -0,0 +1,33 @@
+"""
+Text embedding model
+"""
+from sqlalchemy import Column, ForeignKey, Index, LargeBinary, String, Text, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base, TimestampMixin
+from app.utils.ids import uuid7
+
+
+class TextEmbedding(Base, TimestampMixin):
+    """Embedding of a piece of user-visible text, for semantic recall
+
+    source is "conversation" (one answered turn), "email" or "document";
+    source_id is the turn's task id, the Gmail message id or the Google Docs
+    id, or "sha256:<hex>" of the content for text without one (never NULL,
+    so the unique constraint always applies). vector holds float32 bytes (L2-normalized) from the embedder named
+    in model; searches only compare vectors of the same model.
+    """
+    __tablename__ = "text_embeddings"
+    __table_args__ = (
+        UniqueConstraint("user_id", "model", "source", "source_id", name="uq_text_embeddings_user_model_source"),
+        Index("ix_text_embeddings_user_model_created", "user_id", "model", text("created_at DESC")),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, server_default=text("uuid_generate_v7()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    source = Column(String, nullable=False)
+    source_id = Column(String, nullable=False)
+    chat_guid = Column(String, nullable=True)
+    content = Column(Text, nullable=False)  # The embedded text (capped at EMBEDDING_MAX_CHARS)
+    model = Column(String, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
@@ -15,6 +15,7 @@ class User(Base, TimestampMixin):
     email = Column(String, unique=True, nullable=False, index=True)
     password_hash = Column(String, nullable=False)
     phone_number = Column(String, nullable=True)
+    phone_e164 = Column(String, nullable=True, unique=True, index=True)  # Canonical form of phone_number, used for lookups
     agent_name = Column(String, nullable=True)
     timezone = Column(String, nullable=True, default='America/Los_Angeles')  # IANA timezone string
 
@@ -0,0 +1,33 @@
+"""
+Search schemas
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+from app.models.task import TaskType, TaskStatus
+
+
+class SearchResultBase(BaseModel):
+    rank: float
+    highlight: str  # HTML-escaped fragments with matches wrapped in <mark></mark>
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class MessageSearchResult(SearchResultBase):
+    id: UUID
+    chat_guid: Optional[str]
+    role: str
+    content: str
+    task_id: Optional[UUID]
+
+
+class TaskSearchResult(SearchResultBase):
+    id: UUID
+    type: TaskType
+    status: TaskStatus
+    input: str
+    output: Optional[str]
@@ -1,17 +1,19 @@
 """
 Agent orchestrator service
 """
-from typing import Dict, Any, List, Optional
-from app.services.agent.handlers.base_handler import BaseHandler
+from dataclasses import replace
+from typing import List, Optional
+from app.services.agent.handlers.base_handler import BaseHandler, TaskData, TaskResult
 from app.services.agent.handlers.scheduling_handler import SchedulingHandler
 from app.services.agent.handlers.research_handler import ResearchHandler
 from app.services.agent.handlers.document_handler import DocumentHandler
 from app.services.agent.handlers.workflow_handler import WorkflowHandler
 from app.services.agent.handlers.communication_handler import CommunicationHandler
 from app.services.agent.handlers.email_handler import EmailHandler
+from app.services.agent.handlers.history_search_handler import HistorySearchHandler
 from app.services.agent.llm.base import BaseLLM
 from app.services.agent.llm.groq_client import GroqClient
-from app.core.events import event_bus, EventType
+from app.core.events import event_bus, EventType, EmitMode
 from app.integrations.messaging.bluebubbles.service import BlueBubblesService
 from app.integrations.voice.vapi.service import VapiService
 
@@ -36,7 +38,8 @@ class AgentService:
         )
         
         self._handlers: List[BaseHandler] = [
-            SchedulingHandler(),  # Scheduling handler FIRST - most specific for calendar/meeting tasks
+            HistorySearchHandler(),  # Questions about past conversations ("what did I tell you about my appointment?")
+            SchedulingHandler(),  # Scheduling handler - most specific for calendar/meeting tasks
             communication_handler,  # Communication handler after scheduling
             EmailHandler(),  # Email handler for Gmail
             ResearchHandler(),
@@ -48,14 +51,14 @@ class AgentService:
         """Register a new handler"""
         self._handlers.append(handler)
     
-    def _find_handler(self, task_data: Dict[str, Any]) -> Optional[BaseHandler]:
+    def _find_handler(self, task_data: TaskData) -> Optional[BaseHandler]:
         """Find appropriate handler for task"""
         for handler in self._handlers:
             if handler.can_handle(task_data):
                 return handler
         return None
     
-    async def process_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_task(self, task_data: TaskData) -> TaskResult:
         """Process a task"""
         # Find appropriate handler
         handler = self._find_handler(task_data)
@@ -66,75 +69,65 @@ class AgentService:
         # Process with handler
         result = await handler.handle(task_data)
         
-        # Emit event
+        # Emit event (subscribers run off the reply path, after the turn's
+        # session is closed, so they open their own)
         await event_bus.emit(EventType.TASK_COMPLETED, {
-            "task_data": task_data,
+            "task_data": replace(task_data, db=None),
             "result": result
-        })
+        }, mode=EmitMode.FIRE_AND_FORGET)
         
         return result
     
-    async def _process_with_llm(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _process_with_llm(self, task_data: TaskData) -> TaskResult:
         """Process task with LLM when no specific handler"""
-        from app.services.agent.llm.base import LLMMessage
-        from app.services.conversation_service import ConversationService
-        from app.core.database import SessionLocal
+        from app.services.agent.context import build_context
+        from app.services.conversation_service import ConversationContext, ConversationService
+        from app.core.database import release_connection, session_scope
         from uuid import UUID
         
+        user_id = UUID(task_data.user_id)
+        chat_guid = task_data.metadata.get("chat_guid")
+        agent_name = task_data.metadata.get("agent_name", "Blume")
+        
         # Get conversation history
-        db = SessionLocal()
         try:
-            user_id = UUID(task_data.get("user_id"))
-            chat_guid = task_data.get("metadata", {}).get("chat_guid")
-            agent_name = task_data.get("metadata", {}).get("agent_name", "Blume")
-            
-            # Retrieve recent conversation history (last 10 message pairs)
-            history = ConversationService.get_recent_history(
-                db=db,
-                user_id=user_id,
-                limit=10,
-                chat_guid=chat_guid
-            )
+            async with session_scope(task_data.db) as db:
+                # Retrieve recent history, the chat summary and related older items
+                context = await ConversationService.get_context_async(
+                    db=db,
+                    user_id=user_id,
+                    chat_guid=chat_guid,
+                    query=task_data.input
+                )
+                # Release the connection while waiting on the LLM
+                await release_connection(db)
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Error retrieving conversation history: {e}", exc_info=True)
-            history = []
-        finally:
-            db.close()
-        
-        # Build messages with system prompt, history, and current message
-        messages = [
-            LLMMessage(
-                role="system",
-                content=f"You are {agent_name}, a helpful personal assistant. Respond helpfully and concisely. You have access to conversation history to maintain context."
-            )
-        ]
+            context = ConversationContext()
         
-        # Add conversation history (excluding the current message which we'll add next)
-        for msg in history:
-            messages.append(LLMMessage(
-                role=msg["role"],
-                content=msg["content"]
-            ))
-        
-        # Add current user message
-        messages.append(LLMMessage(
-                role="user",
-                content=task_data.get("input", "")
-        ))
+        # System prompt, then as much recent history as fits the token budget, then the current message
+        messages = build_context(
+            system_prompt=f"You are {agent_name}, a helpful personal assistant. Respond helpfully and concisely. You have access to conversation history to maintain context.",
+            history=context.history,
+            summary=context.summary,
+            recalled=context.recalled,
+            user_input=task_data.input,
+            name="general"
+        )
         
         try:
             response = await self.llm.chat(messages)
-            return {
-                "status": "completed",
-                "output": response,
-                "metadata": {"handler": "llm_default"}
-            }
+            return TaskResult(
+                status="completed",
+                output=response,
+                metadata={"handler": "llm_default"}
+            )
         except Exception as e:
-            return {
-                "status": "failed",
-                "output": f"Error processing task: {str(e)}",
-                "metadata": {"error": str(e)}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Error processing task: {str(e)}",
+                metadata={"error": str(e)}
+            )
 
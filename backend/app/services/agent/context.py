@@ -0,0 +1,132 @@
+"""
+Token-budgeted LLM context
+
+Every handler sends "system prompt + recent history + current input", with
+the chat's rolling summary (app.core.summarizer) and semantically recalled
+older items (app.services.embedding_service) appended to the system prompt.
+A single history entry can be a pasted document or a long email, so history
+is added newest first until the handler's token budget is used up:
+- past messages longer than LLM_CONTEXT_MAX_MESSAGE_TOKENS are truncated
+- older messages that no longer fit are elided (with a note in the system prompt)
+
+Token counts are estimates, not the Llama tokenizers Groq serves: ~4
+characters per token, which is what runs unless tiktoken happens to be
+installed (it isn't in requirements.txt); then its cl100k_base encoding is
+used, which is closer but still an approximation. Budgets should leave
+headroom below the model's context window. Estimated prompt sizes are
+recorded per handler in the llm.prompt_tokens_estimated histogram.
+"""
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.agent.llm.base import FunctionDefinition, LLMMessage
+
+logger = logging.getLogger(__name__)
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = " … [truncated]"
+
+
+@lru_cache(maxsize=1)
+def _encoder() -> Optional[Any]:
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # Not installed, or the encoding can't be downloaded
+        logger.info(f"tiktoken unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Estimated number of tokens in text"""
+    if not text:
+        return 0
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens (including the truncation marker)"""
+    keep = max(0, max_tokens - count_tokens(TRUNCATION_MARKER))
+    encoder = _encoder()
+    if encoder is not None:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:keep]) + TRUNCATION_MARKER
+    return text[:keep * 4] + TRUNCATION_MARKER
+
+
+def build_context(
+    system_prompt: str,
+    history: List[Dict[str, Any]],
+    user_input: str,
+    name: str,
+    budget: Optional[int] = None,
+    functions: Optional[List[FunctionDefinition]] = None,
+    summary: Optional[str] = None,
+    recalled: Optional[List[str]] = None
+) -> List[LLMMessage]:
+    """Build [system, ...history that fits, user] for an LLM call
+
+    Args:
+        system_prompt: System message (always included)
+        history: Chronological [{"role", "content"}] from ConversationService
+        user_input: Current message (always included, never truncated)
+        name: Handler name, used as the metric label
+        budget: Estimated prompt token budget (default LLM_CONTEXT_TOKEN_BUDGET)
+        functions: Function definitions sent with the call; they count against the budget
+        summary: Rolling summary of the conversation before history (always included)
+        recalled: Older turns, emails or documents related to the input (truncated like history)
+    """
+    budget = budget or settings.LLM_CONTEXT_TOKEN_BUDGET
+    max_message_tokens = settings.LLM_CONTEXT_MAX_MESSAGE_TOKENS
+    if summary:
+        system_prompt += f"\n\nSummary of the earlier conversation:\n{summary}"
+    if recalled:
+        items = "\n".join(
+            f"- {truncate_to_tokens(item, max_message_tokens) if count_tokens(item) > max_message_tokens else item}"
+            for item in recalled
+        )
+        system_prompt += f"\n\nPossibly relevant older items:\n{items}"
+
+    fixed = count_tokens(system_prompt) + count_tokens(user_input) + 2 * MESSAGE_OVERHEAD_TOKENS
+    if functions:
+        fixed += count_tokens(json.dumps([function.to_dict() for function in functions]))
+    remaining = budget - fixed
+
+    kept: List[LLMMessage] = []
+    truncated = 0
+    for message in reversed(history):  # Newest first
+        content = message["content"] or ""
+        tokens = count_tokens(content)
+        if tokens > max_message_tokens:
+            content = truncate_to_tokens(content, max_message_tokens)
+            tokens = count_tokens(content)
+            truncated += 1
+        if tokens + MESSAGE_OVERHEAD_TOKENS > remaining:
+            break
+        remaining -= tokens + MESSAGE_OVERHEAD_TOKENS
+        kept.append(LLMMessage(role=message["role"], content=content))
+    elided = len(history) - len(kept)
+
+    if elided:
+        system_prompt += f" ({elided} earlier messages of this conversation are omitted.)"
+    messages = [LLMMessage(role="system", content=system_prompt), *reversed(kept), LLMMessage(role="user", content=user_input)]
+
+    prompt_tokens = budget - remaining
+    labels = {"handler": name}
+    metrics.histogram("llm.prompt_tokens_estimated", labels).observe(prompt_tokens)
+    if truncated:
+        metrics.counter("llm.context.truncated_messages", labels).inc(truncated)
+    if elided:
+        metrics.counter("llm.context.elided_messages", labels).inc(elided)
+    logger.debug(
+        f"[{name}] context: ~{prompt_tokens} prompt tokens, {len(kept)}/{len(history)} history messages "
+        f"({truncated} truncated, {elided} elided)"
+    )
+    return messages
@@ -2,12 +2,37 @@
 Base handler interface for agent task handlers
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Any, Optional
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass(slots=True)
+class TaskData:
+    """Input for one agent task"""
+    input: str
+    type: str = "text"
+    user_id: Optional[str] = None
+    task_id: Optional[str] = None  # Conversation row to update with the response
+    metadata: Dict[str, Any] = field(default_factory=dict)  # source, sender, chat_guid, agent_name, ...
+    db: Optional["AsyncSession"] = None  # Turn-scoped session; handlers use it via session_scope()
+
+
+@dataclass(slots=True)
+class TaskResult:
+    """Result returned by a handler"""
+    status: str  # completed, failed, pending_confirmation
+    output: Any = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
 
 class BaseHandler(ABC):
     """Base class for all agent task handlers"""
     
+    context_token_budget: Optional[int] = None  # Prompt token budget (default LLM_CONTEXT_TOKEN_BUDGET)
+    
     @property
     @abstractmethod
     def task_type(self) -> str:
@@ -15,7 +40,7 @@ class BaseHandler(ABC):
         pass
     
     @abstractmethod
-    async def handle(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle(self, task_data: TaskData) -> TaskResult:
         """
         Handle a task
         
@@ -28,7 +53,6 @@ class BaseHandler(ABC):
         pass
     
     @abstractmethod
-    def can_handle(self, task_data: Dict[str, Any]) -> bool:
+    def can_handle(self, task_data: TaskData) -> bool:
         """Check if this handler can handle the given task"""
         pass
-
@@ -2,8 +2,9 @@
 Communication handler for messaging and calling tasks
 """
 from typing import Dict, Any
-from app.services.agent.handlers.base_handler import BaseHandler
-from app.services.agent.llm.base import LLMMessage, FunctionDefinition
+from app.services.agent.handlers.base_handler import BaseHandler, TaskData, TaskResult
+from app.services.agent.llm.base import FunctionDefinition
+from app.services.agent.context import build_context
 from app.integrations.messaging.bluebubbles.service import BlueBubblesService
 from app.integrations.messaging.base_messaging import Message
 from app.integrations.voice.vapi.service import VapiService
@@ -25,47 +26,47 @@ class CommunicationHandler(BaseHandler):
     def task_type(self) -> str:
         return "communication"
     
-    def can_handle(self, task_data: Dict[str, Any]) -> bool:
+    def can_handle(self, task_data: TaskData) -> bool:
         """Check if this handler can handle the task"""
-        task_input = task_data.get("input", "").lower()
+        task_input = task_data.input.lower()
         communication_keywords = [
             "message", "text", "sms", "send", "call", "phone", "voice",
             "contact", "reach out", "get in touch", "call me", "text me"
         ]
         return any(keyword in task_input for keyword in communication_keywords)
     
-    async def handle(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle(self, task_data: TaskData) -> TaskResult:
         """Handle a communication task"""
         from app.services.agent.llm.groq_client import GroqClient
-        from app.services.conversation_service import ConversationService
-        from app.core.database import SessionLocal
+        from app.services.conversation_service import ConversationContext, ConversationService
+        from app.core.database import release_connection, session_scope
         from uuid import UUID
         
         llm = GroqClient()
-        input_text = task_data.get("input", "")
+        input_text = task_data.input
         
         # Get conversation history
-        db = SessionLocal()
         try:
-            user_id = UUID(task_data.get("user_id"))
-            chat_guid = task_data.get("metadata", {}).get("chat_guid")
-            agent_name = task_data.get("metadata", {}).get("agent_name", "Blume")
-            
-            # Retrieve recent conversation history (last 10 message pairs)
-            history = ConversationService.get_recent_history(
-                db=db,
-                user_id=user_id,
-                limit=10,
-                chat_guid=chat_guid
-            )
+            async with session_scope(task_data.db) as db:
+                user_id = UUID(task_data.user_id)
+                chat_guid = task_data.metadata.get("chat_guid")
+                agent_name = task_data.metadata.get("agent_name", "Blume")
+                
+                # Retrieve recent history, the chat summary and related older items
+                context = await ConversationService.get_context_async(
+                    db=db,
+                    user_id=user_id,
+                    chat_guid=chat_guid,
+                    query=task_data.input
+                )
+                # Release the connection while waiting on the LLM
+                await release_connection(db)
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Error retrieving conversation history: {e}", exc_info=True)
-            history = []
+            context = ConversationContext()
             agent_name = "Blume"
-        finally:
-            db.close()
         
         # Define functions for LLM to call
         functions = [
@@ -90,26 +91,17 @@ class CommunicationHandler(BaseHandler):
             )
         ]
         
-        # Build messages with system prompt, history, and current message
-        messages = [
-            LLMMessage(
-                role="system",
-                content=f"You are {agent_name}, a helpful personal assistant. When the user wants to send a message or make a call, use the appropriate function. Determine the recipient and content from the user's request. You have access to conversation history to maintain context."
-            )
-        ]
-        
-        # Add conversation history (excluding the current message which we'll add next)
-        for msg in history:
-            messages.append(LLMMessage(
-                role=msg["role"],
-                content=msg["content"]
-            ))
-        
-        # Add current user message
-        messages.append(LLMMessage(
-                role="user",
-                content=input_text
-        ))
+        # System prompt, then as much recent history as fits the token budget, then the current message
+        messages = build_context(
+            system_prompt=f"You are {agent_name}, a helpful personal assistant. When the user wants to send a message or make a call, use the appropriate function. Determine the recipient and content from the user's request. You have access to conversation history to maintain context.",
+            history=context.history,
+            summary=context.summary,
+            recalled=context.recalled,
+            user_input=input_text,
+            name="communication",
+            budget=self.context_token_budget,
+            functions=functions
+        )
         
         try:
             # Call LLM with function definitions
@@ -124,26 +116,26 @@ class CommunicationHandler(BaseHandler):
                 if function_name == "execute_communication_action":
                     return await self._handle_communication_action(arguments)
                 else:
-                    return {
-                        "status": "failed",
-                        "output": f"Unknown function: {function_name}",
-                        "metadata": {"handler": "communication_handler"}
-                    }
+                    return TaskResult(
+                        status="failed",
+                        output=f"Unknown function: {function_name}",
+                        metadata={"handler": "communication_handler"}
+                    )
             else:
                 # LLM responded with text (no function call)
-                return {
-                    "status": "completed",
-                    "output": result,
-                    "metadata": {"handler": "communication_handler", "action": "text_response"}
-                }
+                return TaskResult(
+                    status="completed",
+                    output=result,
+                    metadata={"handler": "communication_handler", "action": "text_response"}
+                )
         except Exception as e:
-            return {
-                "status": "failed",
-                "output": f"Error processing communication task: {str(e)}",
-                "metadata": {"error": str(e), "handler": "communication_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Error processing communication task: {str(e)}",
+                metadata={"error": str(e), "handler": "communication_handler"}
+            )
     
-    async def _handle_communication_action(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_communication_action(self, arguments: Dict[str, Any]) -> TaskResult:
         """Handle execute_communication_action function call"""
         action = arguments.get("action")
         params = arguments.get("parameters", {})
@@ -153,24 +145,24 @@ class CommunicationHandler(BaseHandler):
         elif action == "call":
             return await self._handle_make_call(params)
         else:
-            return {
-                "status": "failed",
-                "output": f"Unknown communication action: {action}. Valid actions are: send, call",
-                "metadata": {"handler": "communication_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Unknown communication action: {action}. Valid actions are: send, call",
+                metadata={"handler": "communication_handler"}
+            )
     
-    async def _handle_send_message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_send_message(self, params: Dict[str, Any]) -> TaskResult:
         """Handle send message action"""
         try:
             recipient = params.get("recipient")
             content = params.get("content")
             
             if not recipient or not content:
-                return {
-                    "status": "failed",
-                    "output": "Missing recipient or content for message",
-                    "metadata": {"handler": "communication_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output="Missing recipient or content for message",
+                    metadata={"handler": "communication_handler"}
+                )
             
             message = Message(
                 content=content,
@@ -180,58 +172,58 @@ class CommunicationHandler(BaseHandler):
             success = await self.bluebubbles.send_message(message)
             
             if success:
-                return {
-                    "status": "completed",
-                    "output": f"Message sent to {recipient}: {content}",
-                    "metadata": {
+                return TaskResult(
+                    status="completed",
+                    output=f"Message sent to {recipient}: {content}",
+                    metadata={
                         "handler": "communication_handler",
                         "action": "send",
                         "recipient": recipient
                     }
-                }
+                )
             else:
-                return {
-                    "status": "failed",
-                    "output": f"Failed to send message to {recipient}",
-                    "metadata": {"handler": "communication_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output=f"Failed to send message to {recipient}",
+                    metadata={"handler": "communication_handler"}
+                )
         except Exception as e:
-            return {
-                "status": "failed",
-                "output": f"Error sending message: {str(e)}",
-                "metadata": {"error": str(e), "handler": "communication_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Error sending message: {str(e)}",
+                metadata={"error": str(e), "handler": "communication_handler"}
+            )
     
-    async def _handle_make_call(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_make_call(self, params: Dict[str, Any]) -> TaskResult:
         """Handle make call action"""
         try:
             recipient = params.get("recipient")
             purpose = params.get("purpose")
             
             if not recipient:
-                return {
-                    "status": "failed",
-                    "output": "Missing recipient for call",
-                    "metadata": {"handler": "communication_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output="Missing recipient for call",
+                    metadata={"handler": "communication_handler"}
+                )
             
             call = await self.vapi.make_call(recipient, purpose)
             
-            return {
-                "status": "completed",
-                "output": f"Call initiated to {recipient}" + (f" for: {purpose}" if purpose else ""),
-                "metadata": {
+            return TaskResult(
+                status="completed",
+                output=f"Call initiated to {recipient}" + (f" for: {purpose}" if purpose else ""),
+                metadata={
                     "handler": "communication_handler",
                     "action": "call",
                     "recipient": recipient,
                     "call_id": call.call_id,
                     "status": call.status
                 }
-            }
+            )
         except Exception as e:
-            return {
-                "status": "failed",
-                "output": f"Error making call: {str(e)}",
-                "metadata": {"error": str(e), "handler": "communication_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Error making call: {str(e)}",
+                metadata={"error": str(e), "handler": "communication_handler"}
+            )
 
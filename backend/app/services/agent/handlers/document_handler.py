@@ -2,9 +2,11 @@
 Document handler for agent tasks
 """
 from typing import Dict, Any
-from app.services.agent.handlers.base_handler import BaseHandler
+from uuid import UUID
+from app.services.agent.handlers.base_handler import BaseHandler, TaskData, TaskResult
 from app.integrations.documents.google_docs.service import GoogleDocsService
 from app.integrations.documents.base_documents import Document
+from app.services.embedding_service import EmbeddingItem, EmbeddingService
 
 
 class DocumentHandler(BaseHandler):
@@ -14,9 +16,9 @@ class DocumentHandler(BaseHandler):
     def task_type(self) -> str:
         return "document"
     
-    def can_handle(self, task_data: Dict[str, Any]) -> bool:
+    def can_handle(self, task_data: TaskData) -> bool:
         """Check if this handler can handle the task"""
-        task_input = task_data.get("input", "").lower()
+        task_input = task_data.input.lower()
         document_keywords = [
             "document", "pdf", "file", "read", "analyze", 
             "summarize", "extract", "parse", "notion", "note", "notes",
@@ -24,69 +26,67 @@ class DocumentHandler(BaseHandler):
         ]
         return any(keyword in task_input for keyword in document_keywords)
     
-    async def handle(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle(self, task_data: TaskData) -> TaskResult:
         """Handle a document processing task"""
         from app.services.integration_service import IntegrationService
         from app.services.conversation_service import ConversationService
         from app.services.agent.llm.groq_client import GroqClient
-        from app.services.agent.llm.base import LLMMessage, FunctionDefinition
+        from app.services.agent.llm.base import FunctionDefinition
+        from app.services.agent.context import build_context
         from app.integrations.documents.google_docs.service import GoogleDocsService
         from app.integrations.documents.base_documents import Document
-        from app.models.integration import Integration, IntegrationProvider
-        from app.core.database import SessionLocal
-        from uuid import UUID
+        from app.models.integration import IntegrationProvider
+        from app.core.database import release_connection, session_scope
         import logging
         import json
         
         logger = logging.getLogger(__name__)
         
-        user_id = UUID(task_data.get("user_id"))
-        db = SessionLocal()
-        
-        try:
-            task_input = task_data.get("input", "").lower()
+        user_id = UUID(task_data.user_id)
+        async with session_scope(task_data.db) as db:
+            task_input = task_data.input.lower()
             
             # Check for Google Docs if task mentions Google Docs
             if "google" in task_input or "docs" in task_input or "document" in task_input:
-                if not IntegrationService.is_integration_connected(db, user_id, "google"):
-                    return {
-                        "status": "completed",
-                        "output": "You haven't set up Google Docs yet. Please connect your Google Account in Settings.",
-                        "metadata": {"handler": "document_handler", "missing_integration": "google"}
-                    }
+                if not await IntegrationService.is_integration_connected_async(db, user_id, "google"):
+                    return TaskResult(
+                        status="completed",
+                        output="You haven't set up Google Docs yet. Please connect your Google Account in Settings.",
+                        metadata={"handler": "document_handler", "missing_integration": "google"}
+                    )
                 
                 # Get Google Docs credentials
-                docs_integration = db.query(Integration).filter(
-                    Integration.user_id == user_id,
-                    Integration.provider == IntegrationProvider.GOOGLE_DOCS.value,
-                    Integration.status == "connected"
-                ).first()
+                docs_integration = await IntegrationService.get_connected_integration_async(
+                    db, user_id, IntegrationProvider.GOOGLE_DOCS.value
+                )
                 
                 if not docs_integration or not docs_integration.credentials:
-                    return {
-                        "status": "completed",
-                        "output": "Google Docs credentials not found. Please reconnect your Google Account in Settings.",
-                        "metadata": {"handler": "document_handler", "missing_integration": "google"}
-                    }
+                    return TaskResult(
+                        status="completed",
+                        output="Google Docs credentials not found. Please reconnect your Google Account in Settings.",
+                        metadata={"handler": "document_handler", "missing_integration": "google"}
+                    )
                 
                 # Initialize docs service
                 docs_service = GoogleDocsService()
                 await docs_service.connect(docs_integration.credentials)
                 
                 # Get conversation history
-                chat_guid = task_data.get("metadata", {}).get("chat_guid")
-                agent_name = task_data.get("metadata", {}).get("agent_name", "Blume")
+                chat_guid = task_data.metadata.get("chat_guid")
+                agent_name = task_data.metadata.get("agent_name", "Blume")
                 
-                history = ConversationService.get_recent_history(
+                context = await ConversationService.get_context_async(
                     db=db,
                     user_id=user_id,
-                    limit=10,
-                    chat_guid=chat_guid
+                    chat_guid=chat_guid,
+                    query=task_data.input
                 )
+                # Release the connection while waiting on the LLM
+                await release_connection(db)
                 
                 # Use LLM to parse document request
                 llm = GroqClient()
-                input_text = task_data.get("input", "")
+                input_text = task_data.input
                 
                 functions = [
                     FunctionDefinition(
@@ -110,26 +110,17 @@ class DocumentHandler(BaseHandler):
                     )
                 ]
                 
-                # Build messages
-                messages = [
-                    LLMMessage(
-                        role="system",
-                        content=f"You are {agent_name}, a helpful personal assistant. When the user wants to create, read, update, or list Google Docs, use the appropriate function. You have access to conversation history to maintain context."
-                    )
-                ]
-                
-                # Add conversation history
-                for msg in history:
-                    messages.append(LLMMessage(
-                        role=msg["role"],
-                        content=msg["content"]
-                    ))
-                
-                # Add current user message
-                messages.append(LLMMessage(
-                    role="user",
-                    content=input_text
-                ))
+                # System prompt, then as much recent history as fits the token budget, then the current message
+                messages = build_context(
+                    system_prompt=f"You are {agent_name}, a helpful personal assistant. When the user wants to create, read, update, or list Google Docs, use the appropriate function. You have access to conversation history to maintain context.",
+                    history=context.history,
+                    summary=context.summary,
+                    recalled=context.recalled,
+                    user_input=input_text,
+                    name="document",
+                    budget=self.context_token_budget,
+                    functions=functions
+                )
                 
                 try:
                     # Call LLM with function definitions
@@ -141,122 +132,126 @@ class DocumentHandler(BaseHandler):
                         arguments = json.loads(result["arguments"]) if isinstance(result["arguments"], str) else result["arguments"]
                         
                         if function_name == "execute_document_action":
-                            return await self._handle_document_action(arguments, docs_service)
+                            return await self._handle_document_action(arguments, docs_service, user_id)
                         else:
-                            return {
-                                "status": "failed",
-                                "output": f"Unknown function: {function_name}",
-                                "metadata": {"handler": "document_handler"}
-                            }
+                            return TaskResult(
+                                status="failed",
+                                output=f"Unknown function: {function_name}",
+                                metadata={"handler": "document_handler"}
+                            )
                     else:
                         # LLM responded with text
-                        return {
-                            "status": "completed",
-                            "output": result,
-                            "metadata": {"handler": "document_handler", "action": "text_response"}
-                        }
+                        return TaskResult(
+                            status="completed",
+                            output=result,
+                            metadata={"handler": "document_handler", "action": "text_response"}
+                        )
                 except Exception as e:
                     logger.error(f"Error processing document task: {e}", exc_info=True)
-                    return {
-                        "status": "failed",
-                        "output": f"Error processing document request: {str(e)}",
-                        "metadata": {"error": str(e), "handler": "document_handler"}
-                    }
+                    return TaskResult(
+                        status="failed",
+                        output=f"Error processing document request: {str(e)}",
+                        metadata={"error": str(e), "handler": "document_handler"}
+                    )
             
             # Check for Notion if task mentions Notion explicitly
             if "notion" in task_input:
                 logger.debug(f"Checking Notion integration for user {user_id}")
-                is_connected = IntegrationService.is_integration_connected(db, user_id, "notion")
+                is_connected = await IntegrationService.is_integration_connected_async(db, user_id, "notion")
                 logger.debug(f"Notion integration connected: {is_connected}")
                 if not is_connected:
-                    return {
-                        "status": "completed",
-                        "output": "You haven't set up Notion yet. Please connect Notion in Settings.",
-                        "metadata": {"handler": "document_handler", "missing_integration": "notion"}
-                    }
+                    return TaskResult(
+                        status="completed",
+                        output="You haven't set up Notion yet. Please connect Notion in Settings.",
+                        metadata={"handler": "document_handler", "missing_integration": "notion"}
+                    )
                 # Notion implementation pending
-                return {
-                    "status": "completed",
-                    "output": "Notion integration is not yet fully implemented.",
-                    "metadata": {"handler": "document_handler"}
-                }
+                return TaskResult(
+                    status="completed",
+                    output="Notion integration is not yet fully implemented.",
+                    metadata={"handler": "document_handler"}
+                )
             
             # Default response
-            return {
-                "status": "completed",
-                "output": "I can help you with Google Docs. Try saying 'create a document' or 'list my documents'.",
-                "metadata": {"handler": "document_handler"}
-            }
-        finally:
-            db.close()
+            return TaskResult(
+                status="completed",
+                output="I can help you with Google Docs. Try saying 'create a document' or 'list my documents'.",
+                metadata={"handler": "document_handler"}
+            )
     
-    async def _handle_document_action(self, arguments: Dict[str, Any], docs_service: GoogleDocsService) -> Dict[str, Any]:
+    async def _handle_document_action(self, arguments: Dict[str, Any], docs_service: GoogleDocsService, user_id: UUID) -> TaskResult:
         """Handle execute_document_action function call"""
         action = arguments.get("action")
         params = arguments.get("parameters", {})
         
         if action == "create":
-            return await self._handle_create_document(params, docs_service)
+            return await self._handle_create_document(params, docs_service, user_id)
         elif action == "get":
-            return await self._handle_get_document(params, docs_service)
+            return await self._handle_get_document(params, docs_service, user_id)
         elif action == "list":
             return await self._handle_list_documents(docs_service)
         elif action == "update":
             return await self._handle_update_document(params, docs_service)
         else:
-            return {
-                "status": "failed",
-                "output": f"Unknown document action: {action}. Valid actions are: create, get, list, update",
-                "metadata": {"handler": "document_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Unknown document action: {action}. Valid actions are: create, get, list, update",
+                metadata={"handler": "document_handler"}
+            )
     
-    async def _handle_create_document(self, params: Dict[str, Any], docs_service: GoogleDocsService) -> Dict[str, Any]:
+    async def _handle_create_document(self, params: Dict[str, Any], docs_service: GoogleDocsService, user_id: UUID) -> TaskResult:
         """Handle create document action"""
         try:
             title = params.get("title")
             content = params.get("content")
             
             if not title or not content:
-                return {
-                    "status": "failed",
-                    "output": "Missing required fields: title and content are required",
-                    "metadata": {"handler": "document_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output="Missing required fields: title and content are required",
+                    metadata={"handler": "document_handler"}
+                )
             
             document = Document(title=title, content=content)
             doc_id = await docs_service.create_document(document)
+            await EmbeddingService.capture([EmbeddingItem(
+                user_id=user_id,
+                source="document",
+                text=f"Document: {title}\n\n{content}",
+                source_id=doc_id
+            )])
             
-            return {
-                "status": "completed",
-                "output": f"Successfully created document '{title}'. Document ID: {doc_id}",
-                "metadata": {
+            return TaskResult(
+                status="completed",
+                output=f"Successfully created document '{title}'. Document ID: {doc_id}",
+                metadata={
                     "handler": "document_handler",
                     "action": "create",
                     "document_id": doc_id
                 }
-            }
+            )
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Error creating document: {e}", exc_info=True)
-            return {
-                "status": "failed",
-                "output": f"Error creating document: {str(e)}",
-                "metadata": {"error": str(e), "handler": "document_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Error creating document: {str(e)}",
+                metadata={"error": str(e), "handler": "document_handler"}
+            )
     
-    async def _handle_get_document(self, params: Dict[str, Any], docs_service: GoogleDocsService) -> Dict[str, Any]:
+    async def _handle_get_document(self, params: Dict[str, Any], docs_service: GoogleDocsService, user_id: UUID) -> TaskResult:
         """Handle get document action"""
         try:
             document_id = params.get("document_id")
             search_query = params.get("search_query")
             
             if not document_id and not search_query:
-                return {
-                    "status": "failed",
-                    "output": "Please provide either a document_id or search_query",
-                    "metadata": {"handler": "document_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output="Please provide either a document_id or search_query",
+                    metadata={"handler": "document_handler"}
+                )
             
             # If search query, list documents and find match
             if search_query and not document_id:
@@ -268,78 +263,85 @@ class DocumentHandler(BaseHandler):
                         break
                 
                 if not document_id:
-                    return {
-                        "status": "completed",
-                        "output": f"Could not find a document matching '{search_query}'",
-                        "metadata": {"handler": "document_handler"}
-                    }
+                    return TaskResult(
+                        status="completed",
+                        output=f"Could not find a document matching '{search_query}'",
+                        metadata={"handler": "document_handler"}
+                    )
             
             document = await docs_service.get_document(document_id)
+            # Remember it for semantic recall in later turns
+            await EmbeddingService.capture([EmbeddingItem(
+                user_id=user_id,
+                source="document",
+                text=f"Document: {document.title}\n\n{document.content}",
+                source_id=document_id
+            )])
             
-            return {
-                "status": "completed",
-                "output": f"Document: {document.title}\n\n{document.content[:500]}{'...' if len(document.content) > 500 else ''}",
-                "metadata": {
+            return TaskResult(
+                status="completed",
+                output=f"Document: {document.title}\n\n{document.content[:500]}{'...' if len(document.content) > 500 else ''}",
+                metadata={
                     "handler": "document_handler",
                     "action": "get",
                     "document_id": document_id
                 }
-            }
+            )
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Error getting document: {e}", exc_info=True)
-            return {
-                "status": "failed",
-                "output": f"Error getting document: {str(e)}",
-                "metadata": {"error": str(e), "handler": "document_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Error getting document: {str(e)}",
+                metadata={"error": str(e), "handler": "document_handler"}
+            )
     
-    async def _handle_list_documents(self, docs_service: GoogleDocsService) -> Dict[str, Any]:
+    async def _handle_list_documents(self, docs_service: GoogleDocsService) -> TaskResult:
         """Handle list documents action"""
         try:
             documents = await docs_service.list_documents()
             
             if not documents:
-                return {
-                    "status": "completed",
-                    "output": "You don't have any Google Docs yet.",
-                    "metadata": {"handler": "document_handler", "action": "list_documents"}
-                }
+                return TaskResult(
+                    status="completed",
+                    output="You don't have any Google Docs yet.",
+                    metadata={"handler": "document_handler", "action": "list_documents"}
+                )
             
             doc_list = "\n".join([f"- {doc.get('title', 'Untitled')} (ID: {doc.get('id', 'N/A')})" for doc in documents[:10]])
             
-            return {
-                "status": "completed",
-                "output": f"Your Google Docs:\n{doc_list}" + (f"\n... and {len(documents) - 10} more" if len(documents) > 10 else ""),
-                "metadata": {
+            return TaskResult(
+                status="completed",
+                output=f"Your Google Docs:\n{doc_list}" + (f"\n... and {len(documents) - 10} more" if len(documents) > 10 else ""),
+                metadata={
                     "handler": "document_handler",
                     "action": "list",
                     "count": len(documents)
                 }
-            }
+            )
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Error listing documents: {e}", exc_info=True)
-            return {
-                "status": "failed",
-                "output": f"Error listing documents: {str(e)}",
-                "metadata": {"error": str(e), "handler": "document_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Error listing documents: {str(e)}",
+                metadata={"error": str(e), "handler": "document_handler"}
+            )
     
-    async def _handle_update_document(self, params: Dict[str, Any], docs_service: GoogleDocsService) -> Dict[str, Any]:
+    async def _handle_update_document(self, params: Dict[str, Any], docs_service: GoogleDocsService) -> TaskResult:
         """Handle update document action"""
         try:
             document_id = params.get("document_id")
             content = params.get("content")
             
             if not document_id or not content:
-                return {
-                    "status": "failed",
-                    "output": "Missing required fields: document_id and content are required",
-            "metadata": {"handler": "document_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output="Missing required fields: document_id and content are required",
+                    metadata={"handler": "document_handler"}
+                )
             
             # Get existing document to preserve title
             existing_doc = await docs_service.get_document(document_id)
@@ -348,28 +350,28 @@ class DocumentHandler(BaseHandler):
             success = await docs_service.update_document(document_id, document)
             
             if success:
-                return {
-                    "status": "completed",
-                    "output": f"Successfully updated document '{existing_doc.title}'",
-                    "metadata": {
+                return TaskResult(
+                    status="completed",
+                    output=f"Successfully updated document '{existing_doc.title}'",
+                    metadata={
                         "handler": "document_handler",
                         "action": "update",
                         "document_id": document_id
                     }
-                }
+                )
             else:
-                return {
-                    "status": "failed",
-                    "output": "Failed to update document",
-                    "metadata": {"handler": "document_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output="Failed to update document",
+                    metadata={"handler": "document_handler"}
+                )
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Error updating document: {e}", exc_info=True)
-            return {
-                "status": "failed",
-                "output": f"Error updating document: {str(e)}",
-                "metadata": {"error": str(e), "handler": "document_handler"}
-        }
+            return TaskResult(
+                status="failed",
+                output=f"Error updating document: {str(e)}",
+                metadata={"error": str(e), "handler": "document_handler"}
+            )
 
@@ -0,0 +1,113 @@
+"""
+History search handler: answers questions about past conversations
+"""
+import logging
+import re
+from datetime import datetime
+from app.services.agent.handlers.base_handler import BaseHandler, TaskData, TaskResult
+from app.services.agent.context import build_context
+
+logger = logging.getLogger(__name__)
+
+# Only explicit questions about the conversation itself: "what did I tell you
+# about ...", "did I mention ...", "do you remember what ...". Requests that
+# merely look back at an action ("did you send the email", "when did I ask
+# you to book ...") belong to the handler for that action.
+HISTORY_QUESTION = re.compile(
+    r"\b(what|when|where|who|which) did (i|we|you) (tell|told|ask|asked|talk|write|wrote)( (you|me|us))? about\b"
+    r"|\b(what|when|where|who|which) did (i|we|you) (say|said|mention)\b"
+    r"|\bdid (i|we|you) (ever )?(tell|ask|talk)( (you|me|us))? about\b"
+    r"|\bdid (i|we|you) (ever )?(say|mention)\b"
+    r"|\bdo you remember (what|when|where|who|which|if|whether)\b"
+    r"|\bhave i (told|mentioned)\b"
+)
+
+# Words that frame the question rather than name what to look for (English
+# stop words are already dropped by the search configuration)
+FRAMING_WORDS = {
+    "tell", "told", "say", "said", "mention", "mentioned", "ask", "asked", "send", "sent",
+    "talk", "talked", "write", "wrote", "remember", "remind", "ever", "ago",
+    "last", "week", "month", "year", "yesterday", "today", "earlier", "before",
+}
+
+MAX_MATCHES = 8
+
+
+class HistorySearchHandler(BaseHandler):
+    """Handler for questions about earlier conversations (full-text search over history)"""
+    
+    @property
+    def task_type(self) -> str:
+        return "history_search"
+    
+    def can_handle(self, task_data: TaskData) -> bool:
+        """Check if this handler can handle the task"""
+        if not task_data.user_id or task_data.metadata.get("pending_update_event_id"):
+            return False  # Confirmations of pending calendar updates belong to the scheduling handler
+        return bool(HISTORY_QUESTION.search(task_data.input.lower()))
+    
+    async def handle(self, task_data: TaskData) -> TaskResult:
+        """Search the user's past messages and answer from what was found"""
+        from app.services.agent.llm.groq_client import GroqClient
+        from app.services.conversation_service import ConversationService
+        from app.services.search_service import SearchService
+        from app.core.database import release_connection, session_scope
+        from uuid import UUID
+        
+        user_id = UUID(task_data.user_id)
+        chat_guid = task_data.metadata.get("chat_guid")
+        agent_name = task_data.metadata.get("agent_name", "Blume")
+        
+        try:
+            async with session_scope(task_data.db) as db:
+                # Any chat of the user's; match any topic word, best matches first
+                matches = await SearchService.search_messages_async(
+                    db=db,
+                    user_id=user_id,
+                    query=self._topic(task_data.input),
+                    limit=MAX_MATCHES,
+                    match_any=True
+                )
+                context = await ConversationService.get_context_async(
+                    db=db,
+                    user_id=user_id,
+                    chat_guid=chat_guid
+                )
+                # Release the connection while waiting on the LLM
+                await release_connection(db)
+            
+            found = [
+                f"{match.created_at:%Y-%m-%d} {'User' if match.role == 'user' else 'Assistant'}: {match.content}"
+                for match in matches
+            ]
+            today = datetime.utcnow().strftime("%A, %B %d, %Y")
+            messages = build_context(
+                system_prompt=f"You are {agent_name}, a helpful personal assistant. The user is asking about something from your earlier conversations. Today is {today}. Answer from the conversation and the dated past messages below; mention when something was said if it helps. If none of them answer the question, say you couldn't find it rather than guessing.",
+                history=context.history,
+                summary=context.summary,
+                recalled=found,
+                user_input=task_data.input,
+                name="history_search",
+                budget=self.context_token_budget
+            )
+            
+            llm = GroqClient()
+            response = await llm.chat(messages)
+            return TaskResult(
+                status="completed",
+                output=response,
+                metadata={"handler": "history_search_handler", "matches": len(found)}
+            )
+        except Exception as e:
+            logger.error(f"Error searching conversation history: {e}", exc_info=True)
+            return TaskResult(
+                status="failed",
+                output=f"Error searching past conversations: {str(e)}",
+                metadata={"error": str(e), "handler": "history_search_handler"}
+            )
+    
+    @staticmethod
+    def _topic(question: str) -> str:
+        """What to search for: the question without its framing words"""
+        words = [word for word in re.findall(r"[\w'-]+", question) if word.lower() not in FRAMING_WORDS]
+        return " ".join(words) or question
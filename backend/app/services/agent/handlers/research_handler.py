@@ -1,8 +1,7 @@
 """
 Research handler for agent tasks
 """
-from typing import Dict, Any
-from app.services.agent.handlers.base_handler import BaseHandler
+from app.services.agent.handlers.base_handler import BaseHandler, TaskData, TaskResult
 
 
 class ResearchHandler(BaseHandler):
@@ -12,21 +11,21 @@ class ResearchHandler(BaseHandler):
     def task_type(self) -> str:
         return "research"
     
-    def can_handle(self, task_data: Dict[str, Any]) -> bool:
+    def can_handle(self, task_data: TaskData) -> bool:
         """Check if this handler can handle the task"""
-        task_input = task_data.get("input", "").lower()
+        task_input = task_data.input.lower()
         research_keywords = [
             "research", "find", "search", "look up", 
             "information about", "what is", "tell me about"
         ]
         return any(keyword in task_input for keyword in research_keywords)
     
-    async def handle(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle(self, task_data: TaskData) -> TaskResult:
         """Handle a research task"""
         # This will be implemented with LLM and web search
-        return {
-            "status": "completed",
-            "output": "Research task processed (implementation pending LLM integration)",
-            "metadata": {"handler": "research_handler"}
-        }
+        return TaskResult(
+            status="completed",
+            output="Research task processed (implementation pending LLM integration)",
+            metadata={"handler": "research_handler"}
+        )
 
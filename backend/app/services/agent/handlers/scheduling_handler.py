@@ -5,23 +5,25 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 from uuid import UUID
 from zoneinfo import ZoneInfo
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import json
 import logging
 
-from app.core.database import SessionLocal
+from app.core.config import settings
+from app.core.database import release_connection, session_scope
 from app.integrations.calendar.base_calendar import CalendarEvent
 from app.integrations.calendar.google_calendar.service import GoogleCalendarService
 from app.integrations.google.oauth import GoogleOAuth
-from app.models.integration import Integration, IntegrationProvider
+from app.models.integration import IntegrationProvider
 from app.models.task import Task, TaskStatus
-from app.services.agent.handlers.base_handler import BaseHandler
-from app.services.agent.llm.base import LLMMessage, FunctionDefinition
+from app.services.agent.handlers.base_handler import BaseHandler, TaskData, TaskResult
+from app.services.agent.llm.base import FunctionDefinition
+from app.services.agent.context import build_context
 from app.services.agent.llm.groq_client import GroqClient
 from app.services.conversation_service import ConversationService
 from app.services.integration_service import IntegrationService
 from app.services.user_service import UserService
-from sqlalchemy import desc
+from sqlalchemy import desc, select
 
 logger = logging.getLogger(__name__)
 
@@ -33,12 +35,12 @@ class SchedulingHandler(BaseHandler):
     def task_type(self) -> str:
         return "scheduling"
     
-    def can_handle(self, task_data: Dict[str, Any]) -> bool:
+    def can_handle(self, task_data: TaskData) -> bool:
         """Check if this handler can handle the task"""
-        task_input = task_data.get("input", "").lower()
+        task_input = task_data.input.lower()
         
         # Check if this is a confirmation response for a pending update
-        metadata = task_data.get("metadata", {})
+        metadata = task_data.metadata
         if metadata.get("pending_update_event_id"):
             # This is a confirmation for a pending update
             return True
@@ -52,19 +54,17 @@ class SchedulingHandler(BaseHandler):
         # This will catch both create and update requests (update requests usually mention "meeting", "meet", etc.)
         return any(keyword in task_input for keyword in scheduling_keywords)
     
-    async def handle(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle(self, task_data: TaskData) -> TaskResult:
         """Handle a scheduling task"""
-        user_id = UUID(task_data.get("user_id"))
-        db = SessionLocal()
-        
-        try:
+        user_id = UUID(task_data.user_id)
+        async with session_scope(task_data.db) as db:
             # Check if this is a confirmation response for a pending update
-            input_text = task_data.get("input", "").lower().strip()
-            metadata = task_data.get("metadata", {})
+            input_text = task_data.input.lower().strip()
+            metadata = task_data.metadata
             
             # Check conversation history for pending confirmation
-            chat_guid = task_data.get("metadata", {}).get("chat_guid")
-            history = ConversationService.get_recent_history(
+            chat_guid = task_data.metadata.get("chat_guid")
+            history = await ConversationService.get_recent_history_async(
                 db=db,
                 user_id=user_id,
                 limit=5,
@@ -82,11 +82,13 @@ class SchedulingHandler(BaseHandler):
                         break
             
             # Check recent tasks for pending confirmation
-            recent_tasks = db.query(Task).filter(
+            recent_tasks = (await db.execute(select(Task).where(
                 Task.user_id == user_id,
                 Task.status == TaskStatus.COMPLETED,
-                Task.tast_metadata.isnot(None)
-            ).order_by(desc(Task.created_at)).limit(3).all()
+                Task.tast_metadata.isnot(None),
+                ~Task.tast_metadata.has_key("coalesced_into"),  # Skip original messages of coalesced turns
+                Task.created_at >= self._recent_cutoff()  # Prunes to recent partitions
+            ).order_by(desc(Task.created_at)).limit(3))).scalars().all()
             
             for task in recent_tasks:
                 if task.tast_metadata and isinstance(task.tast_metadata, dict):
@@ -107,14 +109,12 @@ class SchedulingHandler(BaseHandler):
                         
                         if is_confirmation:
                             # User confirmed - proceed with update
-                            user = UserService.get_user_by_id(db, user_id)
+                            user = await UserService.get_user_by_id_async(db, user_id)
                             user_timezone = user.timezone if user and user.timezone else 'America/Los_Angeles'
                             
-                            calendar_integration = db.query(Integration).filter(
-                                Integration.user_id == user_id,
-                                Integration.provider == IntegrationProvider.GOOGLE_CALENDAR.value,
-                                Integration.status == "connected"
-                            ).first()
+                            calendar_integration = await IntegrationService.get_connected_integration_async(
+                                db, user_id, IntegrationProvider.GOOGLE_CALENDAR.value
+                            )
                             
                             if calendar_integration and calendar_integration.credentials:
                                 calendar_service = GoogleCalendarService()
@@ -123,49 +123,49 @@ class SchedulingHandler(BaseHandler):
                                 return await self._handle_update_event(event_id, update_params, calendar_service, user_timezone)
                         
                         elif is_rejection:
-                            return {
-                                "status": "completed",
-                                "output": "Update cancelled. No changes were made.",
-                                "metadata": {"handler": "scheduling_handler"}
-                            }
+                            return TaskResult(
+                                status="completed",
+                                output="Update cancelled. No changes were made.",
+                                metadata={"handler": "scheduling_handler"}
+                            )
                         # If neither confirmation nor rejection, continue with normal flow
             
             # Get user to access their timezone
-            user = UserService.get_user_by_id(db, user_id)
+            user = await UserService.get_user_by_id_async(db, user_id)
             user_timezone = user.timezone if user and user.timezone else 'America/Los_Angeles'
             
             # Check if Google Calendar is connected
-            if not IntegrationService.is_integration_connected(db, user_id, "google"):
-                return {
-                    "status": "completed",
-                    "output": "You haven't set up Google Calendar yet. Please connect your Google Account in Settings to use calendar features.",
-                    "metadata": {"handler": "scheduling_handler", "missing_integration": "google"}
-                }
+            if not await IntegrationService.is_integration_connected_async(db, user_id, "google"):
+                return TaskResult(
+                    status="completed",
+                    output="You haven't set up Google Calendar yet. Please connect your Google Account in Settings to use calendar features.",
+                    metadata={"handler": "scheduling_handler", "missing_integration": "google"}
+                )
             
             # Get Google Calendar credentials
-            calendar_integration = db.query(Integration).filter(
-                Integration.user_id == user_id,
-                Integration.provider == IntegrationProvider.GOOGLE_CALENDAR.value,
-                Integration.status == "connected"
-            ).first()
+            calendar_integration = await IntegrationService.get_connected_integration_async(
+                db, user_id, IntegrationProvider.GOOGLE_CALENDAR.value
+            )
             
             if not calendar_integration or not calendar_integration.credentials:
-                return {
-                    "status": "completed",
-                    "output": "Google Calendar credentials not found. Please reconnect your Google Account in Settings.",
-                    "metadata": {"handler": "scheduling_handler", "missing_integration": "google"}
-                }
+                return TaskResult(
+                    status="completed",
+                    output="Google Calendar credentials not found. Please reconnect your Google Account in Settings.",
+                    metadata={"handler": "scheduling_handler", "missing_integration": "google"}
+                )
             
             # Get conversation history
-            chat_guid = task_data.get("metadata", {}).get("chat_guid")
-            agent_name = task_data.get("metadata", {}).get("agent_name", "Blume")
+            chat_guid = task_data.metadata.get("chat_guid")
+            agent_name = task_data.metadata.get("agent_name", "Blume")
             
-            history = ConversationService.get_recent_history(
+            context = await ConversationService.get_context_async(
                 db=db,
                 user_id=user_id,
-                limit=10,
-                chat_guid=chat_guid
+                chat_guid=chat_guid,
+                query=task_data.input
             )
+            # Release the connection while waiting on the LLM
+            await release_connection(db)
             
             # Initialize calendar service
             calendar_service = GoogleCalendarService()
@@ -173,7 +173,7 @@ class SchedulingHandler(BaseHandler):
             
             # Use LLM to parse scheduling request
             llm = GroqClient()
-            input_text = task_data.get("input", "")
+            input_text = task_data.input
             
             functions = [
                 FunctionDefinition(
@@ -203,26 +203,17 @@ class SchedulingHandler(BaseHandler):
             current_date_str = current_datetime.strftime("%Y-%m-%d")
             current_datetime_str = current_datetime.strftime("%Y-%m-%d %H:%M:%S %Z")
             
-            # Build messages with system prompt, history, and current message
-            messages = [
-                LLMMessage(
-                    role="system",
-                    content=f"You are {agent_name}, a helpful personal assistant. IMPORTANT: When the user wants to schedule, create, update, change, modify, or edit a meeting/appointment/calendar event, you MUST use the execute_calendar_action function. Use action='create' for new events, action='update' for modifying existing events (when user says 'change', 'update', 'modify', 'edit'). For updates: you can provide 'search_title' to find an event by its title (e.g., if user says 'change the meeting called Google Meet', use search_title='Google Meet'). If neither event_id nor search_title is provided, the system will use the most recent event. Extract the title, start time, end time (or calculate 1 hour duration if not specified), location, and attendees from the user's request. Use ISO 8601 format for dates in {user_timezone} timezone. Example: 2024-12-30T21:00:00 for 9 PM in {user_timezone}. CURRENT DATE AND TIME: {current_datetime_str} (Today is {current_date_str}). When the user says 'tomorrow', 'next week', '9 PM', etc., calculate the actual date and time based on the current date and time in {user_timezone}. You have access to conversation history to maintain context."
-                )
-            ]
-            
-            # Add conversation history
-            for msg in history:
-                messages.append(LLMMessage(
-                    role=msg["role"],
-                    content=msg["content"]
-                ))
-            
-            # Add current user message
-            messages.append(LLMMessage(
-                role="user",
-                content=input_text
-            ))
+            # System prompt, then as much recent history as fits the token budget, then the current message
+            messages = build_context(
+                system_prompt=f"You are {agent_name}, a helpful personal assistant. IMPORTANT: When the user wants to schedule, create, update, change, modify, or edit a meeting/appointment/calendar event, you MUST use the execute_calendar_action function. Use action='create' for new events, action='update' for modifying existing events (when user says 'change', 'update', 'modify', 'edit'). For updates: you can provide 'search_title' to find an event by its title (e.g., if user says 'change the meeting called Google Meet', use search_title='Google Meet'). If neither event_id nor search_title is provided, the system will use the most recent event. Extract the title, start time, end time (or calculate 1 hour duration if not specified), location, and attendees from the user's request. Use ISO 8601 format for dates in {user_timezone} timezone. Example: 2024-12-30T21:00:00 for 9 PM in {user_timezone}. CURRENT DATE AND TIME: {current_datetime_str} (Today is {current_date_str}). When the user says 'tomorrow', 'next week', '9 PM', etc., calculate the actual date and time based on the current date and time in {user_timezone}. You have access to conversation history to maintain context.",
+                history=context.history,
+                summary=context.summary,
+                recalled=context.recalled,
+                user_input=input_text,
+                name="scheduling",
+                budget=self.context_token_budget,
+                functions=functions
+            )
             
             try:
                 # Call LLM with function definitions
@@ -240,74 +231,80 @@ class SchedulingHandler(BaseHandler):
                     logger.info(f"Function arguments: {arguments}")
                     
                     if function_name == "execute_calendar_action":
-                        chat_guid_for_lookup = task_data.get("metadata", {}).get("chat_guid")
+                        chat_guid_for_lookup = task_data.metadata.get("chat_guid")
                         return await self._handle_calendar_action(arguments, calendar_service, user_timezone, user_id, db, chat_guid_for_lookup)
                     else:
-                        return {
-                            "status": "failed",
-                            "output": f"Unknown function: {function_name}",
-                            "metadata": {"handler": "scheduling_handler"}
-                        }
+                        return TaskResult(
+                            status="failed",
+                            output=f"Unknown function: {function_name}",
+                            metadata={"handler": "scheduling_handler"}
+                        )
                 else:
                     # LLM responded with text (no function call)
                     logger.warning(f"⚠️ LLM returned text instead of function call. Result: {result}")
-                    return {
-                        "status": "completed",
-                        "output": result,
-                        "metadata": {"handler": "scheduling_handler", "action": "text_response"}
-                    }
+                    return TaskResult(
+                        status="completed",
+                        output=result,
+                        metadata={"handler": "scheduling_handler", "action": "text_response"}
+                    )
             except Exception as e:
                 logger.error(f"Error processing scheduling task: {e}", exc_info=True)
-                return {
-                    "status": "failed",
-                    "output": f"Error processing scheduling request: {str(e)}",
-                    "metadata": {"error": str(e), "handler": "scheduling_handler"}
-                }
-        finally:
-            db.close()
+                return TaskResult(
+                    status="failed",
+                    output=f"Error processing scheduling request: {str(e)}",
+                    metadata={"error": str(e), "handler": "scheduling_handler"}
+                )
+    
+    @staticmethod
+    def _recent_cutoff() -> datetime:
+        """Oldest created_at considered by "most recent task" lookups"""
+        return datetime.utcnow() - timedelta(days=settings.TASKS_RECENT_LOOKBACK_DAYS)
     
-    def _get_most_recent_event_id(self, db: Session, user_id: UUID, chat_guid: Optional[str] = None) -> Optional[str]:
+    async def _get_most_recent_event_id(self, db: AsyncSession, user_id: UUID, chat_guid: Optional[str] = None) -> Optional[str]:
         """Get the most recent event_id from task metadata"""
         try:
-            query = db.query(Task).filter(
-                Task.user_id == user_id,
-                Task.status == TaskStatus.COMPLETED,
-                Task.tast_metadata.isnot(None)
-            )
-            
-            if chat_guid:
-                query = query.filter(
-                    Task.tast_metadata['chat_guid'].astext == chat_guid
-                )
-            
-            # Get recent tasks ordered by creation time
-            tasks = query.order_by(desc(Task.created_at)).limit(20).all()
+            rows = (await db.execute(self._event_id_query(user_id, chat_guid))).all()
             
             # Find the most recent task with event_id in metadata
-            for task in tasks:
-                if task.tast_metadata and isinstance(task.tast_metadata, dict):
-                    # Check if metadata has event_id (could be nested)
-                    metadata = task.tast_metadata
-                    if isinstance(metadata, dict):
-                        # Check handler metadata
-                        if metadata.get("handler") == "scheduling_handler":
-                            # Check nested metadata structure
-                            result_metadata = metadata.get("metadata") or {}
-                            if isinstance(result_metadata, dict) and "event_id" in result_metadata:
-                                return result_metadata["event_id"]
-                            # Also check direct metadata
-                            if "event_id" in metadata:
-                                return metadata["event_id"]
-                        # Also check if event_id is at top level (from previous versions)
-                        if "event_id" in metadata:
-                            return metadata["event_id"]
+            for handler, nested_event_id, event_id in rows:
+                # Scheduling results nest it under "metadata"
+                if handler == "scheduling_handler" and nested_event_id:
+                    return nested_event_id
+                # Also check if event_id is at top level (from previous versions)
+                if event_id:
+                    return event_id
             
             return None
         except Exception as e:
             logger.warning(f"Error getting most recent event_id: {e}")
             return None
     
-    async def _handle_calendar_action(self, arguments: Dict[str, Any], calendar_service: GoogleCalendarService, user_timezone: str, user_id: UUID, db: Session, chat_guid: Optional[str] = None) -> Dict[str, Any]:
+    @staticmethod
+    def _event_id_query(user_id: UUID, chat_guid: Optional[str] = None):
+        """Recent completed tasks as (handler, metadata.event_id, event_id) rows, newest first
+        
+        Selects only the JSON paths that are needed, so Postgres doesn't ship
+        whole metadata documents and no Task objects are built.
+        """
+        query = select(
+            Task.tast_metadata["handler"].astext,
+            Task.tast_metadata[("metadata", "event_id")].astext,
+            Task.tast_metadata["event_id"].astext
+        ).where(
+            Task.user_id == user_id,
+            Task.status == TaskStatus.COMPLETED,
+            Task.tast_metadata.isnot(None),
+            Task.created_at >= SchedulingHandler._recent_cutoff()  # Prunes to recent partitions
+        )
+        
+        if chat_guid:
+            query = query.where(
+                Task.tast_metadata['chat_guid'].astext == chat_guid
+            )
+        
+        return query.order_by(desc(Task.created_at)).limit(20)
+    
+    async def _handle_calendar_action(self, arguments: Dict[str, Any], calendar_service: GoogleCalendarService, user_timezone: str, user_id: UUID, db: AsyncSession, chat_guid: Optional[str] = None) -> TaskResult:
         """Handle execute_calendar_action function call"""
         action = arguments.get("action")
         params = arguments.get("parameters", {})
@@ -315,7 +312,7 @@ class SchedulingHandler(BaseHandler):
         if action == "create":
             result = await self._handle_create_event(params, calendar_service, user_timezone)
             # Store event_id in task metadata so we can retrieve it later for updates
-            if result.get("status") == "completed" and result.get("metadata", {}).get("event_id"):
+            if result.status == "completed" and result.metadata.get("event_id"):
                 # This will be stored when the result is processed
                 pass
             return result
@@ -332,11 +329,11 @@ class SchedulingHandler(BaseHandler):
                     matching_events = await calendar_service.find_events_by_title(search_title)
                     
                     if not matching_events:
-                        return {
-                            "status": "failed",
-                            "output": f"No event found with title matching '{search_title}'. Please check the title or create a new event.",
-                            "metadata": {"handler": "scheduling_handler"}
-                        }
+                        return TaskResult(
+                            status="failed",
+                            output=f"No event found with title matching '{search_title}'. Please check the title or create a new event.",
+                            metadata={"handler": "scheduling_handler"}
+                        )
                     
                     if len(matching_events) == 1:
                         # Single match - use it
@@ -349,28 +346,28 @@ class SchedulingHandler(BaseHandler):
                             f"{i+1}. '{ev['title']}' on {ev['start'].strftime('%Y-%m-%d %H:%M')}"
                             for i, ev in enumerate(matching_events[:5])  # Limit to 5
                         ])
-                        return {
-                            "status": "pending_confirmation",
-                            "output": f"Found {len(matching_events)} events matching '{search_title}':\n{event_list}\n\nWhich event would you like to update? Please specify the number (1-{min(len(matching_events), 5)}) or provide more details.",
-                            "metadata": {
+                        return TaskResult(
+                            status="pending_confirmation",
+                            output=f"Found {len(matching_events)} events matching '{search_title}':\n{event_list}\n\nWhich event would you like to update? Please specify the number (1-{min(len(matching_events), 5)}) or provide more details.",
+                            metadata={
                                 "handler": "scheduling_handler",
                                 "action": "update",
                                 "matching_events": matching_events[:5],
                                 "search_title": search_title,
                                 "update_params": params
                             }
-                        }
+                        )
                 else:
                     # Fall back to most recent
                     logger.info(f"Looking up most recent event_id for user {user_id}, chat_guid {chat_guid}")
-                    event_id = self._get_most_recent_event_id(db, user_id, chat_guid)
+                    event_id = await self._get_most_recent_event_id(db, user_id, chat_guid)
                     logger.info(f"Found event_id: {event_id}")
                     if not event_id:
-                        return {
-                            "status": "failed",
-                            "output": "No event_id provided and no recent event found. Please specify which event to update by title or create a new event first.",
-                            "metadata": {"handler": "scheduling_handler"}
-                        }
+                        return TaskResult(
+                            status="failed",
+                            output="No event_id provided and no recent event found. Please specify which event to update by title or create a new event first.",
+                            metadata={"handler": "scheduling_handler"}
+                        )
             
             # Get event details for confirmation
             if found_by_title or search_title:
@@ -409,10 +406,10 @@ class SchedulingHandler(BaseHandler):
                             confirmation_msg += f" scheduled for {start_time_str[:10]}"
                         confirmation_msg += f". I'll update: {', '.join(changes)}. Should I proceed? (yes/no)"
                         
-                        return {
-                            "status": "pending_confirmation",
-                            "output": confirmation_msg,
-                            "metadata": {
+                        return TaskResult(
+                            status="pending_confirmation",
+                            output=confirmation_msg,
+                            metadata={
                                 "handler": "scheduling_handler",
                                 "action": "update",
                                 "event_id": event_id,
@@ -420,7 +417,7 @@ class SchedulingHandler(BaseHandler):
                                 "update_params": params,
                                 "requires_confirmation": True
                             }
-                        }
+                        )
                 except Exception as e:
                     logger.warning(f"Error fetching event for confirmation: {e}")
                     # Continue without confirmation if we can't fetch event details
@@ -428,13 +425,13 @@ class SchedulingHandler(BaseHandler):
             logger.info(f"Updating event {event_id} with params: {params}")
             return await self._handle_update_event(event_id, params, calendar_service, user_timezone)
         else:
-            return {
-                "status": "failed",
-                "output": f"Unknown calendar action: {action}. Valid actions are: create, update",
-                "metadata": {"handler": "scheduling_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Unknown calendar action: {action}. Valid actions are: create, update",
+                metadata={"handler": "scheduling_handler"}
+            )
     
-    async def _handle_create_event(self, params: Dict[str, Any], calendar_service: GoogleCalendarService, user_timezone: str = 'America/Los_Angeles') -> Dict[str, Any]:
+    async def _handle_create_event(self, params: Dict[str, Any], calendar_service: GoogleCalendarService, user_timezone: str = 'America/Los_Angeles') -> TaskResult:
         """Handle create calendar event action"""
         try:
             title = params.get("title")
@@ -445,11 +442,11 @@ class SchedulingHandler(BaseHandler):
             attendees = params.get("attendees", [])
             
             if not title or not start_time_str:
-                return {
-                    "status": "failed",
-                    "output": "Missing required fields: title and start_time are required",
-                    "metadata": {"handler": "scheduling_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output="Missing required fields: title and start_time are required",
+                    metadata={"handler": "scheduling_handler"}
+                )
             
             # Parse datetime strings and ensure they're in user's timezone
             user_tz = ZoneInfo(user_timezone)
@@ -464,11 +461,11 @@ class SchedulingHandler(BaseHandler):
                 else:
                     start_time = start_time.astimezone(user_tz)
             except ValueError:
-                return {
-                    "status": "failed",
-                    "output": f"Invalid start_time format: {start_time_str}. Please use ISO 8601 format (e.g., 2024-01-15T14:00:00)",
-                    "metadata": {"handler": "scheduling_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output=f"Invalid start_time format: {start_time_str}. Please use ISO 8601 format (e.g., 2024-01-15T14:00:00)",
+                    metadata={"handler": "scheduling_handler"}
+                )
             
             # Calculate end time (default to 1 hour if not provided)
             if end_time_str:
@@ -481,11 +478,11 @@ class SchedulingHandler(BaseHandler):
                     else:
                         end_time = end_time.astimezone(user_tz)
                 except ValueError:
-                    return {
-                        "status": "failed",
-                        "output": f"Invalid end_time format: {end_time_str}. Please use ISO 8601 format",
-                        "metadata": {"handler": "scheduling_handler"}
-                    }
+                    return TaskResult(
+                        status="failed",
+                        output=f"Invalid end_time format: {end_time_str}. Please use ISO 8601 format",
+                        metadata={"handler": "scheduling_handler"}
+                    )
             else:
                 # Default to 1 hour duration
                 end_time = start_time + timedelta(hours=1)
@@ -514,25 +511,25 @@ class SchedulingHandler(BaseHandler):
             if location:
                 output += f"\nLocation: {location}"
             
-            return {
-                "status": "completed",
-                "output": output,
-                "metadata": {
+            return TaskResult(
+                status="completed",
+                output=output,
+                metadata={
                     "handler": "scheduling_handler",
                     "action": "create",
                     "event_id": event_id,
                     "meet_link": meet_link
                 }
-            }
+            )
         except Exception as e:
             logger.error(f"Error creating calendar event: {e}", exc_info=True)
-            return {
-                "status": "failed",
-                "output": f"Error creating calendar event: {str(e)}",
-                "metadata": {"error": str(e), "handler": "scheduling_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Error creating calendar event: {str(e)}",
+                metadata={"error": str(e), "handler": "scheduling_handler"}
+            )
     
-    async def _handle_update_event(self, event_id: str, params: Dict[str, Any], calendar_service: GoogleCalendarService, user_timezone: str = 'America/Los_Angeles') -> Dict[str, Any]:
+    async def _handle_update_event(self, event_id: str, params: Dict[str, Any], calendar_service: GoogleCalendarService, user_timezone: str = 'America/Los_Angeles') -> TaskResult:
         """Handle update calendar event action"""
         try:
             from datetime import datetime
@@ -553,11 +550,11 @@ class SchedulingHandler(BaseHandler):
                     else:
                         start_time = start_time.astimezone(user_tz)
                 except ValueError:
-                    return {
-                        "status": "failed",
-                        "output": f"Invalid start_time format: {params.get('start_time')}. Please use ISO 8601 format",
-                        "metadata": {"handler": "scheduling_handler"}
-                    }
+                    return TaskResult(
+                        status="failed",
+                        output=f"Invalid start_time format: {params.get('start_time')}. Please use ISO 8601 format",
+                        metadata={"handler": "scheduling_handler"}
+                    )
             
             if params.get("end_time"):
                 try:
@@ -568,11 +565,11 @@ class SchedulingHandler(BaseHandler):
                     else:
                         end_time = end_time.astimezone(user_tz)
                 except ValueError:
-                    return {
-                        "status": "failed",
-                        "output": f"Invalid end_time format: {params.get('end_time')}. Please use ISO 8601 format",
-                        "metadata": {"handler": "scheduling_handler"}
-                    }
+                    return TaskResult(
+                        status="failed",
+                        output=f"Invalid end_time format: {params.get('end_time')}. Please use ISO 8601 format",
+                        metadata={"handler": "scheduling_handler"}
+                    )
             
             # Determine which fields to update - use metadata to mark fields for update
             # The update_event method will get existing values, so we can use dummy values here
@@ -618,26 +615,26 @@ class SchedulingHandler(BaseHandler):
                 if params.get("attendees") is not None:
                     updated_fields.append("attendees")
                 
-                return {
-                    "status": "completed",
-                    "output": f"Successfully updated calendar event. Changed: {', '.join(updated_fields) if updated_fields else 'event details'}",
-                    "metadata": {
+                return TaskResult(
+                    status="completed",
+                    output=f"Successfully updated calendar event. Changed: {', '.join(updated_fields) if updated_fields else 'event details'}",
+                    metadata={
                         "handler": "scheduling_handler",
                         "action": "update",
                         "event_id": event_id
                     }
-                }
+                )
             else:
-                return {
-                    "status": "failed",
-                    "output": f"Failed to update calendar event",
-                    "metadata": {"handler": "scheduling_handler"}
-                }
+                return TaskResult(
+                    status="failed",
+                    output=f"Failed to update calendar event",
+                    metadata={"handler": "scheduling_handler"}
+                )
         except Exception as e:
             logger.error(f"Error updating calendar event: {e}", exc_info=True)
-            return {
-                "status": "failed",
-                "output": f"Error updating calendar event: {str(e)}",
-                "metadata": {"error": str(e), "handler": "scheduling_handler"}
-            }
+            return TaskResult(
+                status="failed",
+                output=f"Error updating calendar event: {str(e)}",
+                metadata={"error": str(e), "handler": "scheduling_handler"}
+            )
 
@@ -1,8 +1,7 @@
 """
 Workflow handler for agent tasks
 """
-from typing import Dict, Any
-from app.services.agent.handlers.base_handler import BaseHandler
+from app.services.agent.handlers.base_handler import BaseHandler, TaskData, TaskResult
 
 
 class WorkflowHandler(BaseHandler):
@@ -12,21 +11,21 @@ class WorkflowHandler(BaseHandler):
     def task_type(self) -> str:
         return "workflow"
     
-    def can_handle(self, task_data: Dict[str, Any]) -> bool:
+    def can_handle(self, task_data: TaskData) -> bool:
         """Check if this handler can handle the task"""
-        task_input = task_data.get("input", "").lower()
+        task_input = task_data.input.lower()
         workflow_keywords = [
             "workflow", "automate", "process", "execute", 
             "run", "perform", "do", "task"
         ]
         return any(keyword in task_input for keyword in workflow_keywords)
     
-    async def handle(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle(self, task_data: TaskData) -> TaskResult:
         """Handle a workflow task"""
         # This will orchestrate multiple operations
-        return {
-            "status": "completed",
-            "output": "Workflow task processed (implementation pending orchestration logic)",
-            "metadata": {"handler": "workflow_handler"}
-        }
+        return TaskResult(
+            status="completed",
+            output="Workflow task processed (implementation pending orchestration logic)",
+            metadata={"handler": "workflow_handler"}
+        )
 
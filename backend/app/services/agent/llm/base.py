@@ -59,9 +59,16 @@ class BaseLLM(ABC):
         """Generate embedding for text"""
         pass
     
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts (providers with a batch API override this)"""
+        return [await self.generate_embedding(text) for text in texts]
+    
     @property
     @abstractmethod
     def model_name(self) -> str:
         """Model name being used"""
         pass
-
+    
+    def close(self):
+        """Release network resources (no-op by default)"""
+        pass
@@ -0,0 +1,106 @@
+"""
+Local, CPU-only text embeddings
+
+Groq has no embedding API, so embeddings are computed in-process. Two
+backends (EMBEDDING_BACKEND):
+- "hashing": feature hashing of words, word bigrams and character trigrams
+  into EMBEDDING_DIM buckets. Needs only numpy, costs well under a
+  millisecond per message, and captures lexical overlap (names, places,
+  topics) rather than meaning.
+- "fastembed": a small ONNX sentence-embedding model (EMBEDDING_MODEL) via
+  the optional fastembed package; downloaded on first use.
+
+Vectors are float32 and L2-normalized, so a dot product is the cosine
+similarity. Vectors from different backends/models are not comparable;
+stored vectors carry model_name and are only searched against the same model.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+from typing import List, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+
+class LocalEmbedder:
+    """Batched local embedding provider"""
+
+    def __init__(self, backend: str, model: str, dim: int, batch_size: int):
+        if backend not in ("hashing", "fastembed"):
+            raise ValueError(f"Unknown embedding backend: {backend}")
+        self.backend = backend
+        self.batch_size = batch_size
+        self._model = model
+        self._dim = dim
+        self._fastembed = None
+
+    @property
+    def model_name(self) -> str:
+        """Identifies the vector space (stored with every vector)"""
+        if self.backend == "hashing":
+            return f"hashing-v1-{self._dim}"
+        return self._model
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts (CPU-bound; blocks): (len(texts), dim) float32, rows L2-normalized"""
+        if not texts:
+            return np.zeros((0, self._dim), dtype=np.float32)
+        if self.backend == "hashing":
+            vectors = np.stack([self._hash_embed(text) for text in texts])
+        else:
+            vectors = np.asarray(
+                list(self._fastembed_model().embed(list(texts), batch_size=self.batch_size)),
+                dtype=np.float32
+            )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts in batches of batch_size, off the event loop"""
+        batches = [
+            await asyncio.to_thread(self.embed_batch, texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate(batches) if batches else self.embed_batch([])
+
+    async def generate_embedding(self, text: str) -> List[float]:
+        """Embed one text"""
+        return (await self.embed([text]))[0].tolist()
+
+    def _fastembed_model(self):
+        if self._fastembed is None:
+            from fastembed import TextEmbedding  # Optional dependency (EMBEDDING_BACKEND=fastembed)
+            logger.info(f"Loading embedding model {self._model}")
+            self._fastembed = TextEmbedding(model_name=self._model)
+        return self._fastembed
+
+    def _hash_embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self._dim, dtype=np.float32)
+        words = _WORD.findall(text.lower())
+        features = [(word, 1.0) for word in words]
+        features += [(f"{a} {b}", 0.5) for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [(padded[i:i + 3], 0.25) for i in range(len(padded) - 2)]
+        for feature, weight in features:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            # Low bits pick the bucket, the top bit the sign (keeps collisions unbiased)
+            vector[digest % self._dim] += weight if digest >> 63 else -weight
+        # Dampen repeated terms
+        return np.sign(vector) * np.log1p(np.abs(vector))
+
+
+# Global embedder instance (models load on first use)
+local_embedder = LocalEmbedder(
+    backend=settings.EMBEDDING_BACKEND,
+    model=settings.EMBEDDING_MODEL,
+    dim=settings.EMBEDDING_DIM,
+    batch_size=settings.EMBEDDING_BATCH_SIZE
+)
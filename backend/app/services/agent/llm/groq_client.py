@@ -11,7 +11,7 @@ class GroqClient(BaseLLM):
     """Groq LLM client implementation"""
     
     def __init__(self, model: str = "llama-3.3-70b-versatile"):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        self.client = Groq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL or None)
         self._model = model
     
     @property
@@ -19,6 +19,10 @@ class GroqClient(BaseLLM):
         """Model name being used"""
         return self._model
     
+    def close(self):
+        """Close the underlying HTTP connection pool"""
+        self.client.close()
+    
     async def chat(
         self,
         messages: List[LLMMessage],
@@ -100,8 +104,12 @@ class GroqClient(BaseLLM):
         return message.content or ""
     
     async def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text"""
-        # Groq doesn't have embedding API, return empty list or use alternative
-        # This can be implemented with a separate embedding service if needed
-        raise NotImplementedError("Groq does not provide embedding API")
+        """Generate embedding for text (Groq has no embedding API; computed locally)"""
+        from app.services.agent.llm.embeddings import local_embedder
+        return await local_embedder.generate_embedding(text)
+    
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts in local batches"""
+        from app.services.agent.llm.embeddings import local_embedder
+        return (await local_embedder.embed(texts)).tolist()
 
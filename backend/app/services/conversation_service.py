@@ -2,30 +2,99 @@
 Conversation history service for storing and retrieving message history
 """
 import logging
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from uuid import UUID
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, desc, func, select
+from app.core.config import settings
+from app.core.history_cache import history_cache
+from app.core.summarizer import conversation_summarizer
+from app.models.conversation_message import ConversationMessage
+from app.models.conversation_summary import ConversationSummary
 from app.models.task import Task, TaskType, TaskStatus
-from app.core.database import SessionLocal
+from app.integrations.messaging.base_messaging import InboundMessage
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class ConversationContext:
+    """What a handler sends the LLM besides its system prompt and the current message"""
+    history: List[Dict[str, Any]] = field(default_factory=list)  # Recent turns, chronological
+    summary: Optional[str] = None  # Rolling summary of older turns
+    recalled: List[str] = field(default_factory=list)  # Older items semantically related to the message
+
+
 class ConversationService:
     """Service for managing conversation history"""
     
     @staticmethod
-    def store_message(
-        db: Session,
+    def _history_query(user_id: UUID, limit: int, chat_guid: Optional[str]):
+        """(role, content) rows of the last `limit` turns, newest first
+        
+        With a chat_guid this is a range scan on ix_conversation_messages_user_chat_created.
+        Only the two needed columns are selected: rows come back as plain tuples,
+        with no ORM objects or identity-map entries.
+        """
+        query = select(ConversationMessage.role, ConversationMessage.content).where(
+            ConversationMessage.user_id == user_id
+        )
+        
+        # Filter by chat_guid if provided (for multi-conversation support)
+        if chat_guid:
+            query = query.where(ConversationMessage.chat_guid == chat_guid)
+        
+        # Each turn is a user row and an assistant row
+        return query.order_by(desc(ConversationMessage.created_at)).limit(limit * 2)
+    
+    @staticmethod
+    def _to_history(rows: Sequence[Row]) -> List[Dict[str, Any]]:
+        """Convert newest-first (role, content) rows to chronological chat format"""
+        return [
+            {"role": role, "content": content}
+            for role, content in reversed(rows)
+        ]
+    
+    @staticmethod
+    def _build_turn_messages(task: Task, agent_response: str) -> List[ConversationMessage]:
+        """History rows for a turn that got a response
+        
+        Turns enter history only once answered (as they did when history was read
+        from tasks), so the message being processed never shows up in its own context.
+        """
+        chat_guid = (task.tast_metadata or {}).get("chat_guid")
+        messages = []
+        if task.input:
+            messages.append(ConversationMessage(
+                user_id=task.user_id,
+                chat_guid=chat_guid,
+                role="user",
+                content=task.input,
+                task_id=task.id,
+                created_at=task.created_at
+            ))
+        if agent_response:
+            messages.append(ConversationMessage(
+                user_id=task.user_id,
+                chat_guid=chat_guid,
+                role="assistant",
+                content=agent_response,
+                task_id=task.id
+            ))
+        return messages
+    
+    @staticmethod
+    def _build_message(
         user_id: UUID,
         user_message: str,
-        agent_response: Optional[str] = None,
-        chat_guid: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        agent_response: Optional[str],
+        chat_guid: Optional[str],
+        metadata: Optional[Dict[str, Any]]
     ) -> Task:
-        """Store a user message and optionally an agent response"""
-        task = Task(
+        return Task(
             user_id=user_id,
             type=TaskType.TEXT,  # Use TEXT type for conversation messages
             input=user_message,
@@ -37,21 +106,99 @@ class ConversationService:
                 **(metadata or {})
             }  # Note: Column is named "tast_metadata" in the model (typo, but keeping for compatibility)
         )
+    
+    @staticmethod
+    def _build_linked_messages(
+        user_id: UUID,
+        turn_task_id: UUID,
+        fragments: List[InboundMessage],
+        chat_guid: Optional[str],
+        metadata: Optional[Dict[str, Any]]
+    ) -> List[Task]:
+        return [
+            Task(
+                user_id=user_id,
+                type=TaskType.TEXT,
+                input=fragment.content,
+                output=None,
+                status=TaskStatus.COMPLETED,
+                tast_metadata={
+                    "chat_guid": chat_guid,
+                    "coalesced_into": str(turn_task_id),
+                    "message_guid": fragment.message_guid,
+                    **(metadata or {})
+                }
+            )
+            for fragment in fragments
+        ]
+    
+    @staticmethod
+    async def store_message_async(
+        db: AsyncSession,
+        user_id: UUID,
+        user_message: str,
+        agent_response: Optional[str] = None,
+        chat_guid: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Task:
+        """Store a user message and optionally an agent response"""
+        task = ConversationService._build_message(user_id, user_message, agent_response, chat_guid, metadata)
         db.add(task)
-        db.commit()
-        db.refresh(task)
+        await db.commit()
+        await db.refresh(task)
         logger.debug(f"Stored message for user {user_id}: {user_message[:50]}...")
         return task
     
     @staticmethod
-    def get_recent_history(
-        db: Session,
+    async def get_turn_async(db: AsyncSession, user_id: UUID, message_guid: Optional[str]) -> Optional[Task]:
+        """The turn row already stored for an inbound message (None if there is none or no GUID)
+        
+        A replayed or retried turn reuses it instead of storing the message again.
+        """
+        if not message_guid:
+            return None
+        return await db.scalar(
+            select(Task).where(
+                Task.user_id == user_id,
+                Task.tast_metadata["message_guid"].astext == message_guid,
+                # Not the rows of coalesced fragments, which share the GUID of their last message
+                Task.tast_metadata["conversation"].astext == "true"
+            ).limit(1)
+        )
+    
+    @staticmethod
+    async def store_linked_messages_async(
+        db: AsyncSession,
+        user_id: UUID,
+        turn_task_id: UUID,
+        fragments: List[InboundMessage],
+        chat_guid: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Task]:
+        """Store the original messages that were coalesced into one turn
+        
+        The turn row holds the merged input and the agent response. Each original
+        message gets its own row linked to it via "coalesced_into"; these rows are
+        not written to conversation_messages, so they never appear in history.
+        """
+        tasks = ConversationService._build_linked_messages(user_id, turn_task_id, fragments, chat_guid, metadata)
+        db.add_all(tasks)
+        await db.commit()
+        logger.debug(f"Stored {len(tasks)} coalesced messages for turn {turn_task_id}")
+        return tasks
+    
+    @staticmethod
+    async def get_recent_history_async(
+        db: AsyncSession,
         user_id: UUID,
         limit: int = 10,
         chat_guid: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Get recent conversation history for a user
         
+        Served from the per-chat history cache when possible; a cold chat is
+        loaded with the cache's full window, so follow-up reads stay in memory.
+        
         Args:
             db: Database session
             user_id: User ID
@@ -61,53 +208,169 @@ class ConversationService:
         Returns:
             List of message dictionaries with 'role' and 'content' keys
         """
-        query = db.query(Task).filter(
-            Task.user_id == user_id,
-            Task.type == TaskType.TEXT,
-            Task.status == TaskStatus.COMPLETED,
-            Task.output.isnot(None)  # Only get messages with responses
-        )
-        
-        # Filter by chat_guid if provided (for multi-conversation support)
-        if chat_guid:
-            # Note: Column is named "tast_metadata" in the model (typo, but keeping for compatibility)
-            query = query.filter(
-                Task.tast_metadata['chat_guid'].astext == chat_guid
-            )
-        
-        # Get recent messages, ordered by creation time
-        tasks = query.order_by(desc(Task.created_at)).limit(limit).all()
-        
-        # Convert to conversation format: [user message, assistant response, ...]
-        history = []
-        for task in reversed(tasks):  # Reverse to get chronological order
-            if task.input:
-                history.append({
-                    "role": "user",
-                    "content": task.input
-                })
-            if task.output:
-                history.append({
-                    "role": "assistant",
-                    "content": task.output
-                })
+        history = history_cache.get(user_id, chat_guid, limit)
+        if history is not None:
+            return history
         
+        cacheable = bool(chat_guid) and limit <= history_cache.turns
+        query_limit = history_cache.turns if cacheable else limit
+        result = await db.execute(ConversationService._history_query(user_id, query_limit, chat_guid))
+        rows = result.all()
+        if cacheable:
+            history_cache.load(user_id, chat_guid, rows)
+        history = ConversationService._to_history(rows[:limit * 2])
         logger.debug(f"Retrieved {len(history)} messages from history for user {user_id}")
         return history
     
     @staticmethod
-    def update_agent_response(
-        db: Session,
+    async def update_agent_response_async(
+        db: AsyncSession,
         task_id: UUID,
-        agent_response: str
-    ) -> Task:
-        """Update a task with the agent's response"""
-        task = db.query(Task).filter(Task.id == task_id).first()
+        agent_response: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Optional[Task]:
+        """Update a task with the agent's response (merging extra metadata if given) and record the turn in history"""
+        task = await db.get(Task, task_id)
         if task:
             task.output = agent_response
             task.status = TaskStatus.COMPLETED
-            db.commit()
-            db.refresh(task)
+            if metadata:
+                # Reassign so the JSONB column is marked dirty
+                task.tast_metadata = {**(task.tast_metadata or {}), **metadata}
+            messages = ConversationService._build_turn_messages(task, agent_response)
+            db.add_all(messages)
+            await db.commit()
+            # Write through once committed
+            history_cache.append(task.user_id, messages[0].chat_guid if messages else None, [(m.role, m.content) for m in messages])
             logger.debug(f"Updated task {task_id} with agent response")
         return task
-
+    
+    @staticmethod
+    async def get_context_async(
+        db: AsyncSession,
+        user_id: UUID,
+        chat_guid: Optional[str] = None,
+        limit: int = 10,
+        query: Optional[str] = None
+    ) -> ConversationContext:
+        """Recent turns, the summary of older ones (if any) and, given query, related older items
+        
+        Args:
+            limit: Maximum number of turns of history. Once a chat has a summary,
+                at most the turns it may not cover yet are read: the summarizer
+                folds turns older than SUMMARY_RECENT_TURNS in batches of
+                SUMMARY_EVERY_TURNS, so at most that many more can be pending.
+        """
+        from app.services.embedding_service import EmbeddingService
+        
+        summary = await ConversationService.get_summary_async(db, user_id, chat_guid)
+        if summary:
+            limit = min(limit, settings.SUMMARY_RECENT_TURNS + settings.SUMMARY_EVERY_TURNS)
+        history = await ConversationService.get_recent_history_async(db, user_id, limit, chat_guid)
+        
+        recalled = []
+        if query:
+            try:
+                recalled = await EmbeddingService.recall_async(db, user_id, query, chat_guid, history)
+            except Exception as e:
+                # Recall is best effort; the turn goes ahead without it
+                logger.warning(f"Semantic recall failed for user {user_id}: {e}")
+        return ConversationContext(history=history, summary=summary, recalled=recalled)
+    
+    @staticmethod
+    async def get_summary_async(
+        db: AsyncSession,
+        user_id: UUID,
+        chat_guid: Optional[str]
+    ) -> Optional[str]:
+        """Rolling summary of a chat (cached; None if the chat has none yet)"""
+        if not chat_guid or not settings.SUMMARY_ENABLED:
+            return None
+        found, summary = conversation_summarizer.cached(user_id, chat_guid)
+        if found:
+            return summary
+        summary = await db.scalar(
+            select(ConversationSummary.summary).where(
+                ConversationSummary.user_id == user_id,
+                ConversationSummary.chat_guid == chat_guid
+            )
+        )
+        conversation_summarizer.remember(user_id, chat_guid, summary)
+        return summary
+    
+    @staticmethod
+    async def get_unsummarized_async(
+        db: AsyncSession,
+        user_id: UUID,
+        chat_guid: str
+    ) -> Tuple[Optional[str], List[Row]]:
+        """Current summary and the messages to fold into it next
+        
+        Returns:
+            (summary or None, chronological (role, content, created_at) rows that
+            are newer than the summary but older than the last SUMMARY_RECENT_TURNS
+            turns: the oldest SUMMARY_MAX_FOLD_TURNS turns of them, so a capped
+            fold never skips past messages it didn't summarize)
+        """
+        current = (await db.execute(
+            select(ConversationSummary.summary, ConversationSummary.summarized_through).where(
+                ConversationSummary.user_id == user_id,
+                ConversationSummary.chat_guid == chat_guid
+            )
+        )).first()
+        
+        in_chat = (
+            ConversationMessage.user_id == user_id,
+            ConversationMessage.chat_guid == chat_guid
+        )
+        # Oldest message of the recent window (NULL while the chat is shorter than the window)
+        recent_from = (
+            select(ConversationMessage.created_at)
+            .where(*in_chat)
+            .order_by(desc(ConversationMessage.created_at))
+            .offset(max(0, settings.SUMMARY_RECENT_TURNS * 2 - 1))
+            .limit(1)
+            .scalar_subquery()
+        )
+        query = select(ConversationMessage.role, ConversationMessage.content, ConversationMessage.created_at).where(
+            *in_chat,
+            ConversationMessage.created_at < recent_from
+        )
+        if current:
+            query = query.where(ConversationMessage.created_at > current.summarized_through)
+        query = query.order_by(ConversationMessage.created_at).limit(settings.SUMMARY_MAX_FOLD_TURNS * 2)
+        rows = (await db.execute(query)).all()
+        return (current.summary if current else None), list(rows)
+    
+    @staticmethod
+    async def save_summary_async(
+        db: AsyncSession,
+        user_id: UUID,
+        chat_guid: str,
+        summary: str,
+        summarized_through: datetime,
+        message_count: int
+    ):
+        """Insert or advance a chat's summary
+        
+        A fold that lost a race with a newer one (another process) is discarded.
+        """
+        stmt = insert(ConversationSummary).values(
+            user_id=user_id,
+            chat_guid=chat_guid,
+            summary=summary,
+            summarized_through=summarized_through,
+            message_count=message_count
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_conversation_summaries_user_chat",
+            set_={
+                "summary": stmt.excluded.summary,
+                "summarized_through": stmt.excluded.summarized_through,
+                "message_count": ConversationSummary.message_count + stmt.excluded.message_count,
+                "updated_at": func.now(),
+            },
+            where=ConversationSummary.summarized_through < stmt.excluded.summarized_through
+        )
+        await db.execute(stmt)
+        await db.commit()
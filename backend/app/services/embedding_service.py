@@ -0,0 +1,206 @@
+"""
+Embedding service: store text embeddings and search them per user
+"""
+import hashlib
+import logging
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import Row, desc, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.events import EmitMode, EventType, event_bus
+from app.core.vector_index import IndexedText, SearchHit, VectorIndex, vector_indexes
+from app.models.text_embedding import TextEmbedding
+from app.services.agent.llm.embeddings import local_embedder
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class EmbeddingItem:
+    """A piece of text to embed for a user"""
+    user_id: UUID
+    source: str  # "conversation", "email" or "document"
+    text: str
+    source_id: Optional[str] = None
+    chat_guid: Optional[str] = None
+
+
+def turn_text(user_message: str, agent_response: str) -> str:
+    """How an answered turn is embedded and recalled"""
+    return f"User: {user_message}\nAssistant: {agent_response}"
+
+
+def content_id(content: str) -> str:
+    """source_id for text without one, so the same text is only stored once"""
+    return "sha256:" + hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class EmbeddingService:
+    """Service for semantic recall over a user's turns, emails and documents"""
+    
+    @staticmethod
+    async def capture(items: List[EmbeddingItem]):
+        """Queue texts for embedding off the reply path (no-op when embeddings are disabled)"""
+        if settings.EMBEDDINGS_ENABLED and items:
+            await event_bus.emit(EventType.TEXT_CAPTURED, items, mode=EmitMode.FIRE_AND_FORGET)
+    
+    @staticmethod
+    async def handle_text_captured(items: List[EmbeddingItem]):
+        """TEXT_CAPTURED subscriber: embed and store, in its own session"""
+        from app.core.database import AsyncSessionLocal
+        
+        async with AsyncSessionLocal() as db:
+            for user_id, user_items in groupby(sorted(items, key=lambda item: str(item.user_id)), key=lambda item: item.user_id):
+                await EmbeddingService.index_async(db, user_id, list(user_items))
+    
+    @staticmethod
+    async def index_async(db: AsyncSession, user_id: UUID, items: Sequence[EmbeddingItem]) -> int:
+        """Embed and store texts for a user (already stored source ids are skipped)
+        
+        Items without a source_id are identified by a hash of their content.
+        
+        Returns:
+            Number of new embeddings
+        """
+        items = [item for item in items if item.text and item.text.strip()]
+        if not items:
+            return 0
+        contents = [item.text[:settings.EMBEDDING_MAX_CHARS] for item in items]
+        vectors = await local_embedder.embed(contents)
+        model = local_embedder.model_name
+        
+        stmt = insert(TextEmbedding).values([
+            {
+                "user_id": user_id,
+                "source": item.source,
+                "source_id": item.source_id or content_id(content),
+                "chat_guid": item.chat_guid,
+                "content": content,
+                "model": model,
+                "vector": vector.tobytes(),
+            }
+            for item, content, vector in zip(items, contents, vectors)
+        ])
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_text_embeddings_user_model_source").returning(
+            TextEmbedding.source,
+            TextEmbedding.source_id,
+            TextEmbedding.chat_guid,
+            TextEmbedding.content,
+            TextEmbedding.created_at,
+            TextEmbedding.vector
+        )
+        rows = (await db.execute(stmt)).all()
+        await db.commit()
+        
+        # Write through once committed
+        if rows:
+            stored_vectors, entries = EmbeddingService._to_index_rows(rows)
+            vector_indexes.append(user_id, model, stored_vectors, entries)
+        logger.debug(f"Stored {len(rows)} of {len(items)} embeddings for user {user_id}")
+        return len(rows)
+    
+    @staticmethod
+    async def search_async(
+        db: AsyncSession,
+        user_id: UUID,
+        query: str,
+        k: int = 5,
+        sources: Optional[Sequence[str]] = None,
+        chat_guid: Optional[str] = None
+    ) -> List[SearchHit]:
+        """Top k stored texts most similar to query
+        
+        Args:
+            sources: Only these sources (default all)
+            chat_guid: Only conversation turns from this chat (other sources are kept)
+        """
+        index = await EmbeddingService._get_index(db, user_id)
+        if not len(index) or not query.strip():
+            return []
+        query_vector = (await local_embedder.embed([query[:settings.EMBEDDING_MAX_CHARS]]))[0]
+        
+        def predicate(entry: IndexedText) -> bool:
+            if sources and entry.source not in sources:
+                return False
+            return not chat_guid or entry.source != "conversation" or entry.chat_guid == chat_guid
+        
+        return index.search(query_vector, k, predicate if sources or chat_guid else None)
+    
+    @staticmethod
+    async def recall_async(
+        db: AsyncSession,
+        user_id: UUID,
+        query: str,
+        chat_guid: Optional[str],
+        history: List[Dict[str, Any]]
+    ) -> List[str]:
+        """Older turns, emails and documents relevant to query that history doesn't already contain"""
+        if not settings.EMBEDDINGS_ENABLED:
+            return []
+        in_history = {
+            turn_text(user["content"], assistant["content"])
+            for user, assistant in zip(history, history[1:])
+            if user["role"] == "user" and assistant["role"] == "assistant"
+        }
+        hits = await EmbeddingService.search_async(
+            db,
+            user_id,
+            query,
+            k=settings.EMBEDDING_RECALL_K + len(in_history),
+            chat_guid=chat_guid
+        )
+        recalled = [
+            f"[{hit.entry.source}] {hit.entry.content}"
+            for hit in hits
+            if hit.score >= settings.EMBEDDING_RECALL_MIN_SCORE and hit.entry.content not in in_history
+        ]
+        return recalled[:settings.EMBEDDING_RECALL_K]
+    
+    @staticmethod
+    async def _get_index(db: AsyncSession, user_id: UUID) -> VectorIndex:
+        """The user's cached index, loading their newest vectors on a miss"""
+        model = local_embedder.model_name
+        index = vector_indexes.get(user_id, model)
+        if index is not None:
+            return index
+        result = await db.execute(
+            select(
+                TextEmbedding.source,
+                TextEmbedding.source_id,
+                TextEmbedding.chat_guid,
+                TextEmbedding.content,
+                TextEmbedding.created_at,
+                TextEmbedding.vector
+            )
+            .where(TextEmbedding.user_id == user_id, TextEmbedding.model == model)
+            .order_by(desc(TextEmbedding.created_at))
+            .limit(settings.EMBEDDING_INDEX_MAX_VECTORS)
+        )
+        vectors, entries = EmbeddingService._to_index_rows(result.all())
+        return vector_indexes.load(user_id, model, vectors, entries)
+    
+    @staticmethod
+    def _to_index_rows(rows: Sequence[Row]) -> Tuple[np.ndarray, List[IndexedText]]:
+        """(vectors matrix, entries) from (source, source_id, chat_guid, content, created_at, vector) rows"""
+        if rows:
+            vectors = np.frombuffer(b"".join(row.vector for row in rows), dtype=np.float32).reshape(len(rows), -1)
+        else:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        entries = [
+            IndexedText(
+                source=row.source,
+                source_id=row.source_id,
+                chat_guid=row.chat_guid,
+                content=row.content,
+                created_at=row.created_at
+            )
+            for row in rows
+        ]
+        return vectors, entries
@@ -1,10 +1,16 @@
 """
 Integration service for checking integration status
 """
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import List, Optional
 from uuid import UUID
 from app.models.integration import Integration
 
+# Providers that count as "google" (one Google Account connects all of them)
+GOOGLE_PROVIDERS = ["google_calendar", "google_docs", "google_gmail"]
+
 
 class IntegrationService:
     """Service for checking integration connection status"""
@@ -26,7 +32,7 @@ class IntegrationService:
             if provider == "google":
                 result = db.query(Integration).filter(
                     Integration.user_id == user_id,
-                    Integration.provider.in_(["google_calendar", "google_docs", "google_gmail"]),
+                    Integration.provider.in_(GOOGLE_PROVIDERS),
                     Integration.status == "connected"
                 ).first()
                 return result is not None
@@ -44,6 +50,60 @@ class IntegrationService:
             logger.error(f"Error checking integration status for {provider}: {e}", exc_info=True)
             return False
     
+    @staticmethod
+    async def is_integration_connected_async(db: AsyncSession, user_id: UUID, provider: str) -> bool:
+        """Check if user has a specific integration connected"""
+        try:
+            providers = GOOGLE_PROVIDERS if provider == "google" else [provider]
+            result = await db.scalar(
+                select(Integration.id).where(
+                    Integration.user_id == user_id,
+                    Integration.provider.in_(providers),
+                    Integration.status == "connected"
+                ).limit(1)
+            )
+            return result is not None
+        except Exception as e:
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.error(f"Error checking integration status for {provider}: {e}", exc_info=True)
+            return False
+    
+    @staticmethod
+    async def get_connected_integration_async(db: AsyncSession, user_id: UUID, provider: str) -> Optional[Integration]:
+        """Get the user's connected integration for an exact provider (e.g. "google_calendar")"""
+        result = await db.execute(
+            select(Integration).where(
+                Integration.user_id == user_id,
+                Integration.provider == provider,
+                Integration.status == "connected"
+            ).limit(1)
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    async def list_integrations_async(
+        db: AsyncSession,
+        user_id: UUID,
+        providers: Optional[List[str]] = None
+    ) -> List[Integration]:
+        """Get the user's integrations (of the given exact providers, if any), whatever their status"""
+        query = select(Integration).where(Integration.user_id == user_id)
+        if providers:
+            query = query.where(Integration.provider.in_(providers))
+        result = await db.execute(query)
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_integration_async(db: AsyncSession, user_id: UUID, integration_id: UUID) -> Optional[Integration]:
+        """Get one of the user's integrations by id"""
+        return await db.scalar(
+            select(Integration).where(
+                Integration.id == integration_id,
+                Integration.user_id == user_id
+            )
+        )
+    
     @staticmethod
     def get_integration_name(provider: str) -> str:
         """Get user-friendly name for integration
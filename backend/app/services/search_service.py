@@ -0,0 +1,154 @@
+"""
+Full-text search over conversation history and tasks
+"""
+import logging
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, Row, Text, cast, desc, func, literal_column, select
+from sqlalchemy.dialects.postgresql import TSQUERY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.conversation_message import ConversationMessage
+from app.models.task import Task, TaskType
+
+logger = logging.getLogger(__name__)
+
+# Must match the configuration of the search_vector columns (a literal, so it's typed regconfig)
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+# Content is HTML-escaped before highlighting, so only these tags are markup
+HIGHLIGHT_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8, MaxFragments=2, FragmentDelimiter=\" … \""
+
+
+class SearchService:
+    """Ranked, highlighted full-text search (GIN indexes on search_vector)
+    
+    Queries use web search syntax ("quoted phrases", -excluded, OR); with
+    match_any=True any of the words may match, ranked by how many do.
+    Ranking and highlighting only run on matching rows of one user, and
+    highlighting only on the returned page.
+    """
+    
+    @staticmethod
+    async def search_messages_async(
+        db: AsyncSession,
+        user_id: UUID,
+        query: str,
+        limit: int = 20,
+        chat_guid: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        match_any: bool = False
+    ) -> List[Row]:
+        """Search conversation_messages
+        
+        Returns:
+            Rows with id, chat_guid, role, content, task_id, created_at, rank, highlight
+        """
+        tsquery = SearchService._tsquery(query, match_any)
+        rank = func.ts_rank_cd(ConversationMessage.search_vector, tsquery)
+        matches = select(
+            ConversationMessage.id,
+            ConversationMessage.chat_guid,
+            ConversationMessage.role,
+            ConversationMessage.content,
+            ConversationMessage.task_id,
+            ConversationMessage.created_at,
+            rank.label("rank")
+        ).where(
+            ConversationMessage.user_id == user_id,
+            ConversationMessage.search_vector.bool_op("@@")(tsquery)
+        )
+        if chat_guid:
+            matches = matches.where(ConversationMessage.chat_guid == chat_guid)
+        if since:
+            matches = matches.where(ConversationMessage.created_at >= since)
+        if until:
+            matches = matches.where(ConversationMessage.created_at < until)
+        page = matches.order_by(desc("rank"), desc(ConversationMessage.created_at)).limit(limit).subquery()
+        
+        result = await db.execute(
+            select(
+                page.c.id,
+                page.c.chat_guid,
+                page.c.role,
+                page.c.content,
+                page.c.task_id,
+                page.c.created_at,
+                page.c.rank,
+                SearchService._highlight(page.c.content, tsquery)
+            ).order_by(desc(page.c.rank), desc(page.c.created_at))
+        )
+        rows = result.all()
+        logger.debug(f"Message search for user {user_id} returned {len(rows)} results")
+        return rows
+    
+    @staticmethod
+    async def search_tasks_async(
+        db: AsyncSession,
+        user_id: UUID,
+        query: str,
+        limit: int = 20,
+        task_type: Optional[TaskType] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        match_any: bool = False
+    ) -> List[Row]:
+        """Search tasks (input and output); since/until also prune partitions
+        
+        Returns:
+            Rows with id, type, status, input, output, created_at, rank, highlight
+        """
+        tsquery = SearchService._tsquery(query, match_any)
+        rank = func.ts_rank_cd(Task.search_vector, tsquery)
+        matches = select(
+            Task.id,
+            Task.type,
+            Task.status,
+            Task.input,
+            Task.output,
+            Task.created_at,
+            rank.label("rank")
+        ).where(
+            Task.user_id == user_id,
+            Task.search_vector.bool_op("@@")(tsquery)
+        )
+        if task_type:
+            matches = matches.where(Task.type == task_type)
+        if since:
+            matches = matches.where(Task.created_at >= since)
+        if until:
+            matches = matches.where(Task.created_at < until)
+        page = matches.order_by(desc("rank"), desc(Task.created_at)).limit(limit).subquery()
+        
+        searched = page.c.input + " " + func.coalesce(page.c.output, "")
+        result = await db.execute(
+            select(
+                page.c.id,
+                page.c.type,
+                page.c.status,
+                page.c.input,
+                page.c.output,
+                page.c.created_at,
+                page.c.rank,
+                SearchService._highlight(searched, tsquery)
+            ).order_by(desc(page.c.rank), desc(page.c.created_at))
+        )
+        rows = result.all()
+        logger.debug(f"Task search for user {user_id} returned {len(rows)} results")
+        return rows
+    
+    @staticmethod
+    def _tsquery(query: str, match_any: bool) -> ColumnElement:
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        if match_any:
+            # 'a' & 'b' -> 'a' | 'b' (quotes and negations are not meaningful here)
+            plain = func.plainto_tsquery(SEARCH_CONFIG, query)
+            tsquery = cast(func.replace(cast(plain, Text), "&", "|"), TSQUERY)
+        return tsquery
+    
+    @staticmethod
+    def _highlight(content: ColumnElement, tsquery: ColumnElement) -> ColumnElement:
+        escaped = func.replace(func.replace(func.replace(content, "&", "&amp;"), "<", "&lt;"), ">", "&gt;")
+        return func.ts_headline(SEARCH_CONFIG, escaped, tsquery, HIGHLIGHT_OPTIONS).label("highlight")
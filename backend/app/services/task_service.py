@@ -1,8 +1,10 @@
 """
 Task service for managing tasks
 """
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 from datetime import datetime
 from app.models.task import Task, TaskType, TaskStatus
@@ -25,7 +27,7 @@ class TaskService:
             type=TaskType(task_data.get("type", "text")),
             input=task_data.get("input", ""),
             status=TaskStatus.PENDING,
-            metadata=task_data.get("metadata")
+            tast_metadata=task_data.get("metadata")
         )
         db.add(task)
         db.commit()
@@ -47,17 +49,43 @@ class TaskService:
         task_type: Optional[TaskType] = None,
         status: Optional[TaskStatus] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[Tuple[datetime, UUID]] = None
     ) -> List[Task]:
-        """List tasks for a user"""
-        query = db.query(Task).filter(Task.user_id == user_id)
+        """List tasks for a user, newest first
+        
+        Args:
+            after: (created_at, id) of the last task on the previous page (keyset
+                pagination; see app.utils.pagination). Use instead of offset.
+        """
+        query = TaskService._list_query(user_id, task_type, status, limit, offset, after)
+        return list(db.execute(query).scalars().all())
+    
+    @staticmethod
+    def _list_query(
+        user_id: UUID,
+        task_type: Optional[TaskType],
+        status: Optional[TaskStatus],
+        limit: int,
+        offset: int,
+        after: Optional[Tuple[datetime, UUID]]
+    ):
+        """Served by ix_tasks_user_created / ix_tasks_user_type_created / ix_tasks_user_status_created"""
+        query = select(Task).where(Task.user_id == user_id)
         
         if task_type:
-            query = query.filter(Task.type == task_type)
+            query = query.where(Task.type == task_type)
         if status:
-            query = query.filter(Task.status == status)
+            query = query.where(Task.status == status)
+        if after:
+            # Row comparison continues the index scan right after the previous page
+            query = query.where(tuple_(Task.created_at, Task.id) < tuple_(*after))
         
-        return query.order_by(Task.created_at.desc()).offset(offset).limit(limit).all()
+        # id breaks ties between tasks created in the same transaction
+        query = query.order_by(Task.created_at.desc(), Task.id.desc())
+        if offset:
+            query = query.offset(offset)
+        return query.limit(limit)
     
     @staticmethod
     def update_task(
@@ -78,9 +106,77 @@ class TaskService:
         if status is not None:
             task.status = status
         if metadata is not None:
-            task.metadata = metadata
+            task.tast_metadata = metadata
         
         db.commit()
         db.refresh(task)
         return task
-
+    
+    # Async variants (AsyncSession), used on the event loop
+    
+    @staticmethod
+    async def create_task_async(
+        db: AsyncSession,
+        user_id: UUID,
+        task_data: Dict[str, Any]
+    ) -> Task:
+        """Create a new task"""
+        task = Task(
+            user_id=user_id,
+            type=TaskType(task_data.get("type", "text")),
+            input=task_data.get("input", ""),
+            status=TaskStatus.PENDING,
+            tast_metadata=task_data.get("metadata")
+        )
+        db.add(task)
+        await db.commit()
+        await db.refresh(task)
+        return task
+    
+    @staticmethod
+    async def get_task_async(db: AsyncSession, task_id: UUID, user_id: UUID) -> Optional[Task]:
+        """Get a task by ID"""
+        result = await db.execute(select(Task).where(
+            Task.id == task_id,
+            Task.user_id == user_id
+        ))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def list_tasks_async(
+        db: AsyncSession,
+        user_id: UUID,
+        task_type: Optional[TaskType] = None,
+        status: Optional[TaskStatus] = None,
+        limit: int = 50,
+        offset: int = 0,
+        after: Optional[Tuple[datetime, UUID]] = None
+    ) -> List[Task]:
+        """List tasks for a user, newest first (see list_tasks)"""
+        query = TaskService._list_query(user_id, task_type, status, limit, offset, after)
+        result = await db.execute(query)
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def update_task_async(
+        db: AsyncSession,
+        task_id: UUID,
+        user_id: UUID,
+        output: Optional[str] = None,
+        status: Optional[TaskStatus] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Task:
+        """Update a task"""
+        task = await TaskService.get_task_async(db, task_id, user_id)
+        if not task:
+            raise NotFoundError("Task not found")
+        
+        if output is not None:
+            task.output = output
+        if status is not None:
+            task.status = status
+        if metadata is not None:
+            task.tast_metadata = metadata
+        
+        await db.commit()
+        return task
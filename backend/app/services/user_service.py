@@ -1,14 +1,18 @@
 """
 User service
 """
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from uuid import UUID
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.utils.auth import get_password_hash, verify_password
+from app.utils.phone import to_e164
 from app.utils.timezone import detect_timezone_from_phone
-from app.core.exceptions import NotFoundError
+from app.core.chat_owners import chat_owner_cache
+from app.core.exceptions import NotFoundError, ValidationError
 
 
 class UserService:
@@ -17,29 +21,13 @@ class UserService:
     @staticmethod
     def create_user(db: Session, user_data: UserCreate) -> User:
         """Create a new user"""
-        hashed_password = get_password_hash(user_data.password)
-        
-        # Auto-detect timezone from phone number if provided
-        detected_timezone = None
-        if user_data.phone_number:
-            try:
-                detected_timezone = detect_timezone_from_phone(user_data.phone_number)
-            except Exception as e:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Could not detect timezone from phone number {user_data.phone_number}: {e}")
-                # If detection fails, use explicit timezone or None (will use DB default)
-        
-        db_user = User(
-            email=user_data.email,
-            password_hash=hashed_password,
-            phone_number=user_data.phone_number,
-            agent_name=user_data.agent_name,
-            timezone=user_data.timezone or detected_timezone
-        )
+        phone_e164 = UserService._claim_phone_number(db, user_data.phone_number)
+        db_user = UserService._build_user(user_data, phone_e164)
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        # Chats for this number may have been cached as unknown
+        chat_owner_cache.invalidate(phones=[phone_e164])
         return db_user
     
     @staticmethod
@@ -54,23 +42,24 @@ class UserService:
     
     @staticmethod
     def get_user_by_phone_number(db: Session, phone_number: str) -> Optional[User]:
-        """Get user by phone number (normalized comparison)"""
-        if not phone_number:
+        """Get user by phone number (indexed lookup on the E.164 form)"""
+        phone_e164 = to_e164(phone_number)
+        if not phone_e164:
             return None
-        
-        # Normalize phone number for comparison (remove +, spaces, dashes, etc.)
-        normalized = phone_number.replace("+", "").replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
-        
-        # Get all users with phone numbers and compare normalized versions
-        users = db.query(User).filter(User.phone_number.isnot(None)).all()
-        for user in users:
-            if not user.phone_number:
-                continue
-            user_normalized = user.phone_number.replace("+", "").replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
-            if user_normalized == normalized:
-                return user
-        
-        return None
+        return db.query(User).filter(User.phone_e164 == phone_e164).first()
+    
+    @staticmethod
+    def _claim_phone_number(db: Session, phone_number: Optional[str], user_id: Optional[UUID] = None) -> Optional[str]:
+        """Normalize a phone number and make sure no other user has it
+    
+        Returns:
+            The E.164 form, or None for numbers that can't be normalized
+        """
+        phone_e164 = to_e164(phone_number)
+        if phone_e164:
+            owner = db.query(User.id).filter(User.phone_e164 == phone_e164).first()
+            UserService._check_phone_owner(owner.id if owner else None, user_id)
+        return phone_e164
     
     @staticmethod
     def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
@@ -88,8 +77,54 @@ class UserService:
         user = UserService.get_user_by_id(db, user_id)
         if not user:
             raise NotFoundError("User not found")
-        
+    
+        previous_phone_e164 = user.phone_e164
+        phone_e164 = None
         if user_data.phone_number is not None:
+            phone_e164 = UserService._claim_phone_number(db, user_data.phone_number, user.id)
+        UserService._apply_update(user, user_data, phone_e164)
+    
+        db.commit()
+        db.refresh(user)
+        # Cached owners carry agent_name/timezone, and the phone number may have moved
+        chat_owner_cache.invalidate(user_id=user.id, phones=[previous_phone_e164, user.phone_e164])
+        return user
+    
+    @staticmethod
+    def _check_phone_owner(owner_id: Optional[UUID], user_id: Optional[UUID]):
+        if owner_id and owner_id != user_id:
+            raise ValidationError("Phone number is already registered to another account")
+    
+    @staticmethod
+    def _build_user(user_data: UserCreate, phone_e164: Optional[str]) -> User:
+        """Build a new User (password hashing, timezone detection)"""
+        hashed_password = get_password_hash(user_data.password)
+    
+        # Auto-detect timezone from phone number if provided
+        detected_timezone = None
+        if user_data.phone_number:
+            try:
+                detected_timezone = detect_timezone_from_phone(user_data.phone_number)
+            except Exception as e:
+                import logging
+                logger = logging.getLogger(__name__)
+                logger.warning(f"Could not detect timezone from phone number {user_data.phone_number}: {e}")
+                # If detection fails, use explicit timezone or None (will use DB default)
+    
+        return User(
+            email=user_data.email,
+            password_hash=hashed_password,
+            phone_number=user_data.phone_number,
+            phone_e164=phone_e164,
+            agent_name=user_data.agent_name,
+            timezone=user_data.timezone or detected_timezone
+        )
+    
+    @staticmethod
+    def _apply_update(user: User, user_data: UserUpdate, phone_e164: Optional[str]):
+        """Apply an update to a loaded user (phone number already claimed)"""
+        if user_data.phone_number is not None:
+            user.phone_e164 = phone_e164
             user.phone_number = user_data.phone_number
             # Auto-detect timezone when phone number is set/changed
             if not user_data.timezone:  # Only auto-detect if timezone not explicitly set
@@ -100,19 +135,83 @@ class UserService:
                     logger = logging.getLogger(__name__)
                     logger.warning(f"Could not detect timezone from phone number {user_data.phone_number}: {e}")
                     # If detection fails, keep existing timezone or leave as None
-        
+    
         # Set agent_name: use provided value, or default to "Blume" if not set and phone_number is being set
         if user_data.agent_name is not None:
             user.agent_name = user_data.agent_name
         elif user_data.phone_number is not None and not user.agent_name:
             # If phone number is being set but agent_name is not provided and user doesn't have one, default to "Blume"
             user.agent_name = "Blume"
-        
+    
         # Allow explicit timezone override
         if user_data.timezone is not None:
             user.timezone = user_data.timezone
-        
-        db.commit()
-        db.refresh(user)
+    
+    # Async variants (AsyncSession), used on the event loop
+    
+    @staticmethod
+    async def create_user_async(db: AsyncSession, user_data: UserCreate) -> User:
+        """Create a new user"""
+        phone_e164 = await UserService._claim_phone_number_async(db, user_data.phone_number)
+        db_user = UserService._build_user(user_data, phone_e164)
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        chat_owner_cache.invalidate(phones=[phone_e164])
+        return db_user
+    
+    @staticmethod
+    async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+        """Get user by email"""
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_user_by_id_async(db: AsyncSession, user_id: UUID) -> Optional[User]:
+        """Get user by ID"""
+        return await db.get(User, user_id)
+    
+    @staticmethod
+    async def get_user_by_phone_number_async(db: AsyncSession, phone_number: str) -> Optional[User]:
+        """Get user by phone number (indexed lookup on the E.164 form)"""
+        phone_e164 = to_e164(phone_number)
+        if not phone_e164:
+            return None
+        result = await db.execute(select(User).where(User.phone_e164 == phone_e164))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def _claim_phone_number_async(db: AsyncSession, phone_number: Optional[str], user_id: Optional[UUID] = None) -> Optional[str]:
+        phone_e164 = to_e164(phone_number)
+        if phone_e164:
+            owner_id = await db.scalar(select(User.id).where(User.phone_e164 == phone_e164))
+            UserService._check_phone_owner(owner_id, user_id)
+        return phone_e164
+    
+    @staticmethod
+    async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> Optional[User]:
+        """Authenticate a user"""
+        user = await UserService.get_user_by_email_async(db, email)
+        if not user:
+            return None
+        if not verify_password(password, user.password_hash):
+            return None
+        return user
+    
+    @staticmethod
+    async def update_user_async(db: AsyncSession, user_id: UUID, user_data: UserUpdate) -> User:
+        """Update user information"""
+        user = await UserService.get_user_by_id_async(db, user_id)
+        if not user:
+            raise NotFoundError("User not found")
+    
+        previous_phone_e164 = user.phone_e164
+        phone_e164 = None
+        if user_data.phone_number is not None:
+            phone_e164 = await UserService._claim_phone_number_async(db, user_data.phone_number, user.id)
+        UserService._apply_update(user, user_data, phone_e164)
+    
+        await db.commit()
+        await db.refresh(user)
+        chat_owner_cache.invalidate(user_id=user.id, phones=[previous_phone_e164, user.phone_e164])
         return user
-
@@ -0,0 +1,83 @@
+"""
+In-memory caching utilities
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[V]):
+    """Bounded LRU cache with per-entry expiry
+
+    Entries expire `ttl` seconds after they were set (a per-entry ttl can
+    override the default). When the cache is full, the least recently used
+    entry is evicted. Not thread-safe; intended for use on the event loop.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[V]:
+        """Get a live entry and mark it recently used"""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None):
+        """Set an entry, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def add(self, key: Hashable, value: V, ttl: Optional[float] = None) -> bool:
+        """Set an entry only if no live entry exists
+
+        Returns:
+            True if the entry was added, False if the key was already present
+        """
+        if key in self:
+            return False
+        self.set(key, value, ttl)
+        return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Optional[V]:
+        """Remove an entry and return its value"""
+        item = self._data.pop(key, None)
+        if item is None:
+            return default
+        return item[1]
+
+    def pop_where(self, predicate: Callable[[V], bool]) -> int:
+        """Remove every entry whose value matches predicate (O(n))
+
+        Returns:
+            Number of entries removed
+        """
+        keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        """Remove all entries"""
+        self._data.clear()
@@ -0,0 +1,40 @@
+"""
+Time-ordered identifiers
+"""
+import os
+import random
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_seq = 0
+
+
+def uuid7() -> uuid.UUID:
+    """Generate a UUIDv7 (RFC 9562)
+
+    48-bit Unix millisecond timestamp, then a 12-bit sequence and 62 random
+    bits. IDs from one process are strictly increasing: within the same
+    millisecond the sequence is incremented (starting from a random value in
+    the lower half, so there's room to count up). New rows therefore land at
+    the right edge of the primary-key B-tree instead of on random pages.
+    """
+    global _last_ms, _last_seq
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            seq = random.getrandbits(11)
+        else:
+            # Same millisecond (or the clock went back): keep counting from the last ID
+            ms = _last_ms
+            seq = _last_seq + 1
+            if seq > 0xFFF:
+                ms += 1
+                seq = random.getrandbits(11)
+        _last_ms, _last_seq = ms, seq
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | seq << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=value)
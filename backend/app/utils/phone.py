@@ -0,0 +1,34 @@
+"""
+Phone number normalization utilities
+"""
+import logging
+from typing import Optional
+
+import phonenumbers
+from phonenumbers import NumberParseException
+
+logger = logging.getLogger(__name__)
+
+
+def to_e164(phone_number: Optional[str], default_region: str = "US") -> Optional[str]:
+    """Normalize a phone number to E.164 (e.g. '+14089167303')
+    
+    Numbers without a country code are parsed with default_region, matching
+    detect_timezone_from_phone. Returns None if the number can't be parsed or
+    is not a possible number.
+    """
+    if not phone_number:
+        return None
+    
+    try:
+        parsed_number = phonenumbers.parse(phone_number, None)
+    except NumberParseException:
+        try:
+            parsed_number = phonenumbers.parse(phone_number, default_region)
+        except NumberParseException:
+            logger.debug(f"Could not parse phone number: {phone_number}")
+            return None
+    
+    if not phonenumbers.is_possible_number(parsed_number):
+        return None
+    return phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.E164)
@@ -0,0 +1,226 @@
+"""
+Benchmark: column-projected history reads vs full ORM entity loads
+
+Compares, against the real database, the two hot read paths of a turn:
+- ConversationService.get_recent_history_async: (role, content) tuples vs
+  ConversationMessage objects
+- SchedulingHandler._get_most_recent_event_id: three JSON paths vs 20 full
+  Task objects (with their whole tast_metadata documents)
+
+For each it reports latency (p50/p95 over --iterations) and Python memory
+allocated per call (tracemalloc, measured in a separate pass since tracing
+slows everything down).
+
+Usage (from backend/):
+    python -m scripts.bench_history --seed-turns 200 --metadata-bytes 2000
+    python -m scripts.bench_history --user-id <uuid> --chat-guid "iMessage;-;+1..."
+
+--seed-turns creates a throwaway user with that many conversation turns and
+scheduling tasks (removed again unless --keep).
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+BENCH_CHAT_GUID = "iMessage;-;+15550009999"
+
+
+def seed(turns: int, metadata_bytes: int):
+    """Create a user with `turns` history turns and scheduling tasks; returns the user id"""
+    from app.core.database import SessionLocal
+    from app.models.conversation_message import ConversationMessage
+    from app.models.task import Task, TaskType, TaskStatus
+    from app.schemas.user import UserCreate
+    from app.services.user_service import UserService
+
+    db = SessionLocal()
+    try:
+        user = UserService.create_user(db, UserCreate(
+            email=f"bench+{uuid.uuid4().hex[:12]}@example.com",
+            password=uuid.uuid4().hex,
+            agent_name="Bench"
+        ))
+        padding = "x" * metadata_bytes  # Stands in for large handler results stored in metadata
+        for i in range(turns):
+            task = Task(
+                user_id=user.id,
+                type=TaskType.TEXT,
+                input=f"Can you move meeting {i} to tomorrow at 3pm?",
+                output=f"Done - meeting {i} now starts tomorrow at 3pm.",
+                status=TaskStatus.COMPLETED,
+                tast_metadata={
+                    "chat_guid": BENCH_CHAT_GUID,
+                    "conversation": True,
+                    "handler": "scheduling_handler",
+                    "metadata": {"event_id": f"event-{i}", "details": padding},
+                }
+            )
+            db.add(task)
+            db.flush()
+            db.add_all([
+                ConversationMessage(user_id=user.id, chat_guid=BENCH_CHAT_GUID, role="user", content=task.input, task_id=task.id),
+                ConversationMessage(user_id=user.id, chat_guid=BENCH_CHAT_GUID, role="assistant", content=task.output, task_id=task.id),
+            ])
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def cleanup(user_id):
+    from app.core.database import SessionLocal
+    from app.models.conversation_message import ConversationMessage
+    from app.models.task import Task
+    from app.models.user import User
+
+    db = SessionLocal()
+    try:
+        db.query(ConversationMessage).filter(ConversationMessage.user_id == user_id).delete()
+        db.query(Task).filter(Task.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_cases(user_id, chat_guid: str, limit: int) -> Dict[str, Callable[[Any], Awaitable[Any]]]:
+    """name -> coroutine function taking an AsyncSession"""
+    from app.models.conversation_message import ConversationMessage
+    from app.models.task import Task
+    from app.services.agent.handlers.scheduling_handler import SchedulingHandler
+    from app.services.conversation_service import ConversationService
+
+    history_query = ConversationService._history_query(user_id, limit, chat_guid)
+    event_id_query = SchedulingHandler._event_id_query(user_id, chat_guid)
+
+    async def history_entities(db):
+        result = await db.execute(history_query.with_only_columns(ConversationMessage))
+        return [{"role": m.role, "content": m.content} for m in reversed(result.scalars().all())]
+
+    async def history_projected(db):
+        result = await db.execute(history_query)
+        return ConversationService._to_history(result.all())
+
+    async def event_id_entities(db):
+        result = await db.execute(event_id_query.with_only_columns(Task))
+        for task in result.scalars().all():
+            metadata = task.tast_metadata or {}
+            if metadata.get("handler") == "scheduling_handler" and (metadata.get("metadata") or {}).get("event_id"):
+                return metadata["metadata"]["event_id"]
+            if metadata.get("event_id"):
+                return metadata["event_id"]
+        return None
+
+    async def event_id_projected(db):
+        result = await db.execute(event_id_query)
+        for handler, nested_event_id, event_id in result.all():
+            if handler == "scheduling_handler" and nested_event_id:
+                return nested_event_id
+            if event_id:
+                return event_id
+        return None
+
+    return {
+        "history / entities": history_entities,
+        "history / projected": history_projected,
+        "event_id / entities": event_id_entities,
+        "event_id / projected": event_id_projected,
+    }
+
+
+def percentile(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))]
+
+
+async def measure(case: Callable[[Any], Awaitable[Any]], iterations: int, warmup: int) -> Dict[str, Any]:
+    from app.core.database import AsyncSessionLocal
+
+    # A fresh session per call, like a turn
+    for _ in range(warmup):
+        async with AsyncSessionLocal() as db:
+            await case(db)
+
+    latencies = []
+    for _ in range(iterations):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await case(db)
+            latencies.append(time.perf_counter() - start)
+
+    # Separate pass: tracing skews timings
+    allocated = []
+    tracemalloc.start()
+    try:
+        for _ in range(max(1, iterations // 10)):
+            async with AsyncSessionLocal() as db:
+                await db.connection()  # Check out before measuring
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                await case(db)
+                _, peak = tracemalloc.get_traced_memory()
+                allocated.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "peak_alloc_kb": round(sum(allocated) / len(allocated) / 1024, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from app.core.database import async_engine
+
+    user_id = uuid.UUID(args.user_id) if args.user_id else None
+    seeded = False
+    if args.seed_turns:
+        user_id = await asyncio.to_thread(seed, args.seed_turns, args.metadata_bytes)
+        seeded = True
+    chat_guid = args.chat_guid or BENCH_CHAT_GUID
+
+    try:
+        report = {}
+        for name, case in build_cases(user_id, chat_guid, args.limit).items():
+            report[name] = await measure(case, args.iterations, args.warmup)
+        return report
+    finally:
+        if seeded and not args.keep:
+            await asyncio.to_thread(cleanup, user_id)
+        await async_engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark projected vs entity history queries")
+    parser.add_argument("--user-id", help="Existing user to read history for")
+    parser.add_argument("--chat-guid", help=f"Chat to read (default: {BENCH_CHAT_GUID})")
+    parser.add_argument("--seed-turns", type=int, default=0, help="Create a throwaway user with this many turns")
+    parser.add_argument("--metadata-bytes", type=int, default=2000, help="Padding per seeded task's metadata")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded user and rows")
+    parser.add_argument("--limit", type=int, default=10, help="History turns per read (as in AgentService)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.user_id and not args.seed_turns:
+        parser.error("pass --user-id or --seed-turns")
+
+    report = asyncio.run(run(args))
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{'case':<24}{'p50':>10}{'p95':>10}{'alloc/call':>14}")
+    for name, result in report.items():
+        print(f"{name:<24}{result['p50_ms']:>8}ms{result['p95_ms']:>8}ms{result['peak_alloc_kb']:>11}KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Webhook record/replay load generator
+
+Measures how many messages per second the pipeline sustains end to end:
+webhook → parse_bluebubbles_message → MessageProcessor → handlers → BlueBubblesService.send_message.
+
+Recording:
+    Set WEBHOOK_RECORD_PATH=webhooks.jsonl on a running server. Every BlueBubbles
+    webhook is appended as {"received_at": ..., "payload": {...}}.
+
+Replaying (from backend/):
+    python -m scripts.loadgen webhooks.jsonl --rate 20 --count 500 --llm-latency 0.8
+
+The app runs in-process, with BlueBubbles and Groq replaced by a local stub
+server that answers after a configurable latency. The database is real:
+DATABASE_URL must point at a database with users for the recorded chats, or
+use --chats N --seed-users to rewrite payloads onto N synthetic chats and
+create a user for each.
+
+Turn latency is measured from the webhook POST to the stub receiving the reply
+for that chat (replies are matched to messages in order per chat), so message
+debouncing is disabled during replays.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+# Stand-in latencies, set from the command line before the stub server starts
+STUB_LATENCY = {"llm": 0.8, "bluebubbles": 0.05, "jitter": 0.2}
+
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    """Read webhook payloads from a JSONL recording"""
+    payloads = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            payloads.append(record.get("payload", record))
+    return payloads
+
+
+def synthetic_phone(index: int) -> str:
+    return f"+1555{index:07d}"
+
+
+def prepare_payload(payload: Dict[str, Any], index: int, chats: int) -> Dict[str, Any]:
+    """Copy a recorded payload with a fresh message GUID (so dedupe doesn't drop repeats)
+
+    With chats > 0 the payload is also moved onto one of `chats` synthetic chats.
+    """
+    payload = json.loads(json.dumps(payload))
+    data = payload.get("data") or {}
+    data["guid"] = f"loadgen-{uuid.uuid4()}"
+    data["isFromMe"] = False
+    if chats > 0:
+        phone = synthetic_phone(index % chats)
+        data["chats"] = [{"guid": f"iMessage;-;{phone}"}]
+        data["handle"] = {"address": phone}
+    payload["data"] = data
+    return payload
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    index = min(len(samples) - 1, max(0, int(round(q / 100 * (len(samples) - 1)))))
+    return samples[index]
+
+
+class ReplyTracker:
+    """Matches replies seen by the BlueBubbles stub to replayed messages, in order per chat"""
+
+    def __init__(self):
+        self._sent: Dict[str, Deque[float]] = defaultdict(deque)
+        self.latencies: List[float] = []
+        self.unmatched = 0
+
+    def sent(self, chat_guid: str):
+        self._sent[chat_guid].append(time.perf_counter())
+
+    def replied(self, chat_guid: str):
+        pending = self._sent.get(chat_guid)
+        if not pending:
+            self.unmatched += 1
+            return
+        self.latencies.append(time.perf_counter() - pending.popleft())
+
+    @property
+    def outstanding(self) -> int:
+        return sum(len(pending) for pending in self._sent.values())
+
+
+tracker = ReplyTracker()
+
+
+def build_stub_app():
+    """FastAPI app standing in for the BlueBubbles server and the Groq API"""
+    from fastapi import FastAPI, Request
+
+    stub = FastAPI()
+
+    async def delay(kind: str):
+        base = STUB_LATENCY[kind]
+        jitter = STUB_LATENCY["jitter"]
+        await asyncio.sleep(max(0.0, base * random.uniform(1 - jitter, 1 + jitter)))
+
+    @stub.post("/api/v1/message/text")
+    async def send_text(request: Request):
+        body = await request.json()
+        await delay("bluebubbles")
+        chat_guid = body.get("chatGuid") or ""
+        tracker.replied(chat_guid)
+        return {"status": 200, "message": "Message sent!", "data": {"guid": f"stub-{uuid.uuid4()}", "chatGuid": chat_guid}}
+
+    @stub.get("/api/v1/chat")
+    async def get_chats():
+        return {"status": 200, "data": []}
+
+    @stub.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await delay("llm")
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "Got it! (stub reply)"},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    return stub
+
+
+async def start_stub_server(port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(build_stub_app(), host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()  # Surface startup errors (e.g. port in use)
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+def seed_users(chats: int):
+    """Create a user for each synthetic chat (skips users that already exist)"""
+    from app.core.database import SessionLocal
+    from app.models.user import User
+    from app.schemas.user import UserCreate
+    from app.services.user_service import UserService
+
+    db = SessionLocal()
+    try:
+        for i in range(chats):
+            email = f"loadgen+{i}@example.com"
+            if db.query(User).filter(User.email == email).first():
+                continue
+            UserService.create_user(db, UserCreate(
+                email=email,
+                password=uuid.uuid4().hex,
+                phone_number=synthetic_phone(i),
+                agent_name="Loadgen"
+            ))
+    finally:
+        db.close()
+
+
+def stage_breakdown(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Pick the per-stage histograms out of a metrics snapshot"""
+    wanted = (
+        "ingestion.wait_seconds",
+        "dispatcher.lane_wait_seconds",
+        "messages.stage_seconds",
+        "messages.turn_seconds",
+        "jobs.run_seconds",
+        "db.pool.checkout_wait_seconds",
+    )
+    return {
+        name: summary
+        for name, summary in sorted(snapshot["histograms"].items())
+        if name.startswith(wanted) and summary["count"]
+    }
+
+
+async def replay(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    STUB_LATENCY.update(llm=args.llm_latency, bluebubbles=args.bluebubbles_latency, jitter=args.jitter)
+    server, server_task = await start_stub_server(args.port)
+
+    # Point the app at the stubs before its settings are loaded
+    stub_url = f"http://127.0.0.1:{args.port}"
+    os.environ["BLUEBUBBLES_SERVER_URL"] = stub_url
+    os.environ["GROQ_BASE_URL"] = stub_url
+    os.environ["GROQ_API_KEY"] = "loadgen"
+    os.environ["BLUEBUBBLES_SERVER_PASSWORD"] = "loadgen"
+    os.environ["MESSAGE_DEBOUNCE_SECONDS"] = "0"
+    os.environ["WEBHOOK_RECORD_PATH"] = ""
+
+    from app.core.metrics import metrics
+    from app.main import app, startup_event, shutdown_event
+
+    if args.seed_users:
+        await asyncio.to_thread(seed_users, args.chats)
+
+    recording = load_recording(args.recording)
+    if not recording:
+        raise SystemExit(f"No payloads in {args.recording}")
+    count = args.count or len(recording)
+
+    statuses: Dict[str, int] = defaultdict(int)
+    await startup_event()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadgen")
+
+    async def post(payload: Dict[str, Any]):
+        chats = payload["data"].get("chats") or [{}]
+        tracker.sent(chats[0].get("guid", ""))
+        response = await client.post("/api/v1/webhooks/bluebubbles", json=payload)
+        body = response.json()
+        status = (body.get("admission") or body.get("status")) if isinstance(body, dict) else None
+        statuses[f"{response.status_code} {status or ''}".strip()] += 1
+
+    start = time.perf_counter()
+    posts = []
+    for i in range(count):
+        # Open-loop schedule: send at the target rate regardless of how fast replies come back
+        delay = start + i / args.rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        payload = prepare_payload(recording[i % len(recording)], i, args.chats)
+        posts.append(asyncio.create_task(post(payload)))
+    await asyncio.gather(*posts)
+    send_seconds = time.perf_counter() - start
+
+    # Wait for the replies to drain
+    wait_until = time.perf_counter() + args.timeout
+    while tracker.outstanding and time.perf_counter() < wait_until:
+        await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - start
+
+    snapshot = metrics.snapshot()
+    await shutdown_event()
+    await client.aclose()
+    server.should_exit = True
+    await server_task
+
+    latencies = tracker.latencies
+    return {
+        "sent": count,
+        "target_rate": args.rate,
+        "achieved_send_rate": round(count / send_seconds, 2) if send_seconds else None,
+        "replies": len(latencies),
+        "unanswered": tracker.outstanding,
+        "unmatched_replies": tracker.unmatched,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_second": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "turn_latency_seconds": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        },
+        "webhook_responses": dict(statuses),
+        "stages": stage_breakdown(snapshot),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    def fmt(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value * 1000:.0f}ms"
+
+    latency = report["turn_latency_seconds"]
+    print(f"Sent {report['sent']} messages at {report['achieved_send_rate']}/s (target {report['target_rate']}/s)")
+    print(f"Replies: {report['replies']}  unanswered: {report['unanswered']}  unmatched: {report['unmatched_replies']}")
+    print(f"Throughput: {report['throughput_per_second']} turns/s over {report['elapsed_seconds']}s")
+    print(f"Turn latency: p50 {fmt(latency['p50'])}  p95 {fmt(latency['p95'])}  p99 {fmt(latency['p99'])}  max {fmt(latency['max'])}")
+    print(f"Webhook responses: {report['webhook_responses']}")
+    print("Stages:")
+    for name, summary in report["stages"].items():
+        print(f"  {name:<60} n={summary['count']:<6} p50 {fmt(summary['p50'])}  p95 {fmt(summary['p95'])}  p99 {fmt(summary['p99'])}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay recorded BlueBubbles webhooks against stubbed BlueBubbles and Groq")
+    parser.add_argument("recording", help="JSONL file written via WEBHOOK_RECORD_PATH")
+    parser.add_argument("--rate", type=float, default=10, help="Messages per second")
+    parser.add_argument("--count", type=int, default=0, help="Messages to send (default: one pass over the recording)")
+    parser.add_argument("--chats", type=int, default=0, help="Rewrite payloads onto this many synthetic chats")
+    parser.add_argument("--seed-users", action="store_true", help="Create a user for each synthetic chat")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="Stub Groq latency in seconds")
+    parser.add_argument("--bluebubbles-latency", type=float, default=0.05, help="Stub BlueBubbles latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency jitter as a fraction of the base latency")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the stub server")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for outstanding replies")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.seed_users and not args.chats:
+        parser.error("--seed-users requires --chats")
+
+    report = asyncio.run(replay(args))
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Test configuration
+
+Settings without defaults get placeholder values so app modules import
+without a .env file. Nothing here connects to Postgres, Groq or BlueBubbles.
+"""
+import os
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("BLUEBUBBLES_SERVER_PASSWORD", "test-password")
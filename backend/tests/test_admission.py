@@ -0,0 +1,68 @@
+"""
+Admission control thresholds
+"""
+import pytest
+
+from app.core import admission
+from app.core.admission import Admission, AdmissionController, TURN_LATENCY_METRIC
+from app.core.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(admission, "metrics", registry)
+    return registry
+
+
+@pytest.fixture
+def controller(registry):
+    return AdmissionController(
+        degrade_depth=10,
+        shed_depth=20,
+        degrade_p95_seconds=5,
+        shed_p95_seconds=15,
+        min_samples=5
+    )
+
+
+def record_turns(registry: MetricsRegistry, seconds: float, count: int = 10):
+    for _ in range(count):
+        registry.histogram(TURN_LATENCY_METRIC).observe(seconds)
+
+
+@pytest.mark.parametrize("depth, expected", [
+    (0, Admission.ACCEPT),
+    (9, Admission.ACCEPT),
+    (10, Admission.DEGRADED),
+    (19, Admission.DEGRADED),
+    (20, Admission.SHED),
+    (500, Admission.SHED),
+])
+def test_queue_depth_thresholds(controller, depth, expected):
+    assert controller.decide(depth) == expected
+
+
+def test_latency_thresholds_apply_while_work_is_queued(controller, registry):
+    record_turns(registry, 6)
+    assert controller.decide(1) == Admission.DEGRADED
+    record_turns(registry, 20, count=100)
+    assert controller.decide(1) == Admission.SHED
+
+
+def test_slow_turns_with_an_empty_queue_are_accepted(controller, registry):
+    record_turns(registry, 60)
+    assert controller.decide(0) == Admission.ACCEPT
+
+
+def test_latency_is_ignored_until_there_are_enough_samples(controller, registry):
+    record_turns(registry, 60, count=4)
+    assert controller.decide(1) == Admission.ACCEPT
+
+
+def test_decisions_are_counted(controller, registry):
+    controller.decide(0)
+    controller.decide(25)
+    controller.decide(25)
+    assert registry.counter("admission.decisions", {"decision": "accept"}).value == 1
+    assert registry.counter("admission.decisions", {"decision": "shed"}).value == 2
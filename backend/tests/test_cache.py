@@ -0,0 +1,78 @@
+"""
+TTLCache: LRU eviction and per-entry expiry
+"""
+from app.utils import cache
+from app.utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_cache(monkeypatch, max_entries: int = 3, ttl: float = 10):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return TTLCache(max_entries=max_entries, ttl=ttl), clock
+
+
+def test_get_and_default(monkeypatch):
+    entries, _ = make_cache(monkeypatch)
+    entries.set("a", 1)
+    assert entries.get("a") == 1
+    assert entries.get("missing") is None
+    assert entries.get("missing", "default") == "default"
+
+
+def test_entries_expire(monkeypatch):
+    entries, clock = make_cache(monkeypatch)
+    entries.set("a", 1)
+    entries.set("b", 2, ttl=30)
+    clock.now += 10
+    assert entries.get("a") is None
+    assert "a" not in entries
+    assert entries.get("b") == 2
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    entries, _ = make_cache(monkeypatch, max_entries=2)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")  # "b" is now least recently used
+    entries.set("c", 3)
+    assert len(entries) == 2
+    assert "a" in entries and "c" in entries
+    assert "b" not in entries
+
+
+def test_add_only_sets_missing_or_expired_keys(monkeypatch):
+    entries, clock = make_cache(monkeypatch)
+    assert entries.add("a", 1)
+    assert not entries.add("a", 2)
+    assert entries.get("a") == 1
+    clock.now += 11
+    assert entries.add("a", 3)
+    assert entries.get("a") == 3
+
+
+def test_falsy_values_are_cached(monkeypatch):
+    entries, _ = make_cache(monkeypatch)
+    entries.set("none", None)
+    entries.set("zero", 0)
+    assert "none" in entries
+    assert entries.get("zero", "default") == 0
+
+
+def test_pop_pop_where_and_clear(monkeypatch):
+    entries, _ = make_cache(monkeypatch, max_entries=10)
+    for key, value in (("a", 1), ("b", 2), ("c", 3), ("d", 4)):
+        entries.set(key, value)
+    assert entries.pop("a") == 1
+    assert entries.pop("a", "gone") == "gone"
+    assert entries.pop_where(lambda value: value % 2 == 0) == 2
+    assert "c" in entries and len(entries) == 1
+    entries.clear()
+    assert len(entries) == 0
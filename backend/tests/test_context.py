@@ -0,0 +1,101 @@
+"""
+Token-budgeted LLM context (build_context)
+"""
+import pytest
+
+from app.core.config import settings
+from app.services.agent import context
+from app.services.agent.context import MESSAGE_OVERHEAD_TOKENS, TRUNCATION_MARKER, build_context, count_tokens
+from app.services.agent.llm.base import FunctionDefinition
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # The ~4 characters per token estimate, whether or not tiktoken is installed here
+    monkeypatch.setattr(context, "_encoder", lambda: None)
+    monkeypatch.setattr(settings, "LLM_CONTEXT_MAX_MESSAGE_TOKENS", 50)
+
+
+def turns(count: int, size: int = 40):
+    history = []
+    for i in range(count):
+        history.append({"role": "user", "content": f"q{i}".ljust(size, ".")})
+        history.append({"role": "assistant", "content": f"a{i}".ljust(size, ".")})
+    return history
+
+
+def test_history_that_fits_is_kept_in_order():
+    history = turns(3)
+    messages = build_context("You are Blume.", history, "What next?", name="test", budget=1000)
+    
+    assert [m.role for m in messages] == ["system", "user", "assistant", "user", "assistant", "user", "assistant", "user"]
+    assert [m.content for m in messages[1:-1]] == [m["content"] for m in history]
+    assert messages[0].content == "You are Blume."
+    assert messages[-1].content == "What next?"
+
+
+def test_oldest_messages_are_elided_when_over_budget():
+    history = turns(10)  # 20 messages of 10 + 4 tokens each
+    system, user_input = "You are Blume.", "What next?"
+    fixed = count_tokens(system) + count_tokens(user_input) + 2 * MESSAGE_OVERHEAD_TOKENS
+    budget = fixed + 5 * (10 + MESSAGE_OVERHEAD_TOKENS)
+    
+    messages = build_context(system, history, user_input, name="test", budget=budget)
+    
+    kept = messages[1:-1]
+    assert [m.content for m in kept] == [m["content"] for m in history[-5:]]
+    assert "15 earlier messages of this conversation are omitted" in messages[0].content
+
+
+def test_long_messages_are_truncated():
+    history = [{"role": "user", "content": "x" * 1000}, {"role": "assistant", "content": "short"}]
+    messages = build_context("System", history, "Hi", name="test", budget=1000)
+    
+    truncated = messages[1].content
+    assert truncated.endswith(TRUNCATION_MARKER)
+    assert count_tokens(truncated) <= settings.LLM_CONTEXT_MAX_MESSAGE_TOKENS
+    assert messages[2].content == "short"
+
+
+def test_input_and_system_prompt_are_kept_even_over_budget():
+    user_input = "y" * 2000
+    messages = build_context("System", turns(2), user_input, name="test", budget=10)
+    
+    assert [m.role for m in messages] == ["system", "user"]
+    assert messages[-1].content == user_input
+    assert "4 earlier messages" in messages[0].content
+
+
+def test_summary_and_recalled_items_go_into_the_system_prompt():
+    messages = build_context(
+        "System",
+        [],
+        "Hi",
+        name="test",
+        summary="They planned a trip to Lisbon.",
+        recalled=["[email] Flight confirmation", "z" * 1000]
+    )
+    
+    system = messages[0].content
+    assert "Summary of the earlier conversation:\nThey planned a trip to Lisbon." in system
+    assert "- [email] Flight confirmation" in system
+    assert TRUNCATION_MARKER in system
+
+
+def test_function_schemas_count_against_the_budget():
+    function = FunctionDefinition(
+        name="create_event",
+        description="Create a calendar event " * 20,
+        parameters={"type": "object", "properties": {}}
+    )
+    history = turns(5)
+    without = build_context("System", history, "Hi", name="test", budget=200)
+    with_functions = build_context("System", history, "Hi", name="test", budget=200, functions=[function])
+    assert len(with_functions) < len(without)
+
+
+def test_prompt_size_is_recorded_per_handler():
+    histogram = context.metrics.histogram("llm.prompt_tokens_estimated", {"handler": "recorded"})
+    before = histogram.count
+    build_context("System", turns(1), "Hi", name="recorded", budget=1000)
+    assert histogram.count == before + 1
@@ -0,0 +1,87 @@
+"""
+Duplicate webhook suppression by message GUID
+"""
+import asyncio
+
+from app.core.dedupe import MessageDeduplicator
+
+
+def test_first_delivery_is_accepted_and_repeats_are_dropped():
+    deduplicator = MessageDeduplicator(max_entries=100, ttl_seconds=60)
+    
+    async def run():
+        assert not await deduplicator.is_duplicate_async("guid-1")
+        assert await deduplicator.is_duplicate_async("guid-1")
+        assert not await deduplicator.is_duplicate_async("guid-2")
+    
+    asyncio.run(run())
+
+
+def test_messages_without_a_guid_are_always_accepted():
+    deduplicator = MessageDeduplicator(max_entries=100, ttl_seconds=60)
+    
+    async def run():
+        assert not await deduplicator.is_duplicate_async("")
+        assert not await deduplicator.is_duplicate_async("")
+        assert not await deduplicator.is_duplicate_async(None)
+    
+    asyncio.run(run())
+
+
+def test_seen_does_not_mark_and_forget_allows_a_retry():
+    deduplicator = MessageDeduplicator(max_entries=100, ttl_seconds=60)
+    
+    async def run():
+        assert not deduplicator.seen("guid-1")
+        assert not await deduplicator.is_duplicate_async("guid-1")
+        assert deduplicator.seen("guid-1")
+        deduplicator.forget("guid-1")
+        assert not await deduplicator.is_duplicate_async("guid-1")
+    
+    asyncio.run(run())
+
+
+def test_persistent_claim_is_checked_after_the_memory_set(monkeypatch):
+    deduplicator = MessageDeduplicator(max_entries=100, ttl_seconds=60, persistent=True)
+    claimed = set()
+    
+    async def claim(message_guid: str, source: str) -> bool:
+        # Stands in for the processed_messages insert (another process already took guid-2)
+        if message_guid in claimed or message_guid == "guid-2":
+            return False
+        claimed.add(message_guid)
+        return True
+    
+    monkeypatch.setattr(deduplicator, "_claim_persistent_async", claim)
+    
+    async def run():
+        assert not await deduplicator.is_duplicate_async("guid-1")
+        assert await deduplicator.is_duplicate_async("guid-1")
+        assert await deduplicator.is_duplicate_async("guid-2")
+    
+    asyncio.run(run())
+    assert claimed == {"guid-1"}
+
+
+def test_forget_async_releases_the_persistent_claim_too(monkeypatch):
+    deduplicator = MessageDeduplicator(max_entries=100, ttl_seconds=60, persistent=True)
+    claimed = set()
+    
+    async def claim(message_guid: str, source: str) -> bool:
+        if message_guid in claimed:
+            return False
+        claimed.add(message_guid)
+        return True
+    
+    async def release(message_guid: str, source: str):
+        claimed.discard(message_guid)
+    
+    monkeypatch.setattr(deduplicator, "_claim_persistent_async", claim)
+    monkeypatch.setattr(deduplicator, "_release_persistent_async", release)
+    
+    async def run():
+        assert not await deduplicator.is_duplicate_async("guid-1")
+        await deduplicator.forget_async("guid-1")
+        assert not await deduplicator.is_duplicate_async("guid-1")
+    
+    asyncio.run(run())
@@ -0,0 +1,120 @@
+"""
+ChatDispatcher: ordered per-chat lanes, parallel across chats
+"""
+import asyncio
+
+from app.core.dispatcher import ChatDispatcher
+
+
+def test_lane_runs_in_submission_order():
+    dispatcher = ChatDispatcher(max_concurrency=4)
+    order = []
+    
+    async def work(i: int):
+        # Later items finish faster, so only the lane keeps them in order
+        await asyncio.sleep(0.01 * (5 - i))
+        order.append(i)
+        return i
+    
+    async def run():
+        futures = [dispatcher.submit("chat", lambda i=i: work(i)) for i in range(5)]
+        return await asyncio.gather(*futures)
+    
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_one_lane_runs_one_item_at_a_time():
+    dispatcher = ChatDispatcher(max_concurrency=4)
+    running, peak = 0, 0
+    
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+    
+    async def run():
+        await asyncio.gather(*[dispatcher.submit("chat", work) for _ in range(5)])
+    
+    asyncio.run(run())
+    assert peak == 1
+
+
+def test_lanes_run_in_parallel_up_to_the_cap():
+    dispatcher = ChatDispatcher(max_concurrency=2)
+    running, peak = 0, 0
+    
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+    
+    async def run():
+        await asyncio.gather(*[dispatcher.submit(f"chat-{i}", work) for i in range(6)])
+    
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_submit_does_not_wait_for_the_lane():
+    dispatcher = ChatDispatcher(max_concurrency=1)
+    release = None
+    
+    async def blocked():
+        await release.wait()
+    
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        first = dispatcher.submit("chat", blocked)
+        second = dispatcher.submit("chat", blocked)
+        await asyncio.sleep(0)
+        # Both are queued while the first still runs; the caller was never held
+        assert dispatcher.pending("chat") == 2
+        assert not first.done() and not second.done()
+        release.set()
+        await asyncio.gather(first, second)
+        assert dispatcher.active_lanes == 0
+    
+    asyncio.run(run())
+
+
+def test_errors_reach_the_caller_and_the_lane_continues():
+    dispatcher = ChatDispatcher(max_concurrency=1)
+    
+    async def fail():
+        raise ValueError("boom")
+    
+    async def ok():
+        return "ok"
+    
+    async def run():
+        failed = dispatcher.submit("chat", fail)
+        after = dispatcher.submit("chat", ok)
+        results = await asyncio.gather(failed, after, return_exceptions=True)
+        assert isinstance(results[0], ValueError)
+        assert results[1] == "ok"
+    
+    asyncio.run(run())
+
+
+def test_stop_cancels_running_and_queued_work():
+    dispatcher = ChatDispatcher(max_concurrency=1)
+    
+    async def forever():
+        await asyncio.sleep(60)
+    
+    async def run():
+        running = dispatcher.submit("chat", forever)
+        queued = dispatcher.submit("chat", forever)
+        await asyncio.sleep(0)
+        await dispatcher.stop()
+        assert queued.cancelled()
+        assert running.cancelled() or running.done()
+        assert dispatcher.active_lanes == 0
+    
+    asyncio.run(run())
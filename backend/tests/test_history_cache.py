@@ -0,0 +1,88 @@
+"""
+Per-chat history ring buffers
+"""
+from uuid import uuid4
+
+from app.core.history_cache import ChatHistoryCache
+
+CHAT = "iMessage;-;+15550001111"
+
+
+def newest_first(turns: int):
+    """Rows as the history query returns them: (role, content), newest first"""
+    rows = []
+    for i in range(turns):
+        rows += [("user", f"question {i}"), ("assistant", f"answer {i}")]
+    return list(reversed(rows))
+
+
+def test_cold_chat_misses():
+    cache = ChatHistoryCache(max_chats=10, turns=5, ttl_seconds=60)
+    assert cache.get(uuid4(), CHAT, limit=3) is None
+
+
+def test_loaded_chat_serves_any_smaller_limit_chronologically():
+    cache = ChatHistoryCache(max_chats=10, turns=5, ttl_seconds=60)
+    user_id = uuid4()
+    cache.load(user_id, CHAT, newest_first(5))
+    
+    history = cache.get(user_id, CHAT, limit=2)
+    assert history == [
+        {"role": "user", "content": "question 3"},
+        {"role": "assistant", "content": "answer 3"},
+        {"role": "user", "content": "question 4"},
+        {"role": "assistant", "content": "answer 4"},
+    ]
+    assert len(cache.get(user_id, CHAT, limit=5)) == 10
+
+
+def test_limit_beyond_the_buffer_goes_to_the_database():
+    cache = ChatHistoryCache(max_chats=10, turns=5, ttl_seconds=60)
+    user_id = uuid4()
+    cache.load(user_id, CHAT, newest_first(5))
+    assert cache.get(user_id, CHAT, limit=6) is None
+
+
+def test_append_writes_through_and_drops_the_oldest_turn():
+    cache = ChatHistoryCache(max_chats=10, turns=2, ttl_seconds=60)
+    user_id = uuid4()
+    cache.load(user_id, CHAT, newest_first(2))
+    cache.append(user_id, CHAT, [("user", "new question"), ("assistant", "new answer")])
+    
+    assert [m["content"] for m in cache.get(user_id, CHAT, limit=2)] == [
+        "question 1", "answer 1", "new question", "new answer"
+    ]
+
+
+def test_append_to_an_uncached_chat_is_ignored():
+    cache = ChatHistoryCache(max_chats=10, turns=5, ttl_seconds=60)
+    user_id = uuid4()
+    cache.append(user_id, CHAT, [("user", "hello")])
+    assert cache.get(user_id, CHAT, limit=1) is None
+
+
+def test_load_does_not_replace_a_buffer_written_meanwhile():
+    cache = ChatHistoryCache(max_chats=10, turns=5, ttl_seconds=60)
+    user_id = uuid4()
+    cache.load(user_id, CHAT, newest_first(1))
+    cache.append(user_id, CHAT, [("user", "newer"), ("assistant", "reply")])
+    cache.load(user_id, CHAT, newest_first(1))  # A slower concurrent read finishing late
+    assert cache.get(user_id, CHAT, limit=5)[-1]["content"] == "reply"
+
+
+def test_reads_without_a_chat_are_never_cached():
+    cache = ChatHistoryCache(max_chats=10, turns=5, ttl_seconds=60)
+    user_id = uuid4()
+    cache.load(user_id, None, newest_first(2))
+    assert cache.get(user_id, None, limit=1) is None
+
+
+def test_chats_are_per_user_and_invalidate_drops_one():
+    cache = ChatHistoryCache(max_chats=10, turns=5, ttl_seconds=60)
+    alice, bob = uuid4(), uuid4()
+    cache.load(alice, CHAT, newest_first(1))
+    assert cache.get(bob, CHAT, limit=1) is None
+    cache.load(bob, CHAT, newest_first(2))
+    cache.invalidate(alice, CHAT)
+    assert cache.get(alice, CHAT, limit=1) is None
+    assert cache.get(bob, CHAT, limit=1) is not None
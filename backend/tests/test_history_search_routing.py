@@ -0,0 +1,63 @@
+"""Routing of questions about past conversations vs. requests for actions"""
+import pytest
+
+from app.services.agent.agent import AgentService
+from app.services.agent.handlers.base_handler import TaskData
+from app.services.agent.handlers.history_search_handler import HistorySearchHandler
+from app.services.agent.handlers.scheduling_handler import SchedulingHandler
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture(scope="module")
+def agent():
+    return AgentService()
+
+
+def route(agent, text, **metadata):
+    return agent._find_handler(TaskData(input=text, user_id=USER_ID, metadata=metadata))
+
+
+@pytest.mark.parametrize("text", [
+    "What did I tell you about the dentist?",
+    "what did you say about my sister's birthday",
+    "When did we talk about the trip to Lisbon?",
+    "did I ever mention my landlord's name",
+    "Do you remember what restaurant I liked?",
+    "have I told you about the appointment with Dr. Lee?",
+    "what did I ask you about the dentist last week",
+])
+def test_history_questions_route_to_history_search(agent, text):
+    assert isinstance(route(agent, text), HistorySearchHandler)
+
+
+@pytest.mark.parametrize("text", [
+    "remind me what meetings i have tomorrow",
+    "when did i ask you to book the dentist",
+    "did you send the email to bob",
+    "what did you send to bob",
+])
+def test_action_requests_keep_their_handler(agent, text):
+    """Routed exactly as they were before history search existed"""
+    without_history = AgentService()
+    without_history._handlers = [
+        handler for handler in without_history._handlers if not isinstance(handler, HistorySearchHandler)
+    ]
+    handler = route(agent, text)
+    assert not isinstance(handler, HistorySearchHandler)
+    assert type(handler) is type(route(without_history, text))
+
+
+def test_scheduling_requests_still_reach_scheduling(agent):
+    assert isinstance(route(agent, "remind me what meetings i have tomorrow"), SchedulingHandler)
+    assert isinstance(route(agent, "when did i ask you to book the dentist"), SchedulingHandler)
+
+
+def test_pending_update_confirmation_goes_to_scheduling(agent):
+    handler = route(agent, "what did I say about it? yes", pending_update_event_id="evt-1")
+    assert isinstance(handler, SchedulingHandler)
+
+
+def test_history_search_needs_a_user():
+    task = TaskData(input="what did I tell you about the dentist")
+    assert not HistorySearchHandler().can_handle(task)
@@ -0,0 +1,43 @@
+"""
+UUIDv7 generation
+"""
+import time
+import uuid
+
+from app.utils import ids
+from app.utils.ids import uuid7
+
+
+def test_version_and_variant_bits():
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_timestamp_is_unix_milliseconds():
+    before = time.time_ns() // 1_000_000
+    value = uuid7()
+    after = time.time_ns() // 1_000_000
+    assert before <= value.int >> 80 <= after + 1
+
+
+def test_ids_are_strictly_increasing():
+    values = [uuid7() for _ in range(10000)]
+    assert all(a < b for a, b in zip(values, values[1:]))
+    assert len(set(values)) == len(values)
+
+
+def test_monotonic_when_the_clock_goes_back(monkeypatch):
+    first = uuid7()
+    monkeypatch.setattr(ids.time, "time_ns", lambda: (first.int >> 80) * 1_000_000 - 5_000_000_000)
+    second = uuid7()
+    assert second > first
+    assert second.int >> 80 == first.int >> 80
+
+
+def test_sequence_overflow_moves_to_the_next_millisecond(monkeypatch):
+    frozen = time.time_ns() + 10_000_000_000
+    monkeypatch.setattr(ids.time, "time_ns", lambda: frozen)
+    values = [uuid7() for _ in range(5000)]  # More than the 12-bit sequence holds in one millisecond
+    assert all(a < b for a, b in zip(values, values[1:]))
+    assert values[-1].int >> 80 > frozen // 1_000_000
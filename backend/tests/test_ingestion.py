@@ -0,0 +1,111 @@
+"""
+Bounded ingestion queue: backpressure, drain and stop
+"""
+import asyncio
+
+import pytest
+
+from app.core.ingestion import IngestionQueue, IngestionQueueFull
+
+
+def test_submit_before_start_is_rejected():
+    queue = IngestionQueue(lambda item: asyncio.sleep(0), maxsize=2, workers=1)
+    with pytest.raises(IngestionQueueFull):
+        queue.submit("item")
+
+
+def test_items_are_processed_and_drained():
+    processed = []
+    
+    async def handler(item):
+        await asyncio.sleep(0.01)
+        processed.append(item)
+    
+    async def run():
+        queue = IngestionQueue(handler, maxsize=10, workers=3)
+        await queue.start()
+        for i in range(10):
+            queue.submit(i)
+        assert await queue.drain(timeout=2)
+        assert queue.depth == 0
+        assert await queue.stop() == []
+    
+    asyncio.run(run())
+    assert sorted(processed) == list(range(10))
+
+
+def test_full_queue_rejects_new_items():
+    async def run():
+        release = asyncio.Event()
+        
+        async def handler(item):
+            await release.wait()
+        
+        queue = IngestionQueue(handler, maxsize=2, workers=1)
+        await queue.start()
+        queue.submit("running")
+        await asyncio.sleep(0)  # Let the worker pick it up
+        queue.submit("queued-1")
+        queue.submit("queued-2")
+        with pytest.raises(IngestionQueueFull):
+            queue.submit("rejected")
+        release.set()
+        assert await queue.drain(timeout=2)
+        await queue.stop()
+    
+    asyncio.run(run())
+
+
+def test_handler_errors_do_not_stop_the_worker():
+    processed = []
+    
+    async def handler(item):
+        if item == "bad":
+            raise ValueError("boom")
+        processed.append(item)
+    
+    async def run():
+        queue = IngestionQueue(handler, maxsize=5, workers=1)
+        await queue.start()
+        for item in ("bad", "good"):
+            queue.submit(item)
+        assert await queue.drain(timeout=2)
+        await queue.stop()
+    
+    asyncio.run(run())
+    assert processed == ["good"]
+
+
+def test_close_stops_accepting_but_drains_queued_items():
+    processed = []
+    
+    async def handler(item):
+        processed.append(item)
+    
+    async def run():
+        queue = IngestionQueue(handler, maxsize=5, workers=1)
+        await queue.start()
+        queue.submit("before")
+        queue.close()
+        with pytest.raises(IngestionQueueFull):
+            queue.submit("after")
+        assert await queue.drain(timeout=2)
+        await queue.stop()
+    
+    asyncio.run(run())
+    assert processed == ["before"]
+
+
+def test_drain_times_out_and_stop_returns_unstarted_items():
+    async def handler(item):
+        await asyncio.sleep(60)
+    
+    async def run():
+        queue = IngestionQueue(handler, maxsize=5, workers=1)
+        await queue.start()
+        for item in ("running", "left-1", "left-2"):
+            queue.submit(item)
+        assert not await queue.drain(timeout=0.05)
+        return await queue.stop()
+    
+    assert asyncio.run(run()) == ["left-1", "left-2"]
@@ -0,0 +1,67 @@
+"""
+Job outcomes and lock heartbeats (JobQueue, without Postgres)
+"""
+import asyncio
+
+from app.core.jobs import ClaimedJob, JobQueue
+
+
+def claimed(kind: str = "test.job") -> ClaimedJob:
+    job = ClaimedJob.__new__(ClaimedJob)
+    job.id, job.kind, job.payload, job.data = "job-1", kind, {}, None
+    job.attempts, job.max_attempts, job.run_at = 1, 3, None
+    return job
+
+
+def queue(monkeypatch, lock_timeout: float = 600) -> JobQueue:
+    jobs = JobQueue(concurrency=1, poll_interval=0.01, lock_timeout=lock_timeout, worker_id="test")
+    jobs.finished = []
+    jobs.touched = 0
+    
+    def finish(job, error):
+        jobs.finished.append(error)
+    
+    def touch(job):
+        jobs.touched += 1
+    
+    monkeypatch.setattr(jobs, "_finish", finish)
+    monkeypatch.setattr(jobs, "_touch", touch)
+    return jobs
+
+
+def test_handler_error_is_recorded_for_retry(monkeypatch):
+    jobs = queue(monkeypatch)
+    
+    async def handler(payload, data):
+        raise RuntimeError("turn failed")
+    
+    jobs.register("test.job", handler)
+    asyncio.run(jobs._run(claimed()))
+    assert jobs.finished == ["turn failed"]
+
+
+def test_successful_job_is_finished_without_error(monkeypatch):
+    jobs = queue(monkeypatch)
+    
+    async def handler(payload, data):
+        pass
+    
+    jobs.register("test.job", handler)
+    asyncio.run(jobs._run(claimed()))
+    assert jobs.finished == [None]
+
+
+def test_long_job_keeps_its_lock_fresh(monkeypatch):
+    jobs = queue(monkeypatch, lock_timeout=0.06)
+    
+    async def handler(payload, data):
+        await asyncio.sleep(0.1)
+    
+    jobs.register("test.job", handler)
+    asyncio.run(jobs._run(claimed()))
+    assert jobs.touched >= 3
+    touched = jobs.touched
+    
+    # The heartbeat stops with the job
+    asyncio.run(asyncio.sleep(0.05))
+    assert jobs.touched == touched
@@ -0,0 +1,150 @@
+"""
+Debounce merge and durability of buffered messages (MessageProcessor)
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.message_processor import MessageProcessor
+from app.integrations.messaging.base_messaging import InboundMessage
+
+
+def message(content: str, durable: bool = False, chat_guid: str = "iMessage;-;+15550001111") -> InboundMessage:
+    return InboundMessage(
+        source="bluebubbles",
+        sender="+15550002222",
+        content=content,
+        chat_guid=chat_guid,
+        message_guid=f"guid-{content}",
+        durable=durable
+    )
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(settings, "MESSAGE_DEBOUNCE_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "MESSAGE_DEBOUNCE_MAX_SECONDS", 1.0)
+    processor = MessageProcessor()
+    processor.handled = []
+    
+    async def handle_message(message_data: InboundMessage):
+        processor.handled.append(message_data)
+    
+    processor.handle_message = handle_message
+    return processor
+
+
+def test_merge_keeps_fragments_and_order(processor):
+    messages = [message("hey"), message("are you free"), message("tomorrow?")]
+    merged = processor._merge_messages(messages)
+    
+    assert merged.content == "hey\nare you free\ntomorrow?"
+    assert merged.fragments == messages
+    assert merged.message_guid == "guid-tomorrow?"
+    assert not merged.durable
+
+
+def test_merge_is_durable_only_if_every_fragment_is():
+    processor = MessageProcessor()
+    assert processor._merge_messages([message("a", durable=True), message("b", durable=True)]).durable
+    assert not processor._merge_messages([message("a", durable=True), message("b")]).durable
+
+
+def test_merge_of_one_message_returns_it(processor):
+    single = message("hello")
+    assert processor._merge_messages([single]) is single
+
+
+def test_burst_becomes_one_turn(processor):
+    async def run():
+        for content in ("one", "two", "three"):
+            await processor.accept(message(content))
+        assert processor.handled == []  # Still inside the debounce window
+        assert await processor.drain(timeout=2)
+    
+    asyncio.run(run())
+    assert len(processor.handled) == 1
+    assert processor.handled[0].content == "one\ntwo\nthree"
+
+
+def test_durable_caller_waits_for_the_buffered_turn(processor):
+    async def run():
+        await processor.accept(message("from a job", durable=True))
+        # The job may be marked done now, so the turn must have run
+        assert [m.content for m in processor.handled] == ["from a job"]
+    
+    asyncio.run(run())
+
+
+def test_unfinished_buffered_messages_are_returned_for_replay(processor, monkeypatch):
+    monkeypatch.setattr(settings, "MESSAGE_DEBOUNCE_SECONDS", 60)
+    
+    async def handle_message(message_data: InboundMessage):
+        await asyncio.sleep(60)
+    
+    processor.handle_message = handle_message
+    
+    async def run():
+        await processor.accept(message("first"))
+        await processor.accept(message("second"))
+        await asyncio.sleep(0)
+        return await processor.stop()
+    
+    unfinished = asyncio.run(run())
+    assert len(unfinished) == 1
+    assert unfinished[0].content == "first\nsecond"
+    assert not unfinished[0].durable
+
+
+def test_failed_turn_reaches_the_durable_caller(processor):
+    async def fail(message_data: InboundMessage):
+        raise RuntimeError("database is down")
+    
+    processor.handle_message = fail
+    
+    async def run():
+        with pytest.raises(RuntimeError):
+            await processor.accept(message("from a job", durable=True))
+        # Not left behind as in flight
+        assert await processor.drain(timeout=1)
+    
+    asyncio.run(run())
+
+
+def test_failed_turn_does_not_fail_a_non_durable_caller(processor, monkeypatch):
+    monkeypatch.setattr(settings, "MESSAGE_DEBOUNCE_SECONDS", 0)
+    
+    async def fail(message_data: InboundMessage):
+        raise RuntimeError("database is down")
+    
+    processor.handle_message = fail
+    
+    async def run():
+        await processor.accept(message("from a webhook"))
+        assert await processor.drain(timeout=1)
+    
+    asyncio.run(run())
+
+
+def test_failed_turn_releases_its_guids_for_redelivery(processor, monkeypatch):
+    from app.core import message_processor
+    from app.core.dedupe import MessageDeduplicator
+    
+    deduplicator = MessageDeduplicator(max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr(message_processor, "message_deduplicator", deduplicator)
+    
+    async def fail(message_data: InboundMessage):
+        raise RuntimeError("llm is down")
+    
+    processor.handle_message = fail
+    
+    async def run():
+        for content in ("one", "two"):
+            assert not await deduplicator.is_duplicate_async(f"guid-{content}")
+            await processor.accept(message(content))
+        assert await processor.drain(timeout=2)
+        assert not deduplicator.seen("guid-one")
+        assert not deduplicator.seen("guid-two")
+    
+    asyncio.run(run())
@@ -0,0 +1,34 @@
+"""
+Keyset pagination cursors
+"""
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 17, 15, 48, 6, 902137, tzinfo=timezone.utc)
+    row_id = uuid4()
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+
+
+def test_cursor_round_trip_naive_datetime():
+    created_at = datetime(2026, 1, 2, 3, 4, 5)
+    row_id = uuid4()
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+
+
+def test_cursor_is_url_safe_and_unpadded():
+    cursor = encode_cursor(datetime(2026, 10, 17, tzinfo=timezone.utc), uuid4())
+    assert "=" not in cursor
+    assert "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30", encode_cursor(datetime(2026, 1, 1), uuid4())[:-6]])
+def test_malformed_cursor_raises_validation_error(cursor):
+    with pytest.raises(ValidationError):
+        decode_cursor(cursor)
@@ -0,0 +1,31 @@
+"""
+E.164 phone normalization
+"""
+import pytest
+
+from app.utils.phone import to_e164
+
+
+@pytest.mark.parametrize("phone_number", [
+    "+14089167303",
+    "+1 (408) 916-7303",
+    "(408) 916-7303",
+    "408-916-7303",
+    "4089167303",
+    "1 408 916 7303",
+])
+def test_us_formats_normalize_to_one_value(phone_number):
+    assert to_e164(phone_number) == "+14089167303"
+
+
+def test_international_number_keeps_its_country_code():
+    assert to_e164("+44 20 7946 0958") == "+442079460958"
+
+
+def test_default_region_applies_to_numbers_without_a_country_code():
+    assert to_e164("020 7946 0958", default_region="GB") == "+442079460958"
+
+
+@pytest.mark.parametrize("phone_number", [None, "", "not a number", "123"])
+def test_invalid_numbers_return_none(phone_number):
+    assert to_e164(phone_number) is None
@@ -0,0 +1,79 @@
+"""
+Replayed turns reuse the row stored by their interrupted run (MessageProcessor.handle_message)
+"""
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.core.chat_owners import ChatOwner
+from app.core.message_processor import MessageProcessor
+from app.integrations.messaging.base_messaging import InboundMessage
+from app.models.task import TaskStatus
+from app.services.agent.handlers.base_handler import TaskResult
+from app.services.conversation_service import ConversationService
+
+
+def replayed() -> InboundMessage:
+    return InboundMessage(
+        source="bluebubbles",
+        sender="+15550002222",
+        content="book the dentist",
+        chat_guid="iMessage;-;+15550001111",
+        message_guid="guid-1",
+        durable=True
+    )
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    processor = MessageProcessor()
+    processor.tasks = []
+    processor.sent = []
+    
+    async def identify(message_data, db=None):
+        return ChatOwner(id=uuid4())
+    
+    async def process_task(task_data):
+        processor.tasks.append(task_data)
+        return TaskResult(status="failed", output=None)
+    
+    async def send(recipient, content, chat_guid=None, user=None):
+        processor.sent.append(content)
+    
+    async def store(*args, **kwargs):
+        raise AssertionError("the message was stored again")
+    
+    monkeypatch.setattr(processor, "_identify_user_from_message", identify)
+    monkeypatch.setattr(processor.agent, "process_task", process_task)
+    monkeypatch.setattr(processor, "_send_response", send)
+    monkeypatch.setattr(ConversationService, "store_message_async", store)
+    monkeypatch.setattr(ConversationService, "store_linked_messages_async", store)
+    return processor
+
+
+def stored_turn(monkeypatch, **fields):
+    turn = SimpleNamespace(id=uuid4(), **fields)
+    
+    async def get_turn(db, user_id, message_guid):
+        assert message_guid == "guid-1"
+        return turn
+    
+    monkeypatch.setattr(ConversationService, "get_turn_async", get_turn)
+    return turn
+
+
+def test_unanswered_turn_reuses_its_row(processor, monkeypatch):
+    turn = stored_turn(monkeypatch, status=TaskStatus.PENDING, output=None)
+    asyncio.run(processor.handle_message(replayed()))
+    
+    assert [task.task_id for task in processor.tasks] == [str(turn.id)]
+
+
+def test_answered_turn_resends_its_response_without_rerunning_the_agent(processor, monkeypatch):
+    stored_turn(monkeypatch, status=TaskStatus.COMPLETED, output="Booked for Tuesday at 3")
+    asyncio.run(processor.handle_message(replayed()))
+    
+    assert processor.tasks == []
+    assert processor.sent == ["Booked for Tuesday at 3"]
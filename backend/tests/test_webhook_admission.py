@@ -0,0 +1,83 @@
+"""
+Shedding and the degraded tier's own turn budget
+"""
+import asyncio
+
+import pytest
+
+from app.api.v1.webhooks import bluebubbles
+from app.core.admission import Admission
+from app.core.config import settings
+from app.core.ingestion import IngestionQueueFull
+from app.core.message_processor import MessageProcessor
+from app.integrations.messaging.base_messaging import InboundMessage
+
+
+def payload(guid: str):
+    return {
+        "type": "new-message",
+        "data": {
+            "guid": guid,
+            "text": "hello",
+            "handle": {"address": "+15550001111"},
+            "chats": [{"guid": "iMessage;-;+15550002222"}],
+        },
+    }
+
+
+class FullQueue:
+    depth = 0
+    
+    def submit(self, item):
+        raise IngestionQueueFull("full")
+
+
+def test_shed_message_gets_a_busy_reply_even_when_the_degraded_tier_is_full(monkeypatch):
+    shed = []
+    monkeypatch.setattr(bluebubbles.admission_controller, "decide", lambda depth: Admission.SHED)
+    monkeypatch.setattr(bluebubbles, "ingestion_queue", FullQueue())
+    monkeypatch.setattr(bluebubbles, "degraded_queue", FullQueue())
+    monkeypatch.setattr(bluebubbles, "shed_message", shed.append)
+    
+    with pytest.raises(IngestionQueueFull):
+        bluebubbles.admit_webhook(payload("guid-1"))
+    assert shed == [payload("guid-1")]
+
+
+def test_degraded_turns_have_their_own_budget(monkeypatch):
+    monkeypatch.setattr(settings, "MESSAGE_DEBOUNCE_SECONDS", 0)
+    monkeypatch.setattr(settings, "DISPATCHER_MAX_PENDING_TURNS", 10)
+    monkeypatch.setattr(settings, "ADMISSION_DEGRADED_MAX_PENDING_TURNS", 1)
+    processor = MessageProcessor()
+    
+    async def run():
+        release = asyncio.Event()
+        
+        async def handle_message(message_data: InboundMessage):
+            await release.wait()
+        
+        processor.handle_message = handle_message
+        
+        def message(n: int, degraded: bool) -> InboundMessage:
+            return InboundMessage(
+                source="bluebubbles",
+                sender=f"+1555000{n:04d}",
+                content="hi",
+                chat_guid=f"iMessage;-;+1555000{n:04d}",
+                degraded=degraded
+            )
+        
+        await processor.accept(message(1, degraded=True))
+        # The degraded budget is used up...
+        second = asyncio.create_task(processor.accept(message(2, degraded=True)))
+        await asyncio.sleep(0.05)
+        assert not second.done()
+        # ...but normal messages still get in
+        await asyncio.wait_for(processor.accept(message(3, degraded=False)), timeout=1)
+        
+        release.set()
+        await asyncio.wait_for(second, timeout=1)
+        assert await processor.drain(timeout=1)
+        await processor.dispatcher.stop()
+    
+    asyncio.run(run())
@@ -0,0 +1,69 @@
+"""
+Webhook jobs run even when their GUID was already claimed
+"""
+import asyncio
+
+from app.api.v1.webhooks import bluebubbles
+from app.core.dedupe import MessageDeduplicator
+from app.core.events import EventType
+
+
+def payload(guid: str):
+    return {
+        "type": "new-message",
+        "data": {
+            "guid": guid,
+            "text": "hello",
+            "handle": {"address": "+15550001111"},
+            "chats": [{"guid": "iMessage;-;+15550002222"}],
+        },
+    }
+
+
+def record_emits(monkeypatch):
+    deduplicator = MessageDeduplicator(max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr(bluebubbles, "message_deduplicator", deduplicator)
+    emitted = []
+    
+    async def emit(event_type, message, *args, **kwargs):
+        assert event_type == EventType.MESSAGE_RECEIVED
+        emitted.append(message)
+    
+    monkeypatch.setattr(bluebubbles.event_bus, "emit", emit)
+    return deduplicator, emitted
+
+
+def test_redelivered_webhook_is_dropped(monkeypatch):
+    _, emitted = record_emits(monkeypatch)
+    
+    async def run():
+        await bluebubbles.process_webhook_event(payload("guid-1"))
+        await bluebubbles.process_webhook_event(payload("guid-1"))
+    
+    asyncio.run(run())
+    assert [m.message_guid for m in emitted] == ["guid-1"]
+
+
+def test_durable_job_runs_again_after_its_guid_was_claimed(monkeypatch):
+    deduplicator, emitted = record_emits(monkeypatch)
+    
+    async def run():
+        # Claimed when the webhook was enqueued as a job
+        assert not await deduplicator.is_duplicate_async("guid-1")
+        # First attempt, then a retry (or a release on shutdown, or a stale-lock reclaim)
+        await bluebubbles.run_webhook_job(payload("guid-1"))
+        await bluebubbles.run_webhook_job(payload("guid-1"))
+    
+    asyncio.run(run())
+    assert [m.message_guid for m in emitted] == ["guid-1", "guid-1"]
+    assert all(m.durable for m in emitted)
+
+
+def test_unprocessed_payloads_already_claimed_elsewhere_are_not_saved(monkeypatch):
+    deduplicator, _ = record_emits(monkeypatch)
+    saved = []
+    monkeypatch.setattr(bluebubbles.job_queue, "enqueue", lambda kind, body: saved.append(body["data"]["guid"]))
+    
+    asyncio.run(deduplicator.is_duplicate_async("guid-1"))
+    assert bluebubbles.persist_webhooks_for_replay([payload("guid-1"), payload("guid-2")]) == 1
+    assert saved == ["guid-2"]